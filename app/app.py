@@ -1,36 +1,20 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from models.forecaster import TBATSForecaster
-from utils.data_handler import preprocess_data, postprocess_results
+import os
+import sys
 
-app = Flask(__name__)
-# Włączenie CORS dla wszystkich źródeł
-CORS(app, resources={r"/*": {"origins": "*"}})
+# The forecasting service is provided by predict_data.app. This entry point
+# keeps the behavior of the former app/ service: the 'fixed' model profile
+# (fixed TBATS components, rows flagged as predicted) unless a request asks
+# for another profile, and models stored next to this file.
+os.environ.setdefault('TBATS_DEFAULT_PROFILE', 'fixed')
+os.environ.setdefault('MODEL_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_store'))
 
-@app.route('/predictData', methods=['POST'])
-def predict_data():
-    try:
-        # Get JSON data from request
-        data = request.get_json()
-        
-        # Validate input data
-        if not data or not isinstance(data, list):
-            return jsonify({"error": "Invalid input: Expected a JSON array"}), 400
-            
-        # Preprocess data for TBATS model
-        processed_data = preprocess_data(data)
-        
-        # Initialize forecaster and make predictions
-        forecaster = TBATSForecaster()
-        predictions = forecaster.forecast(processed_data)
-        
-        # Combine historical and predicted data
-        result = postprocess_results(data, predictions)
-        
-        return jsonify(result)
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+# Make the predict_data package importable when run from this directory
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+from predict_data.app import app, start_warm_up
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    start_warm_up()
+    app.run(debug=True, host='0.0.0.0', port=5000)
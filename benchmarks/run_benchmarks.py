@@ -0,0 +1,560 @@
+"""
+Benchmark suite for the TBATS fit/forecast hot path and the HTTP endpoints.
+
+Runs synthetic series of varying length and seasonality through:
+
+- TBATSPredictor.train and TBATSPredictor.predict, and TBATSPredictor.predict_batch
+  over many cached models (checked against the tbats forecasts)
+- TBATSPredictor with the 'fixed' profile, fitted and from the model cache
+- the data_loader/utils request pipeline
+- the /predictData endpoint with the 'auto' profile of predict_data/app.py
+  and the 'fixed' profile served by app/app.py, called through the Flask
+  test client
+- the import of the command line and server entry points, each in a fresh
+  interpreter, checked against an import time budget and a list of heavy
+  modules the entry point must not import
+
+Results are written as JSON so that runs of two versions can be compared:
+
+    python benchmarks/run_benchmarks.py --output before.json
+    python benchmarks/run_benchmarks.py --output after.json --compare before.json
+"""
+
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Allow running as a script from any directory
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+# Format version of the result file, bumped when its layout changes
+RESULTS_FORMAT_VERSION = 1
+
+# Default series: (length, seasonal period, seasonal amplitude)
+DEFAULT_LENGTHS = (30, 85, 150)
+DEFAULT_PERIODS = (0, 7)
+SEASONAL_AMPLITUDE = 0.15
+
+# Cached models forecast together by the predictor.predict_batch case
+KERNEL_BATCH_SIZE = 1000
+
+# Relative slowdown of the median time reported as a regression by --compare
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+# Entry points timed by the 'imports' cases: heavy modules they must not
+# import, and budget (seconds) of their median import time. predict_data.app
+# imports tbats in a background thread, so it is not checked for tbats.
+IMPORT_BUDGETS = {
+    'predict_data': (('pandas', 'flask', 'tbats', 'matplotlib'), 0.05),
+    'predict_data.config': (('pandas', 'flask', 'tbats', 'matplotlib'), 0.05),
+    'predict_data.serve': (('pandas', 'flask', 'tbats', 'matplotlib'), 0.05),
+    'predict_data.main': (('flask', 'tbats', 'matplotlib'), 1.0),
+    'predict_data.app': (('matplotlib',), 1.5),
+}
+
+# Prints the import time of a module and the modules it loaded, run in a fresh interpreter
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(m for m in sys.modules if '.' not in m)}}))
+"""
+
+
+def make_series(length, period=0, amplitude=SEASONAL_AMPLITUDE, seed=0, last_year=2023):
+    """
+    Generate a synthetic fertility-rate-like series.
+
+    The series has a slowly declining level, an optional cycle and noise,
+    and is kept positive like a real total fertility rate.
+
+    Args:
+        length (int): Number of yearly observations.
+        period (int, optional): Period of the cycle in years; 0 disables it.
+        amplitude (float, optional): Amplitude of the cycle.
+        seed (int, optional): Seed of the noise generator.
+        last_year (int, optional): Year of the last observation.
+
+    Returns:
+        dict: Columnar series with 'year' and 'tfr' lists.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(length)
+    tfr = 2.5 - 1.2 * t / max(length - 1, 1) + rng.normal(0.0, 0.03, length)
+    if period:
+        tfr += amplitude * np.sin(2 * np.pi * t / period)
+    tfr = np.round(np.clip(tfr, 0.5, None), 3)
+    years = np.arange(last_year - length + 1, last_year + 1)
+    return {"year": years.tolist(), "tfr": tfr.tolist()}
+
+
+def to_records(series):
+    """
+    Convert a columnar series to a list of year/tfr records.
+
+    Args:
+        series (dict): Columnar series with 'year' and 'tfr' lists.
+
+    Returns:
+        list: List of dictionaries with 'year' and 'tfr' keys.
+    """
+    return [{"year": year, "tfr": tfr} for year, tfr in zip(series["year"], series["tfr"])]
+
+
+def time_call(func, repeats, setup=None):
+    """
+    Time repeated calls of a function.
+
+    Args:
+        func (callable): Function to time, called without arguments.
+        repeats (int): Number of timed calls.
+        setup (callable, optional): Called before every timed call, not timed.
+
+    Returns:
+        dict: Number of repeats and min/median/mean/max wall time in seconds.
+    """
+    timings = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "repeats": repeats,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+    }
+
+
+def time_import(module, repeats):
+    """
+    Time the import of a module, each time in a fresh interpreter.
+
+    Args:
+        module (str): Module name.
+        repeats (int): Number of timed imports.
+
+    Returns:
+        tuple: Timing as returned by time_call, and the top-level modules
+            loaded by the import.
+    """
+    timings = []
+    loaded = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, '-c', IMPORT_PROBE.format(module=module)],
+            cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        timings.append(probe["seconds"])
+        loaded = probe["modules"]
+
+    return {
+        "repeats": repeats,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+    }, loaded
+
+
+def load_predict_data_app(store_dir):
+    """
+    Import predict_data.app with its model store moved to a scratch directory.
+
+    Args:
+        store_dir (str): Directory of the model store used by the benchmark.
+
+    Returns:
+        module: The predict_data.app module.
+    """
+    # The module, not the Flask object predict_data/__init__.py exposes as 'app'
+    api = importlib.import_module('predict_data.app')
+    reset_predict_data_app(api, store_dir)
+    return api
+
+
+def reset_predict_data_app(api, store_dir):
+    """
+    Drop every fitted model known to predict_data.app, forcing the next request to fit.
+
+    Args:
+        api (module): The predict_data.app module.
+        store_dir (str): Empty directory used as the new model store.
+    """
+    api.model_cache.clear()
+    api.model_store = api.ModelStore(store_dir)
+    api._latest_fit_keys.clear()
+
+
+class BenchmarkRunner:
+    """
+    Runs the benchmark cases and collects their timings.
+    """
+
+    def __init__(self, lengths, periods, fit_repeats, fast_repeats, n_jobs, workdir):
+        """
+        Initialize the runner.
+
+        Args:
+            lengths (tuple): Lengths of the synthetic series.
+            periods (tuple): Seasonal periods of the synthetic series; 0 means no cycle.
+            fit_repeats (int): Repeats of cases that fit a model.
+            fast_repeats (int): Repeats of cases that only forecast or transform data.
+            n_jobs (int): Processes TBATSPredictor uses to compare candidate models.
+            workdir (str): Scratch directory for model stores.
+        """
+        self.lengths = lengths
+        self.periods = periods
+        self.fit_repeats = fit_repeats
+        self.fast_repeats = fast_repeats
+        self.n_jobs = n_jobs
+        self.workdir = workdir
+        self.results = []
+        self.import_failures = []
+        self._store_count = 0
+
+    def new_store_dir(self):
+        """
+        Create an empty model store directory.
+
+        Returns:
+            str: Path to the directory.
+        """
+        self._store_count += 1
+        path = os.path.join(self.workdir, f'store_{self._store_count}')
+        os.makedirs(path)
+        return path
+
+    def record(self, name, series_params, timing):
+        """
+        Store the timing of one case and report it on stderr.
+
+        Args:
+            name (str): Name of the benchmark case.
+            series_params (dict): Length and period of the benchmarked series.
+            timing (dict): Timing returned by time_call.
+        """
+        self.results.append(dict(name=name, **series_params, **timing))
+        print(
+            f"{name:<32} length={series_params['length']:<4} period={series_params['period']:<3} "
+            f"median={timing['median'] * 1000:10.2f} ms",
+            file=sys.stderr
+        )
+
+    def run(self, cases):
+        """
+        Run the selected benchmark cases for every synthetic series.
+
+        Args:
+            cases (list): Names of the case groups to run.
+
+        Returns:
+            list: Result of every benchmark case.
+        """
+        if 'imports' in cases:
+            self.bench_imports()
+
+        api = load_predict_data_app(self.new_store_dir()) if 'endpoints' in cases else None
+
+        for length in self.lengths:
+            for period in self.periods:
+                series = make_series(length, period, seed=length * 100 + period)
+                series_params = {"length": length, "period": period}
+                if 'pipeline' in cases:
+                    self.bench_pipeline(series, series_params)
+                if 'predictor' in cases:
+                    self.bench_predictor(series, series_params)
+                if 'fixed_profile' in cases:
+                    self.bench_fixed_profile(series, series_params)
+                if 'endpoints' in cases:
+                    self.bench_predict_data_endpoint(api, series, series_params)
+                    self.bench_service_endpoint(api, series, series_params)
+
+        return self.results
+
+    def bench_imports(self):
+        """
+        Time the import of every entry point of IMPORT_BUDGETS and check its budget.
+
+        Entry points that import a forbidden module or exceed their import
+        time budget are added to import_failures.
+        """
+        for module, (forbidden, budget) in IMPORT_BUDGETS.items():
+            timing, loaded = time_import(module, self.fit_repeats)
+            self.record(f'import.{module}', {"length": 0, "period": 0}, timing)
+
+            heavy = sorted(set(forbidden) & set(loaded))
+            if heavy:
+                self.import_failures.append(f"{module} imports {', '.join(heavy)}")
+            if timing["median"] > budget:
+                self.import_failures.append(
+                    f"{module} takes {timing['median'] * 1000:.0f} ms to import (budget {budget * 1000:.0f} ms)"
+                )
+
+    def bench_pipeline(self, series, series_params):
+        from predict_data.data_loader import parse_series_payload, arrays_to_time_series, preprocess_data
+        from predict_data.utils import postprocess_predictions, encode_records, encode_columns
+
+        records = to_records(series)
+        predictions = np.asarray(series["tfr"][-10:]) * 0.9
+        last_year = series["year"][-1]
+
+        def parse(payload):
+            years, tfr = parse_series_payload(payload)
+            return preprocess_data(arrays_to_time_series(years, tfr))
+
+        def respond_records():
+            parse(records)
+            encode_records(records, postprocess_predictions(predictions, last_year + 1))
+
+        def respond_columns():
+            parse(series)
+            encode_columns(postprocess_predictions(predictions, last_year + 1), series)
+
+        self.record('pipeline.records', series_params, time_call(respond_records, self.fast_repeats))
+        self.record('pipeline.columns', series_params, time_call(respond_columns, self.fast_repeats))
+
+    def bench_predictor(self, series, series_params):
+        from predict_data.config import TBATS_PARAMS
+        from predict_data.data_loader import arrays_to_time_series, preprocess_data
+        from predict_data.tbats_predictor import TBATSPredictor
+
+        ts_data = preprocess_data(arrays_to_time_series(np.asarray(series["year"]), np.asarray(series["tfr"])))
+        predictor = TBATSPredictor(**TBATS_PARAMS, n_jobs=self.n_jobs)
+
+        self.record('predictor.train', series_params, time_call(lambda: predictor.train(ts_data), self.fit_repeats))
+        self.record('predictor.predict', series_params, time_call(lambda: predictor.predict(steps=10), self.fast_repeats))
+
+        # The batched forecast kernel must reproduce the tbats forecasts
+        expected = predictor.fitted_model.forecast(steps=10)
+        assert np.allclose(predictor.predict(steps=10), expected, rtol=1e-9, atol=1e-12), "forecast kernel mismatch"
+        predictors = [predictor] * KERNEL_BATCH_SIZE
+        self.record(
+            f'predictor.predict_batch.{KERNEL_BATCH_SIZE}', series_params,
+            time_call(lambda: TBATSPredictor.predict_batch(predictors, steps=10), self.fast_repeats)
+        )
+
+    def bench_fixed_profile(self, series, series_params):
+        # The 'fixed' profile replaces the TBATSForecaster of the former app/ service
+        from predict_data.config import MODEL_PROFILES
+        from predict_data.data_loader import arrays_to_time_series, preprocess_data
+        from predict_data.model_cache import ModelCache, series_fingerprint
+        from predict_data.tbats_predictor import TBATSPredictor
+
+        params = MODEL_PROFILES['fixed']['params']
+        ts_data = preprocess_data(arrays_to_time_series(np.asarray(series["year"]), np.asarray(series["tfr"])))
+
+        def cold():
+            predictor = TBATSPredictor(**params, n_jobs=self.n_jobs)
+            predictor.train(ts_data)
+            return predictor.predict(steps=10)
+
+        self.record('predictor.fixed_profile.cold', series_params, time_call(cold, self.fit_repeats))
+
+        cache = ModelCache()
+        predictor = TBATSPredictor(**params, n_jobs=self.n_jobs)
+        cache.put(series_fingerprint(ts_data, params), predictor.train(ts_data))
+
+        def warm():
+            predictor.fitted_model = cache.get(series_fingerprint(ts_data, params))
+            return predictor.predict(steps=10)
+
+        self.record('predictor.fixed_profile.warm', series_params, time_call(warm, self.fast_repeats))
+
+    def bench_predict_data_endpoint(self, api, series, series_params):
+        client = api.app.test_client()
+        records = to_records(series)
+
+        def post():
+            response = client.post('/predictData', json=records)
+            assert response.status_code == 200, response.get_data(as_text=True)
+
+        def reset():
+            reset_predict_data_app(api, self.new_store_dir())
+
+        self.record('predict_data.predictData.cold', series_params, time_call(post, self.fit_repeats, setup=reset))
+        self.record('predict_data.predictData.warm', series_params, time_call(post, self.fast_repeats))
+
+    def bench_service_endpoint(self, api, series, series_params):
+        client = api.app.test_client()
+        records = to_records(series)
+
+        def post():
+            response = client.post('/predictData?profile=fixed', json=records)
+            assert response.status_code == 200, response.get_data(as_text=True)
+
+        def reset():
+            reset_predict_data_app(api, self.new_store_dir())
+
+        self.record('app.predictData.cold', series_params, time_call(post, self.fit_repeats, setup=reset))
+        self.record('app.predictData.warm', series_params, time_call(post, self.fast_repeats))
+
+
+def collect_environment():
+    """
+    Describe the environment the benchmarks ran in.
+
+    Returns:
+        dict: Interpreter, library versions, machine and git revision.
+    """
+    import tbats
+
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "tbats": tbats.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_revision": revision,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+def compare_results(current, baseline, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """
+    Compare median timings of two benchmark runs.
+
+    Args:
+        current (dict): Results of the current run.
+        baseline (dict): Results of the run to compare with.
+        threshold (float, optional): Relative slowdown reported as a regression.
+
+    Returns:
+        list: One dictionary per case present in both runs, with the baseline
+            and current medians, their ratio and a regression flag.
+    """
+    def key(result):
+        return result["name"], result["length"], result["period"]
+
+    baseline_medians = {key(result): result["median"] for result in baseline["results"]}
+    comparison = []
+    for result in current["results"]:
+        before = baseline_medians.get(key(result))
+        if before is None:
+            continue
+        ratio = result["median"] / before if before > 0 else float('inf')
+        comparison.append({
+            "name": result["name"],
+            "length": result["length"],
+            "period": result["period"],
+            "baseline_median": before,
+            "median": result["median"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        })
+    return comparison
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the TBATS fit/forecast path and HTTP endpoints')
+
+    parser.add_argument('--output', type=str, default=None,
+                        help='Path of the JSON result file (default: standard output)')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='JSON result file of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help=f'Relative slowdown reported as a regression (default: {DEFAULT_REGRESSION_THRESHOLD})')
+    parser.add_argument('--lengths', type=int, nargs='+', default=list(DEFAULT_LENGTHS),
+                        help='Lengths of the synthetic series')
+    parser.add_argument('--periods', type=int, nargs='+', default=list(DEFAULT_PERIODS),
+                        help='Seasonal periods of the synthetic series, 0 for none')
+    parser.add_argument('--cases', nargs='+', default=['imports', 'pipeline', 'predictor', 'fixed_profile', 'endpoints'],
+                        choices=['imports', 'pipeline', 'predictor', 'fixed_profile', 'endpoints'],
+                        help='Benchmark groups to run')
+    parser.add_argument('--fit-repeats', type=int, default=3,
+                        help='Repeats of cases that fit a model (default: 3)')
+    parser.add_argument('--repeats', type=int, default=50,
+                        help='Repeats of cases that do not fit a model (default: 50)')
+    parser.add_argument('--n-jobs', type=int, default=None,
+                        help='Processes TBATSPredictor uses to compare candidate models (default: all cores)')
+    parser.add_argument('--quick', action='store_true',
+                        help='Single short series and one fit repeat, for a smoke run')
+
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.lengths, args.periods, args.fit_repeats, args.repeats = [30], [0], 1, 5
+    return args
+
+
+def main(argv=None):
+    """
+    Run the benchmarks and write the results.
+
+    Returns:
+        bool: False if a regression was found when comparing with an earlier run.
+    """
+    args = parse_arguments(argv)
+
+    with tempfile.TemporaryDirectory(prefix='tbats_bench_') as workdir:
+        runner = BenchmarkRunner(
+            tuple(args.lengths), tuple(args.periods), args.fit_repeats, args.repeats, args.n_jobs, workdir
+        )
+        results = runner.run(args.cases)
+
+    report = {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "environment": collect_environment(),
+        "results": results,
+    }
+
+    ok = True
+    if runner.import_failures:
+        ok = False
+        report["import_failures"] = runner.import_failures
+        for failure in runner.import_failures:
+            print(f"IMPORT BUDGET {failure}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        report["comparison"] = compare_results(report, baseline, args.threshold)
+        for item in report["comparison"]:
+            if item["regression"]:
+                ok = False
+                print(
+                    f"REGRESSION {item['name']} length={item['length']} period={item['period']}: "
+                    f"{item['baseline_median'] * 1000:.2f} ms -> {item['median'] * 1000:.2f} ms "
+                    f"({item['ratio']:.2f}x)",
+                    file=sys.stderr
+                )
+
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(encoded + '\n')
+    else:
+        print(encoded)
+
+    return ok
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
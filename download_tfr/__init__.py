@@ -0,0 +1,7 @@
+"""
+Download and preparation of the fertility rate data.
+
+The scripts can be run from inside this directory (python worldbank.py) or
+as modules of the package from the repository root
+(python -m download_tfr.worldbank).
+"""
@@ -0,0 +1,122 @@
+"""
+Tests of the World Bank downloader against a local stub server.
+
+Run with: python -m pytest download_tfr/test_worldbank.py
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from download_tfr.worldbank import WorldBankClient, create_session, download, series_path
+
+INDICATOR = 'SP.DYN.TFRT.IN'
+RECORDS = [
+    {"indicator": {"id": INDICATOR}, "countryiso3code": "POL", "date": str(year), "value": 2.0 - (year - 2000) / 100}
+    for year in range(2000, 2005)
+]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Serves RECORDS paginated for every country, as the World Bank API does.
+    """
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        page = int(query['page'][0])
+        per_page = int(query['per_page'][0])
+        server.requests.append((url.path, page))
+
+        if server.failures > 0:
+            server.failures -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        etag = f'"{url.path}-{page}"'
+        if self.headers.get('If-None-Match') == etag:
+            server.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        pages = (len(RECORDS) + per_page - 1) // per_page
+        meta = {"page": page, "pages": pages, "per_page": per_page, "total": len(RECORDS)}
+        body = json.dumps([meta, RECORDS[(page - 1) * per_page:page * per_page]]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.requests = []
+    server.failures = 0
+    server.not_modified = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server, **kwargs):
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    return WorldBankClient(base_url=base_url, session=create_session(backoff=0), per_page=2, **kwargs)
+
+
+def test_fetch_indicator_follows_pagination(server):
+    records = make_client(server).fetch_indicator('PL', INDICATOR)
+
+    assert records == RECORDS
+    assert [page for _, page in server.requests] == [1, 2, 3]
+
+
+def test_fetch_indicator_retries_server_errors(server):
+    server.failures = 2
+    records = make_client(server).fetch_indicator('PL', INDICATOR)
+
+    assert records == RECORDS
+    # Two failed attempts of the first page, then the three pages
+    assert [page for _, page in server.requests] == [1, 1, 1, 2, 3]
+
+
+def test_cached_pages_are_revalidated(server, tmp_path):
+    client = make_client(server, cache_dir=str(tmp_path / 'cache'))
+    assert client.fetch_indicator('PL', INDICATOR) == RECORDS
+    assert server.not_modified == 0
+
+    # The second download sends the cached ETags and reads the bodies from the cache
+    assert client.fetch_indicator('PL', INDICATOR) == RECORDS
+    assert server.not_modified == 3
+
+
+def test_download_resume_skips_saved_combinations(server, tmp_path):
+    output_dir = str(tmp_path / 'data')
+    client = make_client(server)
+    summary = download(['PL'], [INDICATOR], output_dir, client=client)
+    assert summary == {"saved": [series_path(output_dir, 'PL', INDICATOR)], "skipped": [], "errors": {}}
+    with open(series_path(output_dir, 'PL', INDICATOR), 'r', encoding='utf-8') as f:
+        assert [item['year'] for item in json.load(f)] == list(range(2000, 2005))
+
+    server.requests.clear()
+    summary = download(['PL', 'DE'], [INDICATOR], output_dir, client=client, resume=True)
+
+    assert summary["skipped"] == [series_path(output_dir, 'PL', INDICATOR)]
+    assert summary["saved"] == [series_path(output_dir, 'DE', INDICATOR)]
+    assert {path for path, _ in server.requests} == {f'/country/DE/indicator/{INDICATOR}'}
+    assert os.path.exists(series_path(output_dir, 'DE', INDICATOR))
@@ -0,0 +1,436 @@
+"""
+Concurrent downloader of World Bank indicator data.
+
+Many country x indicator combinations are fetched concurrently over a single
+pooled HTTP session. Every combination is paginated, failed requests are
+retried with backoff, and responses are cached on disk with their ETag and
+Last-Modified headers, so unchanged pages are revalidated with a conditional
+request instead of downloaded again. Every combination is saved to its own
+file as soon as it is downloaded; with --resume, combinations saved by an
+interrupted run are not downloaded again.
+
+Run from the command line:
+
+    python worldbank.py --countries PL DE CZ --indicators SP.DYN.TFRT.IN --start 1939 --end 2023 --output-dir data
+
+The API location is configurable (--base-url), e.g. to run against a local
+stub server.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_BASE_URL = 'https://api.worldbank.org/v2'
+FERTILITY_INDICATOR = 'SP.DYN.TFRT.IN'
+
+DEFAULT_PER_PAGE = 1000  # Records requested per page
+DEFAULT_MAX_WORKERS = 8  # Combinations downloaded concurrently, and pooled connections
+DEFAULT_RETRIES = 3  # Retries of a request failing with a connection error or a retryable status
+DEFAULT_BACKOFF_SECONDS = 0.5  # Base of the exponential backoff between retries
+DEFAULT_TIMEOUT_SECONDS = 30  # Connect and read timeout of a request
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class WorldBankError(Exception):
+    """
+    Error reported by the World Bank API in a successful HTTP response.
+    """
+
+
+def create_session(max_workers=DEFAULT_MAX_WORKERS, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF_SECONDS):
+    """
+    Create an HTTP session with a connection pool and retries.
+
+    Args:
+        max_workers (int, optional): Number of pooled connections per host.
+        retries (int, optional): Number of retries of a failed request.
+        backoff (float, optional): Base of the exponential backoff between retries, in seconds.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=('GET',),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class ResponseCache:
+    """
+    On-disk cache of response bodies with their ETag and Last-Modified headers.
+    """
+
+    def __init__(self, cache_dir):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str): Directory of the cached responses, created if missing.
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, url):
+        """
+        Return the cached entry of a URL.
+
+        Args:
+            url (str): Full request URL, including the query string.
+
+        Returns:
+            dict: Entry with 'etag', 'last_modified' and 'body', or None if not cached.
+        """
+        try:
+            with open(self._path(url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url, response):
+        """
+        Cache a response if it can be revalidated.
+
+        Args:
+            url (str): Full request URL, including the query string.
+            response (requests.Response): Successful response.
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag is None and last_modified is None:
+            return
+        entry = {"etag": etag, "last_modified": last_modified, "body": response.text}
+        _write_atomic(self._path(url), json.dumps(entry))
+
+
+class WorldBankClient:
+    """
+    Client of the World Bank indicator API.
+
+    The client is thread safe; all requests share one pooled session.
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, session=None, cache_dir=None, per_page=DEFAULT_PER_PAGE,
+                 timeout=DEFAULT_TIMEOUT_SECONDS, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Initialize the client.
+
+        Args:
+            base_url (str, optional): API location, e.g. a local stub server.
+            session (requests.Session, optional): Session to send requests with.
+                If None, a session from create_session is used.
+            cache_dir (str, optional): Directory of the response cache. If None,
+                responses are not cached.
+            per_page (int, optional): Records requested per page.
+            timeout (float, optional): Connect and read timeout of a request, in seconds.
+            max_workers (int, optional): Combinations downloaded concurrently by fetch_many.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.session = session or create_session(max_workers)
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.per_page = per_page
+        self.timeout = timeout
+        self.max_workers = max_workers
+
+    def fetch_indicator(self, country, indicator, start_year=None, end_year=None):
+        """
+        Fetch all records of an indicator for a country, following the pagination.
+
+        Args:
+            country (str): ISO country code, e.g. 'PL'.
+            indicator (str): Indicator code, e.g. 'SP.DYN.TFRT.IN'.
+            start_year (int, optional): First year requested, used together with end_year.
+            end_year (int, optional): Last year requested, used together with start_year.
+
+        Returns:
+            list: Records as returned by the API.
+
+        Raises:
+            WorldBankError: If the API reports an error.
+            requests.RequestException: If a request fails after all retries.
+        """
+        url = f'{self.base_url}/country/{country}/indicator/{indicator}'
+        params = {"format": "json", "per_page": self.per_page}
+        if start_year is not None and end_year is not None:
+            params["date"] = f'{start_year}:{end_year}'
+
+        records = []
+        page, pages = 1, 1
+        while page <= pages:
+            meta, page_records = self._get_page(url, dict(params, page=page))
+            records.extend(page_records or [])
+            pages = int(meta.get('pages') or 1)
+            page += 1
+        return records
+
+    def fetch_many(self, combinations, start_year=None, end_year=None, on_result=None):
+        """
+        Fetch many country and indicator combinations concurrently.
+
+        Args:
+            combinations (list): (country, indicator) pairs.
+            start_year (int, optional): First year requested.
+            end_year (int, optional): Last year requested.
+            on_result (callable, optional): Called with the country, indicator and
+                records of every combination as soon as it is downloaded, e.g.
+                to save it.
+
+        Returns:
+            tuple: Dictionary of (country, indicator) to records, and dictionary
+                of (country, indicator) to error message of failed combinations.
+        """
+        results = {}
+        errors = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='worldbank') as executor:
+            futures = {
+                executor.submit(self.fetch_indicator, country, indicator, start_year, end_year): (country, indicator)
+                for country, indicator in combinations
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                    if on_result is not None:
+                        on_result(key[0], key[1], results[key])
+                except Exception as e:
+                    errors[key] = str(e)
+        return results, errors
+
+    def _get_page(self, url, params):
+        """
+        Get a page, revalidating a cached copy with a conditional request.
+
+        Returns:
+            tuple: Page metadata and records.
+        """
+        request_url = requests.Request('GET', url, params=params).prepare().url
+        cached = self.cache.get(request_url) if self.cache else None
+        headers = {}
+        if cached is not None:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        response = self.session.get(request_url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and cached is not None:
+            body = cached['body']
+        else:
+            response.raise_for_status()
+            body = response.text
+            if self.cache:
+                self.cache.put(request_url, response)
+        return _parse_page(body)
+
+
+def _parse_page(body):
+    payload = json.loads(body)
+    if not isinstance(payload, list) or not payload or not isinstance(payload[0], dict):
+        raise WorldBankError("Unexpected response format")
+    meta = payload[0]
+    if 'message' in meta:
+        messages = '; '.join(str(m.get('value', m)) for m in meta['message'])
+        raise WorldBankError(messages or "World Bank API error")
+    return meta, payload[1] if len(payload) > 1 else []
+
+
+def records_to_frame(records):
+    """
+    Convert API records to a data frame.
+
+    Args:
+        records (list): Records as returned by the API.
+
+    Returns:
+        pd.DataFrame: Columns 'country', 'indicator', 'year' (int) and 'value'
+            (float, NaN where missing), sorted by year.
+    """
+    if not records:
+        return pd.DataFrame({
+            "country": pd.Series(dtype=object),
+            "indicator": pd.Series(dtype=object),
+            "year": pd.Series(dtype=np.int64),
+            "value": pd.Series(dtype=np.float64),
+        })
+    frame = pd.json_normalize(records)
+    country = frame['countryiso3code'] if 'countryiso3code' in frame else frame['country.id']
+    return pd.DataFrame({
+        "country": country.to_numpy(),
+        "indicator": frame['indicator.id'].to_numpy(),
+        "year": pd.to_numeric(frame['date'], errors='coerce').to_numpy(),
+        "value": pd.to_numeric(frame['value'], errors='coerce').to_numpy(dtype=np.float64),
+    }).dropna(subset=['year']).astype({"year": np.int64}).sort_values('year', kind='stable').reset_index(drop=True)
+
+
+def frame_to_series(frame):
+    """
+    Convert a data frame of one series to the year/tfr records the predictor reads.
+
+    Years without a value are dropped.
+
+    Args:
+        frame (pd.DataFrame): Data frame from records_to_frame.
+
+    Returns:
+        list: List of dictionaries with year and tfr keys.
+    """
+    observed = frame['value'].notna().to_numpy()
+    years = frame['year'].to_numpy()[observed].tolist()
+    values = frame['value'].to_numpy()[observed].tolist()
+    return [{"year": year, "tfr": tfr} for year, tfr in zip(years, values)]
+
+
+def series_path(output_dir, country, indicator):
+    """
+    Return the path of the file a combination is saved to.
+    """
+    return os.path.join(output_dir, f'{country}_{indicator}.json')
+
+
+def save_series(records, path):
+    """
+    Save the records of a combination as a year/tfr JSON file, atomically.
+
+    Args:
+        records (list): Records as returned by the API.
+        path (str): Output file.
+
+    Returns:
+        list: The saved year/tfr records.
+    """
+    series = frame_to_series(records_to_frame(records))
+    _write_atomic(path, json.dumps(series, indent=2))
+    return series
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def download(countries, indicators, output_dir, start_year=None, end_year=None, client=None, resume=False):
+    """
+    Download every country x indicator combination into its own year/tfr JSON file.
+
+    Args:
+        countries (list): ISO country codes.
+        indicators (list): Indicator codes.
+        output_dir (str): Directory the files are saved to, named '<country>_<indicator>.json'.
+        start_year (int, optional): First year requested.
+        end_year (int, optional): Last year requested.
+        client (WorldBankClient, optional): Client to download with.
+        resume (bool, optional): Skip combinations whose file already exists.
+
+    Returns:
+        dict: Paths of the 'saved' and 'skipped' files and error message per
+            failed combination in 'errors'.
+    """
+    client = client or WorldBankClient()
+    combinations = [(country, indicator) for country in countries for indicator in indicators]
+    skipped = []
+    if resume:
+        skipped = [
+            series_path(output_dir, country, indicator) for country, indicator in combinations
+            if os.path.exists(series_path(output_dir, country, indicator))
+        ]
+        combinations = [
+            (country, indicator) for country, indicator in combinations
+            if series_path(output_dir, country, indicator) not in skipped
+        ]
+
+    saved = []
+
+    def on_result(country, indicator, records):
+        path = series_path(output_dir, country, indicator)
+        save_series(records, path)
+        saved.append(path)
+
+    _, errors = client.fetch_many(combinations, start_year, end_year, on_result=on_result)
+    return {
+        "saved": saved,
+        "skipped": skipped,
+        "errors": {f'{country}_{indicator}': error for (country, indicator), error in errors.items()},
+    }
+
+
+def main(argv=None):
+    """
+    Download World Bank indicator data from the command line.
+
+    Returns:
+        dict: The download summary, or None if the download failed.
+    """
+    parser = argparse.ArgumentParser(description='Download World Bank indicator data for many countries')
+    parser.add_argument('--countries', nargs='+', required=True,
+                        help='ISO country codes, e.g. PL DE CZ')
+    parser.add_argument('--indicators', nargs='+', default=[FERTILITY_INDICATOR],
+                        help=f'Indicator codes (default: {FERTILITY_INDICATOR})')
+    parser.add_argument('--start', type=int, default=None, help='First year')
+    parser.add_argument('--end', type=int, default=None, help='Last year')
+    parser.add_argument('--output-dir', type=str, default='.',
+                        help='Directory of the downloaded year/tfr JSON files')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory of the response cache (default: no cache)')
+    parser.add_argument('--base-url', type=str, default=DEFAULT_BASE_URL,
+                        help='API location')
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help='Number of concurrent downloads')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip combinations already downloaded to the output directory')
+    args = parser.parse_args(argv)
+    if (args.start is None) != (args.end is None):
+        parser.error('--start and --end must be given together')
+
+    try:
+        client = WorldBankClient(
+            base_url=args.base_url,
+            session=create_session(args.workers),
+            cache_dir=args.cache_dir,
+            max_workers=args.workers
+        )
+        summary = download(
+            args.countries, args.indicators, args.output_dir,
+            start_year=args.start, end_year=args.end, client=client, resume=args.resume
+        )
+        print(f"Saved {len(summary['saved'])} files, skipped {len(summary['skipped'])} already downloaded")
+        for key, error in summary['errors'].items():
+            print(f"Failed {key}: {error}")
+        return summary
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return None
+
+
+if __name__ == '__main__':
+    main()
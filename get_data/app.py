@@ -1,29 +1,33 @@
-from flask import Flask, jsonify
-import json
+from flask import Flask, request, jsonify
 import os
+import sys
 from flask_cors import CORS
 
+# Make the predict_data package importable when run from any directory
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+from predict_data.materialize import MaterializedFile
+
 app = Flask(__name__)
 CORS(app) 
 
+# Historical data, kept in memory until the file changes
+current_dir = os.path.dirname(os.path.abspath(__file__))
+data_file = MaterializedFile(os.path.join(current_dir, 'fertility_poland_1939_2023.json'))
+
 @app.route('/getUnpredictedData', methods=['GET'])
 def get_unpredicted_data():
     try:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        json_file_path = os.path.join(current_dir, 'fertility_poland_1939_2023.json')
-        
-        # Read the JSON file
-        with open(json_file_path, 'r') as file:
-            data = json.load(file)
-        
-        # Return the JSON data
-        return jsonify(data)
+        # Serve the pre-serialized data, or 304 if the client already has it
+        return data_file.response(request)
     except FileNotFoundError:
         return jsonify({"error": "Data file not found"}), 404
-    except json.JSONDecodeError:
+    except ValueError:
         return jsonify({"error": "Invalid JSON in data file"}), 500
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
@@ -7,6 +7,16 @@ Trend, and Seasonal components) model.
 
 The package now includes a Flask API server that provides a REST API
 for making predictions using the TBATS model.
+
+Modules are imported on first use: importing the package does not import
+Flask or tbats, so command line tools only load what they need.
 """
 
-from .app import app
\ No newline at end of file
+import importlib
+
+
+def __getattr__(name):
+    # The Flask application, imported lazily (from predict_data import app)
+    if name == 'app':
+        return importlib.import_module('.app', __name__).app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
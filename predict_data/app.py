@@ -2,61 +2,1131 @@
 Flask API server for TBATS fertility rate prediction.
 """
 
-from flask import Flask, request, jsonify
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
+import collections
+import hashlib
+import importlib
 import json
+import multiprocessing
+import threading
+import time
 
-from .data_loader import convert_to_time_series, preprocess_data
-from .tbats_predictor import TBATSPredictor
-from .utils import format_predictions, combine_data, validate_predictions
-from .config import DEFAULT_STEPS, TBATS_PARAMS
+import numpy as np
+
+from .data_loader import parse_series_payload, arrays_to_time_series, preprocess_data
+from .tbats_predictor import TBATSPredictor, FIT_MODES, deadline_stats
+from .baselines import fit_baselines
+from .deadline import DeadlineExceeded
+from .model_cache import ModelCache, series_fingerprint
+from .compact_model import CompactModel
+from .model_store import ModelStore
+from .jobs import JobManager, QueueFullError
+from .single_flight import SingleFlight
+from .backtest import run_backtest, rolling_origins
+from .scenarios import SCENARIO_FITS, parse_scenarios, forecast_scenario
+from .simulation import simulate
+from .metrics import registry, SamplingProfiler, SIZE_BUCKETS, POINTS_BUCKETS
+from .utils import postprocess_predictions, bound_values, encode_records, encode_columns, encode_json, decode_json
+from .config import (
+    DEFAULT_STEPS,
+    MODEL_PROFILES,
+    DEFAULT_PROFILE,
+    DEFAULT_FIT_MODE,
+    DEFAULT_CONFIDENCE_LEVELS,
+    MODEL_CACHE_MAX_ENTRIES,
+    MODEL_CACHE_TTL_SECONDS,
+    MODEL_CACHE_MAX_BYTES,
+    MODEL_CACHE_COMPACT,
+    MODEL_STORE_DIR,
+    MODEL_STORE_WARM_LIMIT,
+    BATCH_MAX_WORKERS,
+    DEADLINE_MAX_SECONDS,
+    SCENARIO_MAX_SCENARIOS,
+    SCENARIO_DEFAULT_FIT,
+    SIMULATION_PATHS,
+    SIMULATION_MAX_PATHS,
+    SIMULATION_QUANTILES,
+    BACKTEST_HORIZON,
+    BACKTEST_MIN_TRAIN,
+    BACKTEST_STEP,
+    BACKTEST_CONFIDENCE_LEVEL,
+    JOB_MAX_WORKERS,
+    JOB_MAX_PENDING,
+    JOB_RESULT_TTL_SECONDS,
+    PROFILE_SLOW_REQUEST_SECONDS,
+    PROFILE_SAMPLE_INTERVAL_SECONDS,
+    PROFILE_MAX_SLOW_REQUESTS
+)
 
 app = Flask(__name__)
 CORS(app)
 
+# Fitted models shared between requests, keyed by series fingerprint
+model_cache = ModelCache(
+    max_entries=MODEL_CACHE_MAX_ENTRIES,
+    ttl=MODEL_CACHE_TTL_SECONDS,
+    max_bytes=MODEL_CACHE_MAX_BYTES,
+    compact=MODEL_CACHE_COMPACT
+)
+
+# Fitted models persisted across restarts; loaded into the cache in the background
+model_store = ModelStore(MODEL_STORE_DIR)
+
+
+def warm_up():
+    """
+    Import tbats and load the stored models into the cache.
+
+    tbats takes seconds to import, so it is imported here rather than by the
+    first request that fits a model.
+    """
+    importlib.import_module('tbats')
+    model_store.warm(model_cache, limit=MODEL_STORE_WARM_LIMIT)
+
+
+# Thread running warm_up, started by the server entry points
+store_warm_thread = None
+_warm_up_lock = threading.Lock()
+
+
+def start_warm_up():
+    """
+    Run warm_up in a background thread, unless it was started already.
+
+    The server entry points start it rather than the import of this module,
+    so processes that only import the application, e.g. multiprocessing
+    workers re-importing the main script, do not run it.
+
+    Returns:
+        threading.Thread: The warm-up thread.
+    """
+    global store_warm_thread
+    with _warm_up_lock:
+        if store_warm_thread is None:
+            store_warm_thread = threading.Thread(target=warm_up, name='warm-up', daemon=True)
+            store_warm_thread.start()
+        return store_warm_thread
+
+# Concurrent requests for the same series share a single fit
+fit_flight = SingleFlight()
+
+# Cache key of the latest fit for each (series id, parameters) pair, used to
+# update that fit instead of refitting when new years are appended. Holds at
+# most MODEL_CACHE_MAX_ENTRIES pairs, dropping the least recently fitted first
+_latest_fit_keys = collections.OrderedDict()
+_latest_fit_keys_lock = threading.Lock()
+
+# Fallback forecasts returned because a fit exceeded its deadline, by fallback model
+fallback_counts = collections.Counter()
+_fallback_counts_lock = threading.Lock()
+
+# Process pool for /predictBatch, created on the first batch request
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
+
+# Bounded worker pool running asynchronous prediction jobs
+job_manager = JobManager(
+    max_workers=JOB_MAX_WORKERS,
+    max_pending=JOB_MAX_PENDING,
+    result_ttl=JOB_RESULT_TTL_SECONDS
+)
+
+# Request metrics exposed on /metrics
+registry.register('tbats_request_duration_seconds', 'Time spent handling HTTP requests')
+registry.register('tbats_request_size_bytes', 'Size of HTTP request bodies', buckets=SIZE_BUCKETS)
+registry.register('tbats_request_points', 'Number of observations in requested series', buckets=POINTS_BUCKETS)
+
+# Optional sampling profiler keeping the stacks of slow requests
+profiler = None
+if PROFILE_SLOW_REQUEST_SECONDS is not None:
+    profiler = SamplingProfiler(
+        PROFILE_SLOW_REQUEST_SECONDS,
+        interval=PROFILE_SAMPLE_INTERVAL_SECONDS,
+        max_profiles=PROFILE_MAX_SLOW_REQUESTS
+    )
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    if profiler is not None:
+        profiler.start(f'{request.method} {request.full_path.rstrip("?")}')
+
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    registry.observe(
+        'tbats_request_duration_seconds', time.perf_counter() - g.request_start,
+        endpoint=endpoint, method=request.method, status=response.status_code
+    )
+    if request.content_length:
+        registry.observe('tbats_request_size_bytes', request.content_length, endpoint=endpoint)
+    if profiler is not None:
+        profiler.stop()
+    return response
+
+
+def get_fitted_model(predictor, ts_data, params, series_id=None, deadline=None):
+    """
+    Return a fitted model for the series, fitting it only if no stored fit exists.
+
+    The in-memory cache is checked first, then the on-disk model store. Newly
+    fitted models are written to both. Concurrent calls for the same series
+    are coalesced so that only one of them loads or fits the model.
+
+    Args:
+        predictor (TBATSPredictor): Predictor that receives the fitted model.
+        ts_data (pd.Series): Preprocessed time series data.
+        params (dict): Parameters the predictor was created with.
+        series_id (str, optional): Identifier of the series, used by the 'fast' fit mode.
+        deadline (float, optional): Seconds a fit may take, see TBATSPredictor.train.
+
+    Returns:
+        tbats.tbats.TBATS_Model: Fitted TBATS model.
+
+    Raises:
+        DeadlineExceeded: If the model had to be fitted, or an identical fit was
+            in flight, and the fit exceeded the deadline.
+    """
+    cache_key = series_fingerprint(ts_data, params)
+    fitted_model = model_cache.get(cache_key)
+    if fitted_model is None:
+        # Requests waiting for the same fit give up at their own deadline, too
+        fitted_model = fit_flight.do(
+            cache_key, _load_or_fit, predictor, ts_data, params, cache_key, series_id, deadline,
+            timeout=deadline
+        )
+
+    predictor.fitted_model = fitted_model
+    return fitted_model
+
+
+def _load_or_fit(predictor, ts_data, params, cache_key, series_id, deadline=None):
+    fitted_model = model_store.load(cache_key)
+    if fitted_model is None:
+        fitted_model = _update_latest_fit(predictor, ts_data, params, series_id, deadline)
+        if fitted_model is None:
+            fitted_model = predictor.train(ts_data, series_id=series_id, deadline=deadline)
+        model_store.save(cache_key, fitted_model, params)
+    model_cache.put(cache_key, fitted_model)
+    if series_id is not None:
+        _remember_latest_fit(series_id, params, cache_key)
+    return fitted_model
+
+
+def _remember_latest_fit(series_id, params, cache_key):
+    key = (series_id, json.dumps(params, sort_keys=True))
+    with _latest_fit_keys_lock:
+        _latest_fit_keys[key] = cache_key
+        _latest_fit_keys.move_to_end(key)
+        while len(_latest_fit_keys) > MODEL_CACHE_MAX_ENTRIES:
+            _latest_fit_keys.popitem(last=False)
+
+
+def _latest_fit(series_id, params):
+    """
+    Return the latest fit of a series if it is still cached, without counting a cache lookup.
+    """
+    with _latest_fit_keys_lock:
+        latest_key = _latest_fit_keys.get((series_id, json.dumps(params, sort_keys=True)))
+    return model_cache.peek(latest_key) if latest_key is not None else None
+
+
+def _update_latest_fit(predictor, ts_data, params, series_id, deadline=None):
+    """
+    Update the latest fit of the series if the new data only appends observations to it.
+
+    Returns:
+        tbats.tbats.TBATS_Model: Updated model, or None if there is no usable previous fit.
+    """
+    if series_id is None:
+        return None
+
+    latest_model = _latest_fit(series_id, params)
+    # Compact models do not keep the data needed to update them
+    if latest_model is None or getattr(latest_model, 'y', None) is None:
+        return None
+
+    history = latest_model.y
+    values = ts_data.values
+    if len(values) <= len(history) or not np.allclose(values[:len(history)], history):
+        return None
+
+    predictor.fitted_model = latest_model
+    return predictor.update(values[len(history):], series_id=series_id, deadline=deadline)
+
+
+def fit_or_fallback(predictor, ts_data, params, series_id=None, deadline=None, full_model=False):
+    """
+    Give the predictor a fitted model, or a fallback model if the fit exceeds its deadline.
+
+    The fallback is the latest fit of the same series id, if it was fitted to
+    as many observations, or else the baseline model with the lowest AIC.
+    Fallback models are not cached, so the next request fits again.
+
+    Args:
+        predictor (TBATSPredictor): Predictor that receives the model.
+        ts_data (pd.Series): Preprocessed time series data.
+        params (dict): Parameters the predictor was created with.
+        series_id (str, optional): Identifier of the series.
+        deadline (float, optional): Seconds the fit may take.
+        full_model (bool, optional): Require a model that keeps its training
+            data, e.g. to warm-start other fits from it, rather than a compact
+            model from the cache.
+
+    Returns:
+        str: Name of the fallback model ('cached' or a baseline name), or None
+            if the model was fitted (or found) in time.
+
+    Raises:
+        DeadlineExceeded: If the fit exceeded the deadline and the series is
+            too short for a baseline. The endpoints answer it with 422.
+    """
+    try:
+        fitted_model = get_fitted_model(predictor, ts_data, params, series_id, deadline)
+        if full_model and isinstance(fitted_model, CompactModel):
+            # The compact cache does not keep the full model, the model store does
+            fitted_model = model_store.load(series_fingerprint(ts_data, params))
+            if fitted_model is None:
+                fitted_model = predictor.train(ts_data, series_id=series_id, deadline=deadline)
+            predictor.fitted_model = fitted_model
+        return None
+    except DeadlineExceeded as e:
+        fallback_model, fallback = _fallback_model(ts_data, params, series_id, full_model)
+        if fallback_model is None:
+            raise DeadlineExceeded(
+                f"The fit did not finish within {deadline:g} seconds, and series shorter than "
+                "3 years have no fallback model"
+            ) from e
+
+    predictor.fitted_model = fallback_model
+    predictor.fit_strategy = 'fallback'
+    with _fallback_counts_lock:
+        fallback_counts[fallback] += 1
+    return fallback
+
+
+def _fallback_model(ts_data, params, series_id, full_model=False):
+    """
+    Return the model answering a request whose fit exceeded its deadline, and its name.
+    """
+    values = ts_data.to_numpy(np.float64)
+    if series_id is not None:
+        latest_model = _latest_fit(series_id, params)
+        if latest_model is not None and not (full_model and isinstance(latest_model, CompactModel)):
+            n_obs = latest_model.n_obs if isinstance(latest_model, CompactModel) else len(latest_model.y)
+            if n_obs == len(values):
+                return latest_model, 'cached'
+
+    if len(values) < 3:
+        return None, None
+    best = min(fit_baselines(values), key=lambda model: model.aic)
+    return best, best.name
+
+
+def fallback_response(response, fallback):
+    """
+    Flag a response answered by a fallback model with the X-Forecast-Fallback header.
+
+    Args:
+        response (flask.Response): Response to flag.
+        fallback (str): Name of the fallback model, or None.
+
+    Returns:
+        flask.Response: The response.
+    """
+    if fallback is not None:
+        response.headers['X-Forecast-Fallback'] = fallback
+    return response
+
+
+def get_fit_deadline():
+    """
+    Return the fit deadline of the current request.
+
+    The deadline is read from the 'deadline' query parameter (seconds), and
+    defaults to the 'fit_deadline' of the model profile.
+
+    Returns:
+        float: Seconds a fit may take, or None for no deadline.
+
+    Raises:
+        ValueError: If the deadline is not a positive number of at most DEADLINE_MAX_SECONDS.
+    """
+    raw_deadline = request.args.get('deadline')
+    if raw_deadline is None:
+        return get_profile()['fit_deadline']
+
+    try:
+        deadline = float(raw_deadline)
+    except ValueError:
+        deadline = 0.0
+    if not 0 < deadline <= DEADLINE_MAX_SECONDS:
+        raise ValueError(f"deadline must be a number of seconds between 0 and {DEADLINE_MAX_SECONDS:g}")
+    return deadline
+
+
+def get_profile():
+    """
+    Return the model profile of the current request.
+
+    The profile is read from the 'profile' query parameter.
+
+    Returns:
+        dict: Model profile, see MODEL_PROFILES in config.py.
+
+    Raises:
+        ValueError: If the requested profile does not exist.
+    """
+    name = request.args.get('profile', DEFAULT_PROFILE)
+    if name not in MODEL_PROFILES:
+        raise ValueError(f"profile must be one of {', '.join(MODEL_PROFILES)}")
+    return MODEL_PROFILES[name]
+
+
+def get_model_params():
+    """
+    Build the model parameters for the current request.
+
+    The TBATS parameters come from the model profile and the fit mode is read
+    from the 'mode' query parameter.
+
+    Returns:
+        dict: TBATS parameters and fit mode passed to TBATSPredictor.
+
+    Raises:
+        ValueError: If the requested profile or fit mode is not supported.
+    """
+    fit_mode = request.args.get('mode', DEFAULT_FIT_MODE)
+    if fit_mode not in FIT_MODES:
+        raise ValueError(f"mode must be one of {', '.join(FIT_MODES)}")
+    return dict(get_profile()['params'], fit_mode=fit_mode)
+
+
+def load_request_json():
+    """
+    Parse the JSON body of the current request.
+
+    Returns:
+        object: Parsed JSON payload, or None if the body is not valid JSON.
+    """
+    try:
+        return decode_json(request.get_data())
+    except ValueError:
+        return None
+
+
+def parse_request_series(request_data):
+    """
+    Parse and preprocess a series given as year/tfr records or columns.
+
+    Args:
+        request_data (object): Parsed JSON request body.
+
+    Returns:
+        pd.Series: Preprocessed time series data.
+
+    Raises:
+        ValueError: If the data is not in an accepted format.
+    """
+    years, tfr = parse_series_payload(request_data)
+    registry.observe('tbats_request_points', len(years))
+    return preprocess_data(arrays_to_time_series(years, tfr))
+
+
+def get_confidence_levels():
+    """
+    Read the confidence levels of the current request.
+
+    The levels are read from the 'levels' query parameter as a comma separated
+    list, e.g. '0.8,0.95,0.99'.
+
+    Returns:
+        list: Confidence levels between 0 and 1.
+
+    Raises:
+        ValueError: If a level is not a number between 0 and 1.
+    """
+    raw_levels = request.args.get('levels')
+    if raw_levels is None:
+        return list(DEFAULT_CONFIDENCE_LEVELS)
+
+    try:
+        levels = [float(level) for level in raw_levels.split(',')]
+    except ValueError:
+        levels = []
+    if not levels or not all(0 < level < 1 for level in levels):
+        raise ValueError("levels must be a comma separated list of numbers between 0 and 1")
+    return levels
+
+
+def build_combined_data(request_data, predictor, last_year, steps=DEFAULT_STEPS, confidence_levels=None,
+                        flag_predictions=False, predictions=None):
+    """
+    Generate predictions with a trained predictor and append them to the history.
+
+    The result is encoded as JSON in the format of the request: a list of
+    year/tfr records, or an object of 'year' and 'tfr' arrays. When confidence
+    levels are given, every prediction also carries 'lower_<level>' and
+    'upper_<level>' bounds, e.g. 'lower_95' for the 0.95 level. With
+    flag_predictions, every row carries a 'predicted' flag.
+
+    Args:
+        request_data (list or dict): Historical data as sent in the request.
+        predictor (TBATSPredictor): Trained predictor.
+        last_year (int): Last year of the historical data.
+        steps (int, optional): Number of years to predict.
+        confidence_levels (list, optional): Confidence levels of prediction intervals.
+        flag_predictions (bool, optional): Add a 'predicted' flag to every row.
+        predictions (np.ndarray, optional): Predictions already computed with the
+            predictor, e.g. by TBATSPredictor.predict_batch; ignored with confidence levels.
+
+    Returns:
+        JSONFragment: Encoded historical data and predictions.
+    """
+    if confidence_levels:
+        predictions, intervals = predictor.predict_with_intervals(steps=steps, confidence_levels=confidence_levels)
+    else:
+        if predictions is None:
+            predictions = predictor.predict(steps=steps)
+        intervals = {}
+
+    # Round predictions, keep them within reasonable bounds and attach years
+    columns = postprocess_predictions(predictions, last_year + 1)
+    for level, (lower_bounds, upper_bounds) in intervals.items():
+        label = f'{level * 100:g}'
+        columns[f'lower_{label}'] = bound_values(lower_bounds)
+        columns[f'upper_{label}'] = bound_values(upper_bounds)
+    if flag_predictions:
+        columns['predicted'] = np.ones(steps, dtype=bool)
+
+    # Combine historical data with predictions
+    if isinstance(request_data, dict):
+        historical = {"year": request_data['year'], "tfr": request_data['tfr']}
+        if flag_predictions:
+            historical['predicted'] = [False] * len(request_data['year'])
+        return encode_columns(columns, historical=historical)
+    if flag_predictions:
+        request_data = [dict(item, predicted=False) for item in request_data]
+    return encode_records(request_data, columns)
+
+
+def json_response(value, status=200):
+    """
+    Build a JSON response, embedding pre-encoded fragments as they are.
+
+    Args:
+        value (object): Value to encode, see utils.encode_json.
+        status (int, optional): HTTP status code. Defaults to 200.
+
+    Returns:
+        flask.Response: JSON response.
+    """
+    return Response(encode_json(value), status=status, mimetype='application/json')
+
+
+def get_batch_executor():
+    """
+    Return the process pool used for batch fits, creating it on first use.
+
+    Workers are started by a fork server rather than forked from the server
+    process, whose running threads may hold locks (e.g. an import lock) that
+    a forked worker would inherit and wait for forever. The fork server
+    preloads tbats and the predictor, but not the __main__ module, which
+    may import this application.
+
+    Returns:
+        concurrent.futures.ProcessPoolExecutor: Shared batch executor.
+    """
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['tbats', 'predict_data.tbats_predictor'])
+            _batch_executor = ProcessPoolExecutor(max_workers=BATCH_MAX_WORKERS, mp_context=context)
+        return _batch_executor
+
+
+def run_prediction(request_data, preprocessed_data, params, series_id=None, confidence_levels=None,
+                   flag_predictions=False):
+    """
+    Fit (or reuse) a model for a series and return the combined data.
+
+    Args:
+        request_data (list or dict): Historical data as sent in the request.
+        preprocessed_data (pd.Series): Preprocessed time series data.
+        params (dict): Model parameters, see get_model_params.
+        series_id (str, optional): Identifier of the series, used by the 'fast' fit mode.
+        confidence_levels (list, optional): Confidence levels of prediction intervals.
+        flag_predictions (bool, optional): Add a 'predicted' flag to every row.
+
+    Returns:
+        JSONFragment: Encoded historical data and predictions.
+    """
+    predictor = TBATSPredictor(**params)
+    get_fitted_model(predictor, preprocessed_data, params, series_id)
+    return build_combined_data(
+        request_data, predictor, int(preprocessed_data.index[-1]),
+        confidence_levels=confidence_levels, flag_predictions=flag_predictions
+    )
+
+
 @app.route('/predictData', methods=['POST'])
 def predict_data():
     """
     API endpoint to predict fertility rates using TBATS model.
     
-    Expects a JSON array of objects with 'year' and 'tfr' fields.
-    Returns the combined historical data and predictions.
+    Expects a JSON array of objects with 'year' and 'tfr' fields, or a
+    columnar object {"year": [...], "tfr": [...]}.
+    Returns the combined historical data and predictions in the same format.
     """
     try:
         # Get JSON data from request
-        request_data = request.get_json()
+        request_data = load_request_json()
+        
+        # Validate input format and process the input data
+        try:
+            preprocessed_data = parse_request_series(request_data)
+            params = get_model_params()
+            flag_predictions = get_profile()['flag_predictions']
+            deadline = get_fit_deadline()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Train TBATS model (or reuse a cached fit), falling back to a cheaper model after the deadline
+        predictor = TBATSPredictor(**params)
+        fallback = fit_or_fallback(predictor, preprocessed_data, params, request.args.get('series_id'), deadline)
+        
+        # Combine predictions with historical data
+        combined_data = build_combined_data(
+            request_data, predictor, int(preprocessed_data.index[-1]), flag_predictions=flag_predictions
+        )
+        
+        # Return the combined result
+        return fallback_response(json_response(combined_data), fallback)
+        
+    except DeadlineExceeded as e:
+        return jsonify({"error": str(e)}), 422
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/predictIntervals', methods=['POST'])
+def predict_intervals():
+    """
+    API endpoint to predict fertility rates with prediction intervals.
+    
+    Expects the same JSON body as /predictData. The confidence levels are
+    given by the 'levels' query parameter, e.g. ?levels=0.8,0.95,0.99.
+    Returns the combined historical data and predictions, where each
+    prediction carries lower and upper bounds for every level.
+    """
+    try:
+        request_data = load_request_json()
+        
+        try:
+            preprocessed_data = parse_request_series(request_data)
+            params = get_model_params()
+            confidence_levels = get_confidence_levels()
+            flag_predictions = get_profile()['flag_predictions']
+            deadline = get_fit_deadline()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        predictor = TBATSPredictor(**params)
+        fallback = fit_or_fallback(predictor, preprocessed_data, params, request.args.get('series_id'), deadline)
+        combined_data = build_combined_data(
+            request_data, predictor, int(preprocessed_data.index[-1]),
+            confidence_levels=confidence_levels, flag_predictions=flag_predictions
+        )
+        return fallback_response(json_response(combined_data), fallback)
+        
+    except DeadlineExceeded as e:
+        return jsonify({"error": str(e)}), 422
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/predictBatch', methods=['POST'])
+def predict_batch():
+    """
+    API endpoint to predict fertility rates for many series in one request.
+    
+    Expects a JSON object mapping series ids to arrays of objects with 'year'
+    and 'tfr' fields (or to columnar year/tfr objects). Series that are not cached are fitted in parallel in a
+    process pool. Returns the combined historical data and predictions for each
+    series that succeeded, and an error message for each series that failed.
+    """
+    try:
+        request_data = load_request_json()
+        
+        if not isinstance(request_data, dict):
+            return jsonify({"error": "Input must be an object mapping series ids to lists of year/tfr objects"}), 400
+        
+        try:
+            params = get_model_params()
+            flag_predictions = get_profile()['flag_predictions']
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        results = {}
+        errors = {}
+        predictors = {}
+        to_fit = {}
+        cache_keys = {}
+        last_years = {}
         
-        # Validate input format
-        if not isinstance(request_data, list):
-            return jsonify({"error": "Input must be a list of year/tfr objects"}), 400
+        # Preprocess every series and look up previously fitted models
+        for series_id, series_data in request_data.items():
+            try:
+                preprocessed_data = parse_request_series(series_data)
+            except Exception as e:
+                errors[series_id] = str(e)
+                continue
             
-        if not all(isinstance(item, dict) and 'year' in item and 'tfr' in item for item in request_data):
-            return jsonify({"error": "Each item must contain 'year' and 'tfr' fields"}), 400
+            last_years[series_id] = int(preprocessed_data.index[-1])
+            
+            cache_key = series_fingerprint(preprocessed_data, params)
+            fitted_model = model_cache.get(cache_key)
+            if fitted_model is None:
+                fitted_model = model_store.load(cache_key)
+                if fitted_model is not None:
+                    model_cache.put(cache_key, fitted_model)
+            
+            if fitted_model is None:
+                to_fit[series_id] = preprocessed_data
+                cache_keys[series_id] = cache_key
+            else:
+                predictor = TBATSPredictor(**params)
+                predictor.fitted_model = fitted_model
+                predictors[series_id] = predictor
         
-        # Process the input data
-        ts_data = convert_to_time_series(request_data)
-        preprocessed_data = preprocess_data(ts_data)
+        # Fit the remaining series in parallel
+        if to_fit:
+            fitted, fit_errors = TBATSPredictor.train_batch(
+                to_fit, model_params=params, executor=get_batch_executor()
+            )
+            errors.update(fit_errors)
+            for series_id, predictor in fitted.items():
+                model_cache.put(cache_keys[series_id], predictor.fitted_model)
+                model_store.save(cache_keys[series_id], predictor.fitted_model, params)
+            predictors.update(fitted)
         
-        # Train TBATS model and generate predictions
-        predictor = TBATSPredictor(**TBATS_PARAMS)
-        fitted_model = predictor.train(preprocessed_data)
-        predictions = predictor.predict(steps=DEFAULT_STEPS)
+        # Forecast every series with a single batched kernel call
+        batch_predictions = dict(zip(predictors, TBATSPredictor.predict_batch(predictors.values(), DEFAULT_STEPS)))
         
-        # Format predictions
-        last_year = max(item['year'] for item in request_data)
-        formatted_predictions = format_predictions(request_data, predictions, last_year + 1)
+        for series_id, predictor in predictors.items():
+            try:
+                results[series_id] = build_combined_data(
+                    request_data[series_id], predictor, last_years[series_id], flag_predictions=flag_predictions,
+                    predictions=batch_predictions[series_id]
+                )
+            except Exception as e:
+                errors[series_id] = str(e)
         
-        # Validate predictions to ensure they are within reasonable bounds
-        validated_predictions = validate_predictions(formatted_predictions)
+        return json_response({"results": results, "errors": errors})
         
-        # Combine historical data with predictions
-        combined_data = combine_data(request_data, validated_predictions)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def encode_scenario(columnar, years, values, columns, flag_predictions=False):
+    """
+    Encode the edited history and predictions of a scenario.
+
+    Args:
+        columnar (bool): Encode year/tfr arrays rather than a list of records.
+        years (np.ndarray): Years of the series.
+        values (np.ndarray): Edited values of the series.
+        columns (dict): Prediction 'year' and 'tfr' arrays.
+        flag_predictions (bool, optional): Add a 'predicted' flag to every row.
+
+    Returns:
+        JSONFragment: Encoded edited history and predictions.
+    """
+    if flag_predictions:
+        columns = dict(columns, predicted=np.ones(len(columns['year']), dtype=bool))
+    if columnar:
+        historical = {"year": years.tolist(), "tfr": values.tolist()}
+        if flag_predictions:
+            historical['predicted'] = [False] * len(years)
+        return encode_columns(columns, historical=historical)
+    history = [{"year": year, "tfr": value} for year, value in zip(years.tolist(), values.tolist())]
+    if flag_predictions:
+        history = [dict(item, predicted=False) for item in history]
+    return encode_records(history, columns)
+
+
+@app.route('/predictScenarios', methods=['POST'])
+def predict_scenarios():
+    """
+    API endpoint to forecast what-if scenarios of a series in one request.
+
+    Expects a JSON object with the base 'series' (in either /predictData
+    format) and a list of 'scenarios', each with an 'id' and a list of
+    'changes' to the base series, see scenarios.py. The base series is
+    preprocessed and fitted (or taken from the cache) once, and every scenario
+    is fitted starting from the base model; 'warm' fits run in the batch
+    process pool. The 'fit' query parameter chooses 'warm' or 'filter'. Warm
+    fits that have not finished within the fit deadline are replaced by
+    'filter' fits, marked with "fallback": "filter".
+    Returns the base forecast, the edited history and forecast of every
+    scenario that succeeded, and an error message for every scenario that failed.
+    """
+    try:
+        request_data = load_request_json()
+
+        if not isinstance(request_data, dict) or 'series' not in request_data:
+            return jsonify({"error": "Input must be an object with 'series' and 'scenarios'"}), 400
+
+        try:
+            series_data = request_data['series']
+            preprocessed_data = parse_request_series(series_data)
+            params = get_model_params()
+            flag_predictions = get_profile()['flag_predictions']
+            deadline = get_fit_deadline()
+            fit = request.args.get('fit', SCENARIO_DEFAULT_FIT)
+            if fit not in SCENARIO_FITS:
+                raise ValueError(f"fit must be one of {', '.join(SCENARIO_FITS)}")
+            years = preprocessed_data.index.to_numpy(np.int64)
+            values = preprocessed_data.to_numpy(np.float64)
+            edited, errors = parse_scenarios(
+                request_data.get('scenarios'), years, values, max_scenarios=SCENARIO_MAX_SCENARIOS
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Fit (or reuse) the base model once
+        predictor = TBATSPredictor(**params)
+        # Scenarios start from the full model, not from a compact one
+        fallback = fit_or_fallback(
+            predictor, preprocessed_data, params, request.args.get('series_id'), deadline, full_model=True
+        )
+        base_model = predictor.fitted_model
+        last_year = int(years[-1])
+        base = build_combined_data(series_data, predictor, last_year, flag_predictions=flag_predictions)
+
+        # Fit every scenario starting from the base model
+        fallback_scenarios = set()
+        if fit == 'warm' and len(edited) > 1:
+            executor = get_batch_executor()
+            futures = {
+                scenario_id: executor.submit(
+                    forecast_scenario, base_model, scenario_values, last_year, DEFAULT_STEPS, fit
+                )
+                for scenario_id, scenario_values in edited.items()
+            }
+            outcomes = {}
+            end = time.monotonic() + deadline if deadline is not None else None
+            for scenario_id, future in futures.items():
+                try:
+                    outcomes[scenario_id] = future.result(
+                        timeout=max(end - time.monotonic(), 0) if end is not None else None
+                    )
+                except FutureTimeoutError:
+                    # The pool cannot stop a running fit; keep the base model's parameters instead
+                    future.cancel()
+                    outcomes[scenario_id] = forecast_scenario(
+                        base_model, edited[scenario_id], last_year, DEFAULT_STEPS, 'filter'
+                    )
+                    fallback_scenarios.add(scenario_id)
+        else:
+            outcomes = {
+                scenario_id: forecast_scenario(base_model, scenario_values, last_year, DEFAULT_STEPS, fit)
+                for scenario_id, scenario_values in edited.items()
+            }
+
+        results = {}
+        for scenario_id, (columns, aic, error) in outcomes.items():
+            if error is not None:
+                errors[scenario_id] = error
+                continue
+            results[scenario_id] = {
+                "data": encode_scenario(
+                    isinstance(series_data, dict), years, edited[scenario_id], columns, flag_predictions
+                ),
+                "aic": aic,
+            }
+            if scenario_id in fallback_scenarios:
+                results[scenario_id]["fallback"] = 'filter'
+
+        return fallback_response(
+            json_response({"base": base, "fit": fit, "results": results, "errors": errors}), fallback
+        )
+
+    except DeadlineExceeded as e:
+        return jsonify({"error": str(e)}), 422
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def get_simulation_options():
+    """
+    Read the simulation options of the current request from its query parameters.
+
+    Options: 'paths' (number of sample paths), 'seed', 'quantiles' and
+    'thresholds' (comma separated lists, e.g. ?quantiles=0.1,0.5,0.9&thresholds=1.2).
+
+    Returns:
+        dict: Keyword arguments of simulation.simulate.
+
+    Raises:
+        ValueError: If an option is not valid.
+    """
+    try:
+        n_paths = int(request.args.get('paths', SIMULATION_PATHS))
+        seed = request.args.get('seed')
+        raw_quantiles = request.args.get('quantiles')
+        raw_thresholds = request.args.get('thresholds')
+        options = {
+            "n_paths": n_paths,
+            "seed": int(seed) if seed is not None else None,
+            "quantiles": (
+                [float(q) for q in raw_quantiles.split(',')] if raw_quantiles is not None
+                else list(SIMULATION_QUANTILES)
+            ),
+            "thresholds": [float(t) for t in raw_thresholds.split(',')] if raw_thresholds else [],
+        }
+    except ValueError:
+        raise ValueError("paths and seed must be integers, quantiles and thresholds comma separated numbers")
+    if not 0 < n_paths <= SIMULATION_MAX_PATHS:
+        raise ValueError(f"paths must be between 1 and {SIMULATION_MAX_PATHS}")
+    if not all(0 < q < 1 for q in options['quantiles']):
+        raise ValueError("quantiles must be numbers between 0 and 1")
+    return options
+
+
+@app.route('/simulate', methods=['POST'])
+def simulate_paths():
+    """
+    API endpoint to simulate future sample paths of the fitted model.
+    
+    Expects the same JSON body as /predictData. Query parameters: paths,
+    seed, quantiles and thresholds, see get_simulation_options. Returns the
+    forecast years and values, the values of every quantile per year, and for
+    every threshold the probabilities per year of the value being below or
+    above it in that year ('below', 'above') or in any year up to it
+    ('below_by', 'above_by').
+    """
+    try:
+        request_data = load_request_json()
         
-        # Return the combined result
-        return jsonify(combined_data)
+        try:
+            preprocessed_data = parse_request_series(request_data)
+            params = get_model_params()
+            options = get_simulation_options()
+            deadline = get_fit_deadline()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        predictor = TBATSPredictor(**params)
+        fallback = fit_or_fallback(predictor, preprocessed_data, params, request.args.get('series_id'), deadline)
+        fitted_model = predictor.fitted_model
+        columns = postprocess_predictions(predictor.predict(steps=DEFAULT_STEPS), int(preprocessed_data.index[-1]) + 1)
+        
+        summary = simulate(fitted_model, steps=DEFAULT_STEPS, **options)
+        return fallback_response(json_response({
+            "year": columns['year'],
+            "tfr": columns['tfr'],
+            "paths": options['n_paths'],
+            "seed": options['seed'],
+            "quantiles": {f'p{q * 100:g}': values for q, values in summary['quantiles'].items()},
+            "thresholds": {f'{threshold:g}': values for threshold, values in summary['thresholds'].items()},
+        }), fallback)
+        
+    except DeadlineExceeded as e:
+        return jsonify({"error": str(e)}), 422
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def get_backtest_options():
+    """
+    Read the backtest options of the current request from its query parameters.
+
+    Returns:
+        dict: Keyword arguments of run_backtest.
+
+    Raises:
+        ValueError: If an option is not a valid number.
+    """
+    try:
+        max_folds = request.args.get('max_folds')
+        return {
+            "horizon": int(request.args.get('horizon', BACKTEST_HORIZON)),
+            "min_train": int(request.args.get('min_train', BACKTEST_MIN_TRAIN)),
+            "step": int(request.args.get('step', BACKTEST_STEP)),
+            "max_folds": int(max_folds) if max_folds is not None else None,
+            "confidence_level": float(request.args.get('level', BACKTEST_CONFIDENCE_LEVEL)),
+            "reuse_fits": request.args.get('refit', 'false').lower() not in ('1', 'true', 'yes'),
+        }
+    except ValueError:
+        raise ValueError("horizon, min_train, step and max_folds must be integers and level a number")
+
+
+@app.route('/backtest', methods=['POST'])
+def backtest():
+    """
+    API endpoint to evaluate forecast accuracy with rolling forecast origins.
+    
+    Expects the same JSON body as /predictData. Query parameters: horizon,
+    min_train, step, max_folds, level (confidence level of the intervals),
+    refit (refit every fold instead of updating), mode (fit mode) and
+    deadline (seconds the whole backtest may take, the profile's fit
+    deadline by default). Returns the forecast of every fold and MAE, MAPE
+    and interval coverage per horizon and overall, or 422 after the deadline.
+    """
+    try:
+        request_data = load_request_json()
+        
+        try:
+            preprocessed_data = parse_request_series(request_data)
+            params = get_model_params()
+            options = get_backtest_options()
+            deadline = get_fit_deadline()
+            if not 0 < options["confidence_level"] < 1:
+                raise ValueError("level must be a number between 0 and 1")
+            rolling_origins(
+                len(preprocessed_data), options["horizon"], options["min_train"], options["step"], options["max_folds"]
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
+        report = run_backtest(
+            preprocessed_data, model_params=params, max_workers=BATCH_MAX_WORKERS,
+            executor=get_batch_executor(), deadline=deadline, **options
+        )
+        return json_response(report)
+        
+    except DeadlineExceeded as e:
+        return jsonify({"error": str(e)}), 422
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    API endpoint to submit a prediction job without waiting for the fit.
+    
+    Expects the same JSON body as /predictData. Returns 202 with the job id
+    right away; poll /jobs/<job_id> for the result. Submitting a series that
+    is already being predicted returns the existing job. Returns 429 when the
+    job queue is full.
+    """
+    try:
+        request_data = load_request_json()
+        
+        try:
+            preprocessed_data = parse_request_series(request_data)
+            params = get_model_params()
+            flag_predictions = get_profile()['flag_predictions']
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # The result echoes the rows as sent, so only identical payloads share a job
+        series_id = request.args.get('series_id')
+        payload_hash = hashlib.sha256(request.get_data()).hexdigest()
+        job_key = json.dumps(
+            [series_fingerprint(preprocessed_data, params), payload_hash, series_id, flag_predictions]
+        )
+        
+        try:
+            job, _ = job_manager.submit(
+                job_key, run_prediction, request_data, preprocessed_data, params, series_id,
+                flag_predictions=flag_predictions
+            )
+        except QueueFullError as e:
+            response = jsonify({"error": str(e)})
+            response.headers['Retry-After'] = '5'
+            return response, 429
+        
+        response = json_response(job.to_dict(), status=202)
+        response.headers['Location'] = f'/jobs/{job.id}'
+        return response
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    API endpoint returning the status of a prediction job.
+    
+    Returns the job status, and the combined data once the job is done or
+    the error message if it failed.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return json_response(job.to_dict())
+
+
+@app.route('/cacheStats', methods=['GET'])
+def cache_stats():
+    """
+    API endpoint returning fitted model cache statistics.
+    """
+    return jsonify(model_cache.stats())
+
+
+@app.route('/coalescingStats', methods=['GET'])
+def coalescing_stats():
+    """
+    API endpoint returning statistics of coalesced concurrent fits.
+    """
+    return jsonify(fit_flight.stats())
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    API endpoint returning metrics in the Prometheus text format.
+    
+    Includes per-stage and per-endpoint latency histograms, request sizes,
+    fitted model cache statistics, fits in flight, job queue depth and fits
+    stopped at their deadline.
+    """
+    cache = model_cache.stats()
+    flight = fit_flight.stats()
+    jobs = job_manager.stats()
+    deadline = deadline_stats()
+    gauges = {
+        'tbats_model_cache_entries': ('Fitted models in the cache', cache['entries']),
+        'tbats_model_cache_bytes': ('Estimated size of the cached models', cache['bytes']),
+        'tbats_model_cache_hit_rate': ('Share of cache lookups that found a model', cache['hit_rate']),
+        'tbats_fits_in_flight': ('Fits currently running', flight['in_flight']),
+        'tbats_jobs_pending': ('Asynchronous jobs queued or running', jobs['pending']),
+    }
+    counters = {
+        'tbats_model_cache_hits_total': ('Cache lookups that found a model', cache['hits']),
+        'tbats_model_cache_misses_total': ('Cache lookups that found no model', cache['misses']),
+        'tbats_model_cache_evictions_total': ('Models evicted from the cache', cache['evictions']),
+        'tbats_fits_executed_total': ('Fits started', flight['executed']),
+        'tbats_fits_coalesced_total': ('Requests that waited for a fit already in flight', flight['coalesced']),
+        'tbats_fit_fallbacks_total': ('Fallback forecasts returned after a fit exceeded its deadline',
+                                      sum(fallback_counts.values())),
+        'tbats_fit_deadline_kills_total': ('Fit worker processes killed at a deadline', deadline['killed']),
+        'tbats_fit_worker_recycles_total': ('Fit worker processes replaced after a compete fit left TBATS running',
+                                            deadline['recycled']),
+    }
+    return Response(registry.render(gauges, counters), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/slowRequests', methods=['GET'])
+def slow_requests():
+    """
+    API endpoint returning sampled stacks of recent slow requests.
+    
+    Profiling is enabled by setting PROFILE_SLOW_REQUEST_SECONDS in config.py.
+    """
+    if profiler is None:
+        return jsonify({"enabled": False, "profiles": []})
+    return jsonify({"enabled": True, "threshold": profiler.threshold, "profiles": profiler.profiles()})
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,284 @@
+"""
+Rolling-origin backtesting of the TBATS predictor.
+
+The series is cut at successive origins; for each origin (fold) a model is
+fitted on the observations before it and its forecast is compared with the
+observations that follow. Folds are split into contiguous chunks fitted in
+parallel worker processes. Within a chunk the training window only grows, so
+only the first fold is fitted from scratch and the following folds update
+that fit with the newly added observations.
+
+Run from the command line:
+
+    python -m predict_data.backtest --horizon 5 --min-train 30
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import os
+import time
+
+import numpy as np
+
+from .deadline import DeadlineExceeded
+from .data_loader import load_data, convert_to_time_series, preprocess_data
+from .tbats_predictor import TBATSPredictor, FIT_MODES
+from .utils import save_to_json
+from .config import (
+    DEFAULT_INPUT_PATH,
+    DEFAULT_FIT_MODE,
+    TBATS_PARAMS,
+    BACKTEST_HORIZON,
+    BACKTEST_MIN_TRAIN,
+    BACKTEST_STEP,
+    BACKTEST_CONFIDENCE_LEVEL,
+    BACKTEST_MAX_WORKERS
+)
+
+
+def rolling_origins(n_obs, horizon, min_train, step=1, max_folds=None):
+    """
+    Compute the forecast origins of a rolling-origin backtest.
+
+    An origin is the number of observations a fold is trained on. Every fold
+    has at least one observation to compare its forecast with.
+
+    Args:
+        n_obs (int): Length of the series.
+        horizon (int): Number of steps forecast by every fold.
+        min_train (int): Number of observations of the first fold.
+        step (int, optional): Observations added between consecutive folds. Defaults to 1.
+        max_folds (int, optional): Keep only the latest max_folds origins.
+
+    Returns:
+        list: Origins in increasing order.
+
+    Raises:
+        ValueError: If the parameters leave no fold to evaluate.
+    """
+    if horizon < 1 or step < 1 or min_train < 2:
+        raise ValueError("horizon and step must be positive and min_train at least 2")
+    origins = list(range(min_train, n_obs, step))
+    if max_folds is not None:
+        origins = origins[-max_folds:] if max_folds > 0 else []
+    if not origins:
+        raise ValueError(f"Series of {n_obs} observations is too short for min_train={min_train}")
+    return origins
+
+
+def run_backtest(ts_data, model_params=None, horizon=BACKTEST_HORIZON, min_train=BACKTEST_MIN_TRAIN,
+                 step=BACKTEST_STEP, confidence_level=BACKTEST_CONFIDENCE_LEVEL, max_folds=None,
+                 reuse_fits=True, max_workers=BACKTEST_MAX_WORKERS, executor=None, deadline=None):
+    """
+    Backtest the TBATS predictor on a series with rolling forecast origins.
+
+    Args:
+        ts_data (pd.Series): Preprocessed time series data with years as index.
+        model_params (dict, optional): Parameters passed to TBATSPredictor.
+        horizon (int, optional): Number of steps forecast by every fold.
+        min_train (int, optional): Number of observations of the first fold.
+        step (int, optional): Observations added between consecutive folds.
+        confidence_level (float, optional): Level of the prediction intervals
+            whose coverage is reported.
+        max_folds (int, optional): Evaluate only the latest max_folds origins.
+        reuse_fits (bool, optional): Update the previous fold's model with the
+            added observations instead of refitting every fold. Defaults to True.
+        max_workers (int, optional): Number of worker processes when no executor
+            is given. If None, the number of CPU cores is used.
+        executor (concurrent.futures.Executor, optional): Executor to run the
+            chunks of folds on. If None, a ProcessPoolExecutor is created.
+        deadline (float, optional): Seconds the whole backtest may take. Folds
+            that have not started by then are cancelled; running ones cannot be
+            stopped and finish in the background.
+
+    Returns:
+        dict: Per-fold forecasts and MAE, MAPE and interval coverage per horizon
+            and over all horizons.
+
+    Raises:
+        ValueError: If the parameters leave no fold to evaluate.
+        DeadlineExceeded: If the folds did not finish within the deadline.
+    """
+    model_params = model_params or {}
+    values = np.asarray(ts_data.values, dtype=float)
+    years = np.asarray(ts_data.index, dtype=np.int64)
+    origins = rolling_origins(len(values), horizon, min_train, step, max_folds)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    n_chunks = min(len(origins), max_workers or os.cpu_count() or 1)
+
+    end = time.monotonic() + deadline if deadline is not None else None
+    try:
+        futures = [
+            executor.submit(_backtest_chunk, model_params, values, chunk, horizon, confidence_level, reuse_fits)
+            for chunk in np.array_split(np.asarray(origins), n_chunks)
+        ]
+        folds = []
+        for future in futures:
+            try:
+                folds.extend(future.result(timeout=max(end - time.monotonic(), 0) if end is not None else None))
+            except FutureTimeoutError:
+                for pending in futures:
+                    pending.cancel()
+                raise DeadlineExceeded(f"Backtest did not finish within {deadline:g} seconds") from None
+    finally:
+        if own_executor:
+            # Do not wait for folds still running after the deadline
+            executor.shutdown(wait=end is None)
+
+    forecasts = np.array([fold[1] for fold in folds])
+    lower = np.array([fold[2] for fold in folds])
+    upper = np.array([fold[3] for fold in folds])
+    actuals = _actuals_matrix(values, origins, horizon)
+
+    return {
+        "horizon": horizon,
+        "confidence_level": confidence_level,
+        "folds": [
+            {
+                "last_train_year": int(years[origin - 1]),
+                "train_size": int(origin),
+                "fit_strategy": strategy,
+                "forecast": np.round(forecasts[i], 3).tolist(),
+                "actual": [None if np.isnan(a) else a for a in actuals[i].tolist()],
+            }
+            for i, (origin, (_, _, _, _, strategy)) in enumerate(zip(origins, folds))
+        ],
+        "horizons": [
+            dict(horizon=h + 1, **_accuracy(actuals[:, h], forecasts[:, h], lower[:, h], upper[:, h]))
+            for h in range(horizon)
+        ],
+        "overall": _accuracy(actuals.ravel(), forecasts.ravel(), lower.ravel(), upper.ravel()),
+    }
+
+
+def _backtest_chunk(model_params, values, origins, horizon, confidence_level, reuse_fits):
+    """
+    Fit and forecast a contiguous chunk of folds in a worker process.
+
+    Returns:
+        list: (origin, forecast, lower bounds, upper bounds, fit strategy) per fold.
+    """
+    predictor = TBATSPredictor(**model_params, n_jobs=1)
+    results = []
+    previous_origin = None
+    for origin in origins:
+        origin = int(origin)
+        if reuse_fits and previous_origin is not None:
+            predictor.update(values[previous_origin:origin])
+        else:
+            predictor.train(values[:origin])
+        previous_origin = origin
+
+        forecast, intervals = predictor.predict_with_intervals(steps=horizon, confidence_levels=(confidence_level,))
+        lower, upper = intervals[confidence_level]
+        results.append((origin, forecast, lower, upper, predictor.fit_strategy))
+    return results
+
+
+def _actuals_matrix(values, origins, horizon):
+    """
+    Arrange the observations following every origin as a (folds, horizon) matrix.
+
+    Steps past the end of the series are NaN.
+    """
+    padded = np.concatenate([values, np.full(horizon, np.nan)])
+    index = np.asarray(origins)[:, None] + np.arange(horizon)[None, :]
+    return padded[index]
+
+
+def _accuracy(actuals, forecasts, lower, upper):
+    """
+    Compute MAE, MAPE and interval coverage over the observed steps.
+    """
+    observed = ~np.isnan(actuals)
+    count = int(observed.sum())
+    if count == 0:
+        return {"count": 0, "mae": None, "mape": None, "coverage": None}
+
+    actuals, forecasts = actuals[observed], forecasts[observed]
+    errors = np.abs(actuals - forecasts)
+    nonzero = actuals != 0
+    mape = float(np.mean(errors[nonzero] / np.abs(actuals[nonzero])) * 100) if nonzero.any() else None
+    covered = (actuals >= lower[observed]) & (actuals <= upper[observed])
+    return {
+        "count": count,
+        "mae": round(float(np.mean(errors)), 4),
+        "mape": round(mape, 2) if mape is not None else None,
+        "coverage": round(float(np.mean(covered)), 4),
+    }
+
+
+def main(argv=None):
+    """
+    Run a backtest from the command line.
+
+    Returns:
+        dict: The backtest report, or None if the backtest failed.
+    """
+    parser = argparse.ArgumentParser(description='Backtest the TBATS predictor with rolling forecast origins')
+    parser.add_argument('--input', type=str, default=DEFAULT_INPUT_PATH,
+                        help='Path to input JSON file')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Path to save the backtest report as JSON')
+    parser.add_argument('--horizon', type=int, default=BACKTEST_HORIZON,
+                        help='Number of years forecast by every fold')
+    parser.add_argument('--min-train', type=int, default=BACKTEST_MIN_TRAIN,
+                        help='Number of years the first fold is trained on')
+    parser.add_argument('--step', type=int, default=BACKTEST_STEP,
+                        help='Years added between consecutive folds')
+    parser.add_argument('--max-folds', type=int, default=None,
+                        help='Evaluate only the latest folds')
+    parser.add_argument('--level', type=float, default=BACKTEST_CONFIDENCE_LEVEL,
+                        help='Confidence level of the prediction intervals')
+    parser.add_argument('--workers', type=int, default=BACKTEST_MAX_WORKERS,
+                        help='Number of worker processes (default: all CPU cores)')
+    parser.add_argument('--refit', action='store_true',
+                        help='Refit every fold from scratch instead of updating the previous fit')
+    parser.add_argument('--fit-mode', type=str, choices=FIT_MODES, default=DEFAULT_FIT_MODE,
+                        help="Model selection mode: 'full' search, 'fast' restricted search or 'compete' with baselines")
+    args = parser.parse_args(argv)
+
+    try:
+        print(f"Loading data from {args.input}...")
+        ts_data = preprocess_data(convert_to_time_series(load_data(args.input)))
+
+        print(f"Backtesting with horizon {args.horizon}, starting from {args.min_train} years...")
+        report = run_backtest(
+            ts_data,
+            model_params=dict(TBATS_PARAMS, fit_mode=args.fit_mode),
+            horizon=args.horizon,
+            min_train=args.min_train,
+            step=args.step,
+            confidence_level=args.level,
+            max_folds=args.max_folds,
+            reuse_fits=not args.refit,
+            max_workers=args.workers
+        )
+
+        print(f"Evaluated {len(report['folds'])} folds")
+        print(f"{'horizon':>8} {'count':>6} {'MAE':>8} {'MAPE %':>8} {'coverage':>9}")
+        for row in report['horizons'] + [dict(report['overall'], horizon='all')]:
+            print(
+                f"{row['horizon']:>8} {row['count']:>6} {_format(row['mae'], 4):>8} "
+                f"{_format(row['mape'], 2):>8} {_format(row['coverage'], 3):>9}"
+            )
+
+        if args.output:
+            print(f"Saving report to {args.output}...")
+            save_to_json(report, args.output)
+        return report
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return None
+
+
+def _format(value, digits):
+    return '-' if value is None else f'{value:.{digits}f}'
+
+
+if __name__ == '__main__':
+    main()
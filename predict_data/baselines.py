@@ -0,0 +1,219 @@
+"""
+Cheap baseline forecasting models for short annual series.
+
+The baselines fit in well under a millisecond, so they can be fitted next to
+TBATS on every request and used when TBATS is not better or too slow. They
+expose the parts of the fitted TBATS model interface the predictor relies on:
+forecast(steps), y, y_hat, resid and aic, plus simulate(errors) for sample
+path simulation.
+"""
+
+import numpy as np
+
+# Smoothing parameter grid of the damped trend model
+DAMPED_ALPHAS = np.linspace(0.05, 0.95, 19)
+DAMPED_BETA_RATIOS = np.array([0.01, 0.05, 0.1, 0.2, 0.3, 0.5])
+DAMPED_PHIS = np.array([0.8, 0.85, 0.9, 0.95, 0.98])
+
+
+class BaselineModel:
+    """
+    Fitted baseline model.
+
+    Subclasses set y_hat from the one-step-ahead in-sample forecasts and
+    implement forecast and forecast_std.
+    """
+
+    name = None
+    n_params = 0
+
+    def __init__(self, y, y_hat):
+        """
+        Initialize a fitted baseline model.
+
+        Args:
+            y (np.ndarray): Observations the model was fitted to.
+            y_hat (np.ndarray): One-step-ahead in-sample forecasts.
+        """
+        self.y = y
+        self.y_hat = y_hat
+        self.resid = y - y_hat
+        self.is_fitted = True
+        self.warnings = []
+
+    @property
+    def sigma(self):
+        """
+        Standard deviation of the one-step-ahead errors.
+        """
+        return float(np.sqrt(np.mean(self.resid ** 2)))
+
+    @property
+    def aic(self):
+        """
+        Akaike information criterion, defined as in the tbats library.
+
+        TBATS reports n * log(SSE) + 2k (plus a Box-Cox Jacobian term), so the
+        values of baselines and TBATS models fitted to the same series can be
+        compared directly.
+        """
+        sse = max(float(np.sum(self.resid ** 2)), np.finfo(float).tiny)
+        return len(self.y) * np.log(sse) + 2 * self.n_params
+
+    def forecast(self, steps=5):
+        """
+        Forecast the next steps.
+
+        Args:
+            steps (int, optional): Number of steps to forecast. Defaults to 5.
+
+        Returns:
+            np.ndarray: Forecast values.
+        """
+        raise NotImplementedError
+
+    def forecast_std(self, steps=5):
+        """
+        Standard deviation of the forecast errors of the next steps.
+
+        Args:
+            steps (int, optional): Number of steps to forecast. Defaults to 5.
+
+        Returns:
+            np.ndarray: Forecast error standard deviations.
+        """
+        raise NotImplementedError
+
+    def simulate(self, errors):
+        """
+        Simulate future sample paths driven by the given errors.
+
+        Args:
+            errors (np.ndarray): One-step-ahead errors of shape (paths, steps).
+
+        Returns:
+            np.ndarray: Simulated values of shape (paths, steps).
+        """
+        raise NotImplementedError
+
+
+class NaiveModel(BaselineModel):
+    """
+    Random walk: every forecast equals the last observation.
+    """
+
+    name = 'naive'
+    n_params = 1
+
+    def __init__(self, y):
+        y_hat = np.concatenate([y[:1], y[:-1]])
+        super().__init__(y, y_hat)
+
+    def forecast(self, steps=5):
+        return np.full(steps, self.y[-1])
+
+    def forecast_std(self, steps=5):
+        return self.sigma * np.sqrt(np.arange(1, steps + 1))
+
+    def simulate(self, errors):
+        return self.y[-1] + np.cumsum(errors, axis=1)
+
+
+class DriftModel(BaselineModel):
+    """
+    Random walk with drift: the average change of the series is extrapolated.
+    """
+
+    name = 'drift'
+    n_params = 2
+
+    def __init__(self, y):
+        self.slope = (y[-1] - y[0]) / (len(y) - 1)
+        y_hat = np.concatenate([y[:1], y[:-1] + self.slope])
+        super().__init__(y, y_hat)
+
+    def forecast(self, steps=5):
+        return self.y[-1] + self.slope * np.arange(1, steps + 1)
+
+    def forecast_std(self, steps=5):
+        h = np.arange(1, steps + 1)
+        return self.sigma * np.sqrt(h * (1 + h / (len(self.y) - 1)))
+
+    def simulate(self, errors):
+        steps = errors.shape[1]
+        return self.y[-1] + self.slope * np.arange(1, steps + 1) + np.cumsum(errors, axis=1)
+
+
+class DampedTrendModel(BaselineModel):
+    """
+    Additive damped trend exponential smoothing (damped Holt).
+
+    The smoothing parameters are chosen by evaluating the whole parameter
+    grid at once, vectorized over the grid.
+    """
+
+    name = 'damped_trend'
+    n_params = 5
+
+    def __init__(self, y):
+        alpha, beta, phi = _damped_grid()
+        level = np.full(alpha.shape, y[0])
+        trend = np.full(alpha.shape, y[1] - y[0])
+        y_hat = np.empty((len(y), len(alpha)))
+        for t in range(len(y)):
+            y_hat[t] = level + phi * trend
+            error = y[t] - y_hat[t]
+            level = y_hat[t] + alpha * error
+            trend = phi * trend + beta * error
+
+        best = int(np.argmin(np.sum((y[:, None] - y_hat) ** 2, axis=0)))
+        self.alpha, self.beta, self.phi = float(alpha[best]), float(beta[best]), float(phi[best])
+        self.level, self.trend = float(level[best]), float(trend[best])
+        super().__init__(y, y_hat[:, best])
+
+    def forecast(self, steps=5):
+        damping = np.cumsum(self.phi ** np.arange(1, steps + 1))
+        return self.level + damping * self.trend
+
+    def forecast_std(self, steps=5):
+        j = np.arange(1, steps)
+        c = self.alpha + self.beta * self.phi * (1 - self.phi ** j) / (1 - self.phi)
+        return self.sigma * np.sqrt(1 + np.concatenate([[0.0], np.cumsum(c ** 2)]))
+
+    def simulate(self, errors):
+        paths = np.empty(errors.shape)
+        level = np.full(len(errors), self.level)
+        trend = np.full(len(errors), self.trend)
+        for step in range(errors.shape[1]):
+            paths[:, step] = level + self.phi * trend + errors[:, step]
+            level = paths[:, step] - (1 - self.alpha) * errors[:, step]
+            trend = self.phi * trend + self.beta * errors[:, step]
+        return paths
+
+
+BASELINE_MODELS = (NaiveModel, DriftModel, DampedTrendModel)
+
+
+def fit_baselines(values):
+    """
+    Fit every baseline model to a series.
+
+    Args:
+        values (array-like): Observations in chronological order, at least 3.
+
+    Returns:
+        list: Fitted baseline models.
+
+    Raises:
+        ValueError: If the series is too short.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) < 3:
+        raise ValueError("Baseline models need at least 3 observations")
+    return [model_class(values) for model_class in BASELINE_MODELS]
+
+
+def _damped_grid():
+    alpha, beta_ratio, phi = np.meshgrid(DAMPED_ALPHAS, DAMPED_BETA_RATIOS, DAMPED_PHIS, indexing='ij')
+    alpha = alpha.ravel()
+    return alpha, alpha * beta_ratio.ravel(), phi.ravel()
@@ -0,0 +1,128 @@
+"""
+Compact representation of fitted TBATS models for caching many models in memory.
+
+A fitted tbats model keeps the training series, fitted values, residuals,
+its parameter objects and the fitting context. Forecasts and prediction
+intervals only need the state space matrices, the last state, the Box-Cox
+lambda and the innovation variance, which a CompactModel keeps in a single
+contiguous float64 buffer.
+"""
+
+import sys
+
+import numpy as np
+
+from .baselines import BaselineModel
+from .forecast_kernel import ForecastParams, extract_params, innovation_variance
+
+
+class CompactModel(ForecastParams):
+    """
+    Fitted TBATS model reduced to what forecasting and prediction intervals need.
+
+    F, g, w and x are read-only views of one contiguous float64 buffer. A
+    compact model can be used as the fitted model of a TBATSPredictor for
+    predictions, prediction intervals and simulations, but not be updated
+    with new observations or warm-start other fits.
+
+    Attributes:
+        variance (float): Variance of the innovations in the Box-Cox transformed space.
+        aic (float): Akaike information criterion of the fitted model.
+        n_obs (int): Number of observations the model was fitted to.
+    """
+
+    __slots__ = ('variance', 'aic', 'n_obs', '_buffer', '__weakref__')
+
+    def __init__(self, buffer, state_size, box_cox_lambda=None, variance=0.0, aic=np.nan, n_obs=0):
+        """
+        Create a compact model from its parameter buffer.
+
+        Args:
+            buffer (np.ndarray): F (row-major), g, w and x, concatenated.
+            state_size (int): Dimension k of the state.
+            box_cox_lambda (float, optional): Box-Cox lambda, or None without Box-Cox.
+            variance (float, optional): Innovation variance.
+            aic (float, optional): Akaike information criterion.
+            n_obs (int, optional): Number of observations the model was fitted to.
+
+        Raises:
+            ValueError: If the buffer does not have k * k + 3 * k elements.
+        """
+        k = int(state_size)
+        buffer = np.array(buffer, dtype=np.float64, order='C')
+        if buffer.shape != (k * k + 3 * k,):
+            raise ValueError(f"Buffer of a state of size {k} must have {k * k + 3 * k} elements")
+        buffer.flags.writeable = False
+        super().__init__(
+            F=buffer[:k * k].reshape(k, k),
+            g=buffer[k * k:k * k + k],
+            w=buffer[k * k + k:k * k + 2 * k],
+            x=buffer[k * k + 2 * k:],
+            box_cox_lambda=None if box_cox_lambda is None else float(box_cox_lambda),
+        )
+        self._buffer = buffer
+        self.variance = float(variance)
+        self.aic = float(aic)
+        self.n_obs = int(n_obs)
+
+    @classmethod
+    def from_model(cls, fitted_model):
+        """
+        Export a fitted tbats model.
+
+        Args:
+            fitted_model (tbats.tbats.TBATS_Model): Fitted model.
+
+        Returns:
+            CompactModel: Compact copy of the model.
+
+        Raises:
+            ValueError: If the model is not fitted.
+        """
+        params = extract_params(fitted_model)
+        return cls(
+            np.concatenate([params.F.ravel(), params.g, params.w, params.x]), len(params.x),
+            box_cox_lambda=params.box_cox_lambda,
+            variance=innovation_variance(fitted_model),
+            aic=fitted_model.aic,
+            n_obs=len(fitted_model.y),
+        )
+
+    @property
+    def is_fitted(self):
+        return True
+
+    @property
+    def nbytes(self):
+        """
+        Memory footprint of the model in bytes, including object and array headers.
+        """
+        arrays = (self._buffer, self.F, self.g, self.w, self.x)
+        return sys.getsizeof(self) + sum(sys.getsizeof(array) for array in arrays)
+
+    def __reduce__(self):
+        return (
+            CompactModel,
+            (self._buffer, len(self.x), self.box_cox_lambda, self.variance, self.aic, self.n_obs),
+        )
+
+    def __repr__(self):
+        return f'CompactModel(state_size={len(self.x)}, box_cox_lambda={self.box_cox_lambda}, nbytes={self.nbytes})'
+
+
+def compact_model(fitted_model):
+    """
+    Return the compact form of a fitted model.
+
+    Baseline models only hold their series and residuals, so they, and
+    models that are already compact, are returned as they are.
+
+    Args:
+        fitted_model (object): Fitted TBATS, baseline or compact model.
+
+    Returns:
+        object: Compact model, or the model itself.
+    """
+    if isinstance(fitted_model, (BaselineModel, CompactModel)):
+        return fitted_model
+    return CompactModel.from_model(fitted_model)
@@ -2,8 +2,21 @@
 Configuration parameters for the TBATS fertility rate prediction API.
 """
 
+import os
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Input and output files of the command line interface
+DEFAULT_INPUT_PATH = os.path.join(os.path.dirname(PACKAGE_DIR), 'download_tfr', 'fertility_poland_1939_2023.json')
+DEFAULT_OUTPUT_PATH = os.path.join(PACKAGE_DIR, 'fertility_poland_prediction.json')
+
+# Materialized forecast parameters
+MATERIALIZE_KEEP_VERSIONS = 10  # Versioned forecast artifacts kept next to the output file
+MATERIALIZE_CHECK_INTERVAL_SECONDS = 1.0  # Minimum time between checks for a changed forecast file
+
 # Prediction parameters
 DEFAULT_STEPS = 10  # Number of years to predict
+DEFAULT_CONFIDENCE_LEVELS = (0.8, 0.95)  # Levels of /predictIntervals when none are requested
 
 # TBATS model parameters
 # Using default parameters as specified in the implementation plan
@@ -11,4 +24,102 @@ TBATS_PARAMS = {
     'use_box_cox': None,  # Let the model decide
     'use_trend': None,    # Let the model decide
     'use_damped_trend': None  # Let the model decide
-}
\ No newline at end of file
+}
+
+# Named model profiles, chosen with the 'profile' query parameter.
+# 'auto' lets TBATS decide every component. 'fixed' uses the fixed components
+# of the app/ service and flags every returned row as predicted or not.
+# 'fit_deadline' is the time in seconds a fit may take before a fallback
+# forecast is returned (None fits without a deadline, in the request thread).
+MODEL_PROFILES = {
+    'auto': {
+        'params': TBATS_PARAMS,
+        'flag_predictions': False,
+        'fit_deadline': 60.0,
+    },
+    'fixed': {
+        'params': {'use_box_cox': True, 'use_trend': True, 'use_damped_trend': False},
+        'flag_predictions': True,
+        'fit_deadline': 60.0,
+    },
+}
+# Profile used when a request does not choose one; app/app.py defaults to 'fixed'
+DEFAULT_PROFILE = os.environ.get('TBATS_DEFAULT_PROFILE', 'auto')
+
+# Fit mode used when a request does not choose one ('full' or 'fast')
+DEFAULT_FIT_MODE = 'full'
+# In 'fast' mode, refit with the full search when the in-sample RMSE exceeds
+# the reference RMSE (previous full fit or random walk) by this factor
+FAST_MODE_TOLERANCE = 1.25
+
+# In 'compete' mode, TBATS competes with cheap baseline models. If the TBATS
+# fit takes longer than the budget, the best baseline is returned instead
+COMPETE_TIME_BUDGET_SECONDS = 2.0
+COMPETE_CRITERION = 'aic'  # 'aic' (in-sample) or 'holdout' (forecast error on the last years)
+COMPETE_HOLDOUT = 5  # Years held out by the 'holdout' criterion
+COMPETE_MAX_BACKGROUND_FITS = 4  # TBATS fits running concurrently for compete mode
+COMPETE_MAX_QUEUED_FITS = 4  # TBATS fits waiting for a thread; when full, compete skips TBATS
+
+# Fit deadlines: fits with a deadline run in worker processes that are killed
+# when it passes, and the request is answered with a flagged fallback forecast
+DEADLINE_MAX_WORKERS = 2  # Fits with a deadline running concurrently
+DEADLINE_MAX_SECONDS = 90.0  # Longest deadline a request can ask for; keep below SERVER_TIMEOUT_SECONDS
+
+# When updating a model with new observations, refit if a one-step-ahead error
+# exceeds this many in-sample residual standard deviations
+UPDATE_DRIFT_THRESHOLD = 3.0
+
+# Fitted model cache parameters
+MODEL_CACHE_MAX_ENTRIES = 128  # Maximum number of fitted models kept in memory
+MODEL_CACHE_TTL_SECONDS = 3600  # Time after which a cached model is refitted
+MODEL_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Memory cap for all cached models
+# Cache fitted TBATS models in their compact form (a few hundred bytes each).
+# Updates of cached fits and scenario warm starts then use the model store or refit
+MODEL_CACHE_COMPACT = os.environ.get('MODEL_CACHE_COMPACT', '0').lower() in ('1', 'true', 'yes')
+
+# Persistent model store parameters
+MODEL_STORE_DIR = os.environ.get('MODEL_STORE_DIR', os.path.join(PACKAGE_DIR, 'model_store'))
+MODEL_STORE_WARM_LIMIT = MODEL_CACHE_MAX_ENTRIES  # Models loaded into the cache at server start
+
+# Batch prediction parameters
+BATCH_MAX_WORKERS = None  # Worker processes for /predictBatch; None uses all CPU cores
+
+# What-if scenario parameters (/predictScenarios)
+SCENARIO_MAX_SCENARIOS = 100  # Scenarios accepted by a single request
+SCENARIO_DEFAULT_FIT = 'warm'  # 'warm' (reoptimize from the base model) or 'filter' (keep its parameters)
+
+# Sample path simulation parameters (/simulate)
+SIMULATION_PATHS = 10000  # Sample paths drawn when a request does not choose a number
+SIMULATION_MAX_PATHS = 200000  # Sample paths a single request can ask for
+SIMULATION_CHUNK_SIZE = 5000  # Paths simulated together, bounding the memory of intermediate arrays
+SIMULATION_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)  # Quantiles of /simulate when none are requested
+
+# Backtest parameters
+BACKTEST_HORIZON = 5  # Years forecast by every backtest fold
+BACKTEST_MIN_TRAIN = 30  # Years the first backtest fold is trained on
+BACKTEST_STEP = 1  # Years added between consecutive backtest folds
+BACKTEST_CONFIDENCE_LEVEL = 0.95  # Level of the intervals whose coverage is reported
+BACKTEST_MAX_WORKERS = None  # Worker processes fitting folds; None uses all CPU cores
+
+# Streaming multi-series parameters (NDJSON/CSV input of the command line interface)
+STREAM_SERIES_FIELD = 'series_id'  # Field identifying the series of a row
+STREAM_PARTITIONS = 64  # Spill files rows are partitioned into when the input is not sorted by series
+STREAM_MAX_WORKERS = 1  # Worker processes fitting series; None uses all CPU cores
+
+# Asynchronous job parameters
+JOB_MAX_WORKERS = 2  # Jobs fitted concurrently
+JOB_MAX_PENDING = 32  # Queued and running jobs before /jobs answers 429
+JOB_RESULT_TTL_SECONDS = 600  # Time a finished job can still be polled
+
+# Metrics and profiling parameters
+PROFILE_SLOW_REQUEST_SECONDS = None  # Keep sampled stacks of requests slower than this; None disables profiling
+PROFILE_SAMPLE_INTERVAL_SECONDS = 0.01  # Time between stack samples of a profiled request
+PROFILE_MAX_SLOW_REQUESTS = 20  # Slow request profiles kept for /slowRequests
+
+# Production server parameters (python -m predict_data.serve)
+SERVER_BIND = '0.0.0.0:5000'
+SERVER_WORKERS = None  # Worker processes; None uses all CPU cores
+SERVER_THREADS = 1  # Threads per worker; more than 1 uses threaded workers
+SERVER_TIMEOUT_SECONDS = 120  # Workers stuck on a request for longer are killed and replaced
+SERVER_GRACEFUL_TIMEOUT_SECONDS = 30  # Time workers get to finish requests on reload or shutdown
+SERVER_MAX_REQUESTS = 1000  # Requests after which a worker is replaced, 0 disables
@@ -6,6 +6,9 @@ import json
 import pandas as pd
 import numpy as np
 
+from .metrics import timed
+from .series_store import SeriesStore
+
 
 def load_data(file_path):
     """
@@ -22,6 +25,37 @@ def load_data(file_path):
     return data
 
 
+def load_series_store(path):
+    """
+    Open a binary series store without reading its data.
+    
+    The arrays of the store are memory-mapped, so a series is only read from
+    disk when it is accessed, and its arrays are not copied.
+    
+    Args:
+        path (str): Path to the series store directory.
+        
+    Returns:
+        SeriesStore: The opened store.
+    """
+    return SeriesStore(path)
+
+
+def store_to_time_series(store, series_id=None):
+    """
+    Convert a series of a series store to time series format.
+    
+    Args:
+        store (SeriesStore): Opened series store.
+        series_id (str, optional): Series id; may be omitted if the store holds a single series.
+        
+    Returns:
+        pd.Series: Pandas Series with years as index and tfr as values.
+    """
+    years, tfr = store.get(series_id)
+    return arrays_to_time_series(years, tfr)
+
+
 def convert_to_time_series(data):
     """
     Convert JSON data to time series format.
@@ -41,6 +75,80 @@ def convert_to_time_series(data):
     return ts_data
 
 
+@timed('parse')
+def parse_series_payload(payload):
+    """
+    Parse a request payload into year and tfr arrays.
+    
+    Two formats are accepted: a list of objects with 'year' and 'tfr' fields,
+    and a columnar object {"year": [...], "tfr": [...]}. The columnar format is
+    converted to NumPy arrays without creating a Python object per row.
+    
+    Args:
+        payload (list or dict): Parsed JSON payload.
+        
+    Returns:
+        tuple: Years (np.ndarray of int64) and tfr values (np.ndarray of float64).
+        
+    Raises:
+        ValueError: If the payload is not in one of the accepted formats, a year
+            is not a whole number or a tfr value is not a number or null.
+    """
+    if isinstance(payload, dict):
+        if not isinstance(payload.get('year'), list) or not isinstance(payload.get('tfr'), list):
+            raise ValueError("Columnar input must contain 'year' and 'tfr' arrays")
+        if len(payload['year']) != len(payload['tfr']):
+            raise ValueError("'year' and 'tfr' arrays must have the same length")
+        years, tfr = payload['year'], payload['tfr']
+    elif isinstance(payload, list):
+        if not all(isinstance(item, dict) and 'year' in item and 'tfr' in item for item in payload):
+            raise ValueError("Each item must contain 'year' and 'tfr' fields")
+        years = [item['year'] for item in payload]
+        tfr = [item['tfr'] for item in payload]
+    else:
+        raise ValueError("Input must be a list of year/tfr objects or an object with 'year' and 'tfr' arrays")
+    
+    try:
+        years = np.asarray(years)
+        tfr = np.asarray(tfr)
+    except ValueError:
+        raise ValueError("'year' and 'tfr' values must not be nested arrays")
+    if years.ndim != 1 or tfr.ndim != 1:
+        raise ValueError("'year' and 'tfr' values must not be nested arrays")
+    # Floats are accepted as years only when they are whole numbers, e.g. 1990.0
+    if years.dtype.kind not in 'iuf' or (years.dtype.kind == 'f' and not np.all(np.mod(years, 1) == 0)):
+        raise ValueError("'year' values must be integers")
+    # Missing tfr values (null) turn the array into objects; they become NaN and
+    # are interpolated during preprocessing
+    if tfr.dtype.kind == 'O' and all(value is None or _is_number(value) for value in tfr.tolist()):
+        tfr = tfr.astype(np.float64)
+    if tfr.dtype.kind not in 'iuf':
+        raise ValueError("'tfr' values must be numbers or null")
+    return years.astype(np.int64), tfr.astype(np.float64)
+
+
+def _is_number(value):
+    """
+    Check whether a parsed JSON value is a number, excluding booleans.
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def arrays_to_time_series(years, tfr):
+    """
+    Convert year and tfr arrays to time series format.
+    
+    Args:
+        years (np.ndarray): Array of years.
+        tfr (np.ndarray): Array of fertility rates.
+        
+    Returns:
+        pd.Series: Pandas Series with years as index and tfr as values.
+    """
+    return pd.Series(tfr, index=years)
+
+
+@timed('preprocess')
 def preprocess_data(ts_data):
     """
     Preprocess time series data for TBATS model.
@@ -0,0 +1,212 @@
+"""
+Killable worker processes for running calls with a hard deadline.
+
+A TBATS fit cannot be interrupted from another thread, so a fit that must
+not run longer than a deadline runs in a worker process instead. When the
+deadline passes, the worker is killed, its CPU time and memory are reclaimed
+right away, and a replacement is started in the background. Workers are
+reused between calls, so a call only pays for sending its arguments and
+result.
+
+Workers are new interpreters running deadline_worker.py rather than forks of
+the server process: forking a process with running threads can copy a lock
+held by one of them (e.g. an import lock), which would block the worker
+forever. They import the preloaded modules while they wait for their first
+call.
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when a call did not finish before its deadline.
+    """
+
+
+class _Worker:
+    """
+    Worker process running one call at a time.
+    """
+
+    def __init__(self, preload=()):
+        parent_sock, child_sock = socket.socketpair()
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+        with child_sock:
+            self.process = subprocess.Popen(
+                [sys.executable, '-m', 'predict_data.deadline_worker', str(child_sock.fileno()), *preload],
+                pass_fds=(child_sock.fileno(),), env=env, stdin=subprocess.DEVNULL,
+                # Own process group, so that kill also stops the processes a call started
+                start_new_session=True,
+            )
+        self.conn = Connection(parent_sock.detach())
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def call(self, timeout, fn, args):
+        """
+        Run fn(*args) in the worker.
+
+        Returns:
+            tuple: True and the result of the call, or False and the exception it raised.
+
+        Raises:
+            DeadlineExceeded: If the call did not finish within timeout seconds.
+            EOFError: If the worker died.
+        """
+        self.conn.send((fn, args))
+        if not self.conn.poll(max(timeout, 0)):
+            raise DeadlineExceeded(f"Call did not finish within {timeout:.1f} seconds")
+        return self.conn.recv()
+
+    def kill(self):
+        # Includes the processes of a pool the call started, e.g. TBATS comparing candidate models
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.process.wait()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.kill()
+            return
+        self.conn.close()
+
+
+class DeadlinePool:
+    """
+    Pool of worker processes running calls with a deadline.
+
+    At most max_workers calls run at the same time. Time spent waiting for a
+    free worker counts towards the deadline of a call.
+    """
+
+    def __init__(self, max_workers=1, preload=()):
+        """
+        Initialize the pool; workers are started on first use.
+
+        Args:
+            max_workers (int, optional): Maximum number of worker processes.
+            preload (iterable of str, optional): Modules every worker imports
+                when it starts, before its first call.
+        """
+        self.max_workers = max_workers
+        self.preload = tuple(preload)
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._idle = []
+        self._lock = threading.Lock()
+        self.started = 0
+        self.killed = 0
+        self.recycled = 0
+
+    def run(self, deadline, fn, *args, recycle=None):
+        """
+        Run fn(*args) in a worker process, killing the worker after the deadline.
+
+        Args:
+            deadline (float): Seconds the call may take, including the wait for a worker.
+            fn (callable): Picklable module-level function.
+            *args: Picklable arguments of fn.
+            recycle (callable, optional): Called with the result of the call;
+                if it returns True, the worker is replaced instead of reused,
+                e.g. because the call left work running in the background.
+
+        Returns:
+            object: Result of the call.
+
+        Raises:
+            DeadlineExceeded: If the call did not finish in time.
+            Exception: The exception raised by fn.
+        """
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=deadline):
+            raise DeadlineExceeded(f"No worker became free within {deadline:.1f} seconds")
+        try:
+            worker = self._take_worker()
+            try:
+                ok, value = worker.call(deadline - (time.monotonic() - start), fn, args)
+            except (DeadlineExceeded, EOFError, OSError) as e:
+                worker.kill()
+                with self._lock:
+                    self.killed += 1
+                # Start the replacement now, so it has imported its modules by the next call
+                self.start()
+                if isinstance(e, DeadlineExceeded):
+                    # Report the deadline of the call rather than the time left after waiting for a worker
+                    raise DeadlineExceeded(f"Call did not finish within {deadline:.1f} seconds") from None
+                raise
+            if ok and recycle is not None and recycle(value):
+                worker.kill()
+                with self._lock:
+                    self.recycled += 1
+                self.start()
+            else:
+                # The call finished, whether it returned or raised, so the worker can be reused
+                with self._lock:
+                    self._idle.append(worker)
+            if not ok:
+                raise value
+            return value
+        finally:
+            self._slots.release()
+
+    def start(self):
+        """
+        Start an idle worker ahead of the next call, unless one is idle already.
+        """
+        with self._lock:
+            if self._idle:
+                return
+            self.started += 1
+            self._idle.append(_Worker(self.preload))
+
+    def _take_worker(self):
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.is_alive():
+                    return worker
+                worker.kill()
+            self.started += 1
+        return _Worker(self.preload)
+
+    def stats(self):
+        """
+        Return pool statistics.
+
+        Returns:
+            dict: Idle workers, workers started, workers killed at a deadline
+                and workers replaced after a call asked to recycle them.
+        """
+        with self._lock:
+            return {
+                "idle": len(self._idle),
+                "started": self.started,
+                "killed": self.killed,
+                "recycled": self.recycled,
+            }
+
+    def shutdown(self):
+        """
+        Stop the idle workers.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
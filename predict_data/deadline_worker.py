@@ -0,0 +1,60 @@
+"""
+Entry point of the worker processes of deadline.DeadlinePool.
+
+Workers are started as `python -m predict_data.deadline_worker FD [MODULE...]`.
+They import the given modules, then run the calls received on the socket
+with file descriptor FD one at a time. Unlike multiprocessing workers, they
+do not re-import the __main__ module of the process that started them, so a
+worker started by the API server does not import Flask or load models.
+"""
+
+import importlib
+import sys
+from multiprocessing.connection import Connection
+
+
+class RemoteError(Exception):
+    """
+    Exception raised in a worker whose own type could not be sent back.
+    """
+
+
+def serve(conn):
+    """
+    Run the calls received on a connection until it is closed or None is received.
+
+    Every call is sent as (fn, args) and answered with (True, result) or
+    (False, exception).
+
+    Args:
+        conn (multiprocessing.connection.Connection): Connection to the pool.
+    """
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        fn, args = task
+        try:
+            result = (True, fn(*args))
+        except Exception as e:
+            result = (False, e)
+        try:
+            conn.send(result)
+        except Exception as e:
+            # The exception (or result) could not be pickled
+            conn.send((False, RemoteError(f"{type(e).__name__}: {e}")))
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    fd, preload = int(argv[0]), argv[1:]
+    for name in preload:
+        importlib.import_module(name)
+    serve(Connection(fd))
+
+
+if __name__ == '__main__':
+    main()
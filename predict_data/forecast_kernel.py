@@ -0,0 +1,253 @@
+"""
+Batched forecasts computed directly from the parameters of fitted TBATS models.
+
+A fitted TBATS model forecasts with its state space form: the forecast h
+steps ahead, in the Box-Cox transformed space, is w F^(h-1) x where x is the
+last fitted state. extract_params reads F, g, w, x and the Box-Cox lambda of
+a model once into plain arrays, and forecast_batch forecasts many series at
+once: series with the same state dimension are stacked, and every step
+advances all of their states with one batched matrix product, instead of
+going through the tbats model objects series by series.
+"""
+
+import threading
+import weakref
+
+import numpy as np
+
+from .baselines import BaselineModel
+
+# Forecast parameters of fitted models, extracted on first use
+_params_cache = weakref.WeakKeyDictionary()
+_params_cache_lock = threading.Lock()
+
+
+class ForecastParams:
+    """
+    Arrays needed to forecast a fitted TBATS model.
+
+    Attributes:
+        F (np.ndarray): Transition matrix, shape (k, k).
+        g (np.ndarray): Persistence vector, shape (k,).
+        w (np.ndarray): Measurement vector, shape (k,).
+        x (np.ndarray): Last fitted state, shape (k,).
+        box_cox_lambda (float): Box-Cox lambda, or None if the model does not use Box-Cox.
+    """
+
+    __slots__ = ('F', 'g', 'w', 'x', 'box_cox_lambda')
+
+    def __init__(self, F, g, w, x, box_cox_lambda=None):
+        self.F = F
+        self.g = g
+        self.w = w
+        self.x = x
+        self.box_cox_lambda = box_cox_lambda
+
+    def forecast(self, steps=5):
+        """
+        Forecast the next steps.
+
+        Args:
+            steps (int, optional): Number of steps to forecast. Defaults to 5.
+
+        Returns:
+            np.ndarray: Forecast values.
+        """
+        forecast_boxcox = np.empty(steps)
+        x = self.x
+        for step in range(steps):
+            forecast_boxcox[step] = self.w @ x
+            x = self.F @ x
+        if self.box_cox_lambda is None:
+            return forecast_boxcox
+        return inv_boxcox_batch(forecast_boxcox[None, :], np.array([self.box_cox_lambda]))[0]
+
+
+def extract_params(fitted_model):
+    """
+    Read the forecast parameters of a fitted TBATS model.
+
+    Args:
+        fitted_model (tbats.tbats.TBATS_Model): Fitted model.
+
+    Returns:
+        ForecastParams: Forecast parameters of the model.
+
+    Raises:
+        ValueError: If the model is not fitted.
+    """
+    if not fitted_model.is_fitted:
+        raise ValueError("Model must be fitted to be able to forecast")
+    matrix = fitted_model.matrix
+    params = fitted_model.params
+    return ForecastParams(
+        F=np.asarray(matrix.make_F_matrix(), dtype=float),
+        g=np.asarray(matrix.make_g_vector(), dtype=float),
+        w=np.asarray(matrix.make_w_vector(), dtype=float),
+        x=np.asarray(fitted_model.x_last, dtype=float),
+        box_cox_lambda=float(params.box_cox_lambda) if params.components.use_box_cox else None,
+    )
+
+
+def get_forecast_params(fitted_model):
+    """
+    Return the forecast parameters of a fitted TBATS model, extracting them once per model.
+
+    Args:
+        fitted_model (tbats.tbats.TBATS_Model or ForecastParams): Fitted model.
+
+    Returns:
+        ForecastParams: Forecast parameters of the model.
+    """
+    if isinstance(fitted_model, ForecastParams):
+        # Compact models are their own forecast parameters
+        return fitted_model
+    with _params_cache_lock:
+        params = _params_cache.get(fitted_model)
+    if params is None:
+        params = extract_params(fitted_model)
+        with _params_cache_lock:
+            _params_cache[fitted_model] = params
+    return params
+
+
+def forecast_batch(params, steps=5):
+    """
+    Forecast many series at once.
+
+    Args:
+        params (list): ForecastParams of every series.
+        steps (int or list, optional): Number of steps to forecast, for all
+            series or per series. Defaults to 5.
+
+    Returns:
+        list: Forecast values (np.ndarray) of every series.
+    """
+    steps = [int(steps)] * len(params) if np.isscalar(steps) else [int(s) for s in steps]
+    if not params:
+        return []
+    max_steps = max(steps)
+
+    # Stack series with the same state dimension and forecast them together
+    groups = {}
+    for i, series_params in enumerate(params):
+        groups.setdefault(len(series_params.x), []).append(i)
+
+    forecasts = [None] * len(params)
+    for indices in groups.values():
+        F = np.stack([params[i].F for i in indices])
+        w = np.stack([params[i].w for i in indices])
+        x = np.stack([params[i].x for i in indices])
+        lambdas = np.array([
+            np.nan if params[i].box_cox_lambda is None else params[i].box_cox_lambda for i in indices
+        ])
+
+        forecast_boxcox = np.empty((len(indices), max_steps))
+        for step in range(max_steps):
+            forecast_boxcox[:, step] = np.einsum('nk,nk->n', w, x)
+            x = np.einsum('nij,nj->ni', F, x)
+
+        values = inv_boxcox_batch(forecast_boxcox, lambdas)
+        for row, i in enumerate(indices):
+            forecasts[i] = values[row, :steps[i]]
+    return forecasts
+
+
+def inv_boxcox_batch(values, lambdas):
+    """
+    Revert the Box-Cox transformation of many series at once.
+
+    Follows tbats.transformation.inv_boxcox with force_valid=True: for a
+    negative lambda, values above -1/lambda are clipped to it.
+
+    Args:
+        values (np.ndarray): Transformed values, one row per series.
+        lambdas (np.ndarray): Box-Cox lambda of every row; NaN for rows
+            without a transformation.
+
+    Returns:
+        np.ndarray: Values in the original scale.
+    """
+    result = np.array(values, dtype=float)
+    rows = ~np.isnan(lambdas)
+    if not np.any(rows):
+        return result
+
+    y = result[rows]
+    lam = lambdas[rows][:, None]
+    log_rows = np.isclose(lam, 0.0)
+    lam = np.where(log_rows, 1.0, lam)
+    y = np.where(lam < 0, np.minimum(y, -1 / lam), y)
+    yy = y * lam + 1
+    with np.errstate(over='ignore', invalid='ignore'):
+        result[rows] = np.where(log_rows, np.exp(y), np.sign(yy) * np.abs(yy) ** (1 / lam))
+    return result
+
+
+def innovation_variance(fitted_model):
+    """
+    Return the innovation variance of a fitted TBATS model in the Box-Cox transformed space.
+
+    Args:
+        fitted_model (tbats.tbats.TBATS_Model or CompactModel): Fitted model.
+
+    Returns:
+        float: Mean squared residual in the transformed space.
+    """
+    if isinstance(fitted_model, ForecastParams):
+        # Compact models keep the variance of the model they were exported from
+        return fitted_model.variance
+    return np.sum(fitted_model.resid_boxcox ** 2) / len(fitted_model.y)
+
+
+def box_cox_lambda(fitted_model):
+    """
+    Return the Box-Cox lambda of a fitted model.
+
+    Args:
+        fitted_model (object): Fitted TBATS, compact or baseline model.
+
+    Returns:
+        float: Box-Cox lambda, or None if the model does not transform its values.
+    """
+    if isinstance(fitted_model, BaselineModel):
+        return None
+    return get_forecast_params(fitted_model).box_cox_lambda
+
+
+def boxcox(fitted_model, values):
+    """
+    Apply the Box-Cox transformation of a fitted model to values.
+
+    Args:
+        fitted_model (object): Fitted TBATS, compact or baseline model.
+        values (np.ndarray): Values in the original scale.
+
+    Returns:
+        np.ndarray: Transformed values; the values themselves without a transformation.
+    """
+    lam = box_cox_lambda(fitted_model)
+    if lam is None:
+        return values
+    from tbats.transformation import boxcox as tbats_boxcox
+
+    return tbats_boxcox(values, lam=lam)
+
+
+def inv_boxcox(fitted_model, values):
+    """
+    Revert the Box-Cox transformation of a fitted model.
+
+    Args:
+        fitted_model (object): Fitted TBATS, compact or baseline model.
+        values (np.ndarray): Transformed values.
+
+    Returns:
+        np.ndarray: Values in the original scale; the values themselves without a transformation.
+    """
+    lam = box_cox_lambda(fitted_model)
+    if lam is None:
+        return values
+    from tbats.transformation import inv_boxcox as tbats_inv_boxcox
+
+    return tbats_inv_boxcox(values, lam=lam, force_valid=True)
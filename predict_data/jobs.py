@@ -0,0 +1,177 @@
+"""
+Background job queue for long-running TBATS fits.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a job is submitted while the queue is at its depth limit.
+    """
+
+
+class Job:
+    """
+    A unit of work submitted to a JobManager.
+    """
+
+    def __init__(self, key):
+        """
+        Initialize a queued job.
+
+        Args:
+            key (str): Deduplication key of the job.
+        """
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def is_pending(self):
+        """
+        Tell whether the job is still queued or running.
+
+        Returns:
+            bool: True if the job has not finished yet.
+        """
+        return self.status in (QUEUED, RUNNING)
+
+    def to_dict(self):
+        """
+        Return the job status as a JSON-serializable dictionary.
+
+        Returns:
+            dict: Job id and status, plus the result or error once finished.
+        """
+        data = {"job_id": self.id, "status": self.status}
+        if self.status == DONE:
+            data["result"] = self.result
+        elif self.status == FAILED:
+            data["error"] = self.error
+        return data
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded thread pool with a queue depth limit.
+
+    Submitting a job whose key matches a job that is still queued or running
+    returns the existing job instead of starting a new one.
+    """
+
+    def __init__(self, max_workers=2, max_pending=32, result_ttl=600):
+        """
+        Initialize the job manager.
+
+        Args:
+            max_workers (int, optional): Number of jobs run concurrently. Defaults to 2.
+            max_pending (int, optional): Maximum number of queued and running jobs. Defaults to 32.
+            result_ttl (float, optional): Seconds a finished job is kept for polling. Defaults to 600.
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._jobs = {}
+        self._pending_by_key = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(self, key, func, *args, **kwargs):
+        """
+        Submit a job, or return the in-flight job with the same key.
+
+        Args:
+            key (str): Deduplication key, e.g. a series fingerprint.
+            func (callable): Function computing the job result.
+            *args: Positional arguments passed to func.
+            **kwargs: Keyword arguments passed to func.
+
+        Returns:
+            tuple: The job and a flag telling whether it was newly created.
+
+        Raises:
+            QueueFullError: If the number of pending jobs reached max_pending.
+        """
+        with self._lock:
+            self._prune()
+
+            existing = self._pending_by_key.get(key)
+            if existing is not None:
+                return existing, False
+
+            if len(self._pending_by_key) >= self.max_pending:
+                raise QueueFullError("Job queue is full, retry later")
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._pending_by_key[key] = job
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+            self._executor.submit(self._run, job, func, args, kwargs)
+
+        return job, True
+
+    def get(self, job_id):
+        """
+        Look up a job by id.
+
+        Args:
+            job_id (str): Job id returned by submit.
+
+        Returns:
+            Job: The job, or None if it is unknown or expired.
+        """
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        """
+        Return job queue statistics.
+
+        Returns:
+            dict: Number of pending jobs, tracked jobs and the queue limit.
+        """
+        with self._lock:
+            return {
+                "pending": len(self._pending_by_key),
+                "tracked": len(self._jobs),
+                "max_pending": self.max_pending,
+            }
+
+    def _run(self, job, func, args, kwargs):
+        job.status = RUNNING
+        try:
+            job.result = func(*args, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if self._pending_by_key.get(job.key) is job:
+                    del self._pending_by_key[job.key]
+
+    def _prune(self):
+        # Caller must hold the lock
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -6,20 +6,31 @@ import argparse
 import os
 import sys
 
-from .data_loader import load_data, convert_to_time_series, preprocess_data
-from .tbats_predictor import TBATSPredictor
+from .data_loader import (
+    load_data,
+    load_series_store,
+    convert_to_time_series,
+    store_to_time_series,
+    preprocess_data
+)
+from .tbats_predictor import TBATSPredictor, FIT_MODES
 from .utils import (
-    format_predictions,
+    postprocess_predictions,
+    records_from_columns,
     combine_data,
-    save_to_json,
-    validate_predictions,
     plot_data
 )
+from .materialize import write_artifact
+from .streaming import is_stream_path, run_stream
+from .series_store import is_series_store
 from .config import (
     DEFAULT_INPUT_PATH,
     DEFAULT_OUTPUT_PATH,
     DEFAULT_STEPS,
-    TBATS_PARAMS
+    DEFAULT_FIT_MODE,
+    TBATS_PARAMS,
+    STREAM_SERIES_FIELD,
+    STREAM_MAX_WORKERS
 )
 
 
@@ -33,46 +44,65 @@ def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Predict fertility rates using TBATS model')
     parser.add_argument('--input', type=str, default=DEFAULT_INPUT_PATH,
-                        help='Path to input JSON file')
+                        help='Path to input JSON file, NDJSON/CSV file of many series or series store')
     parser.add_argument('--output', type=str, default=DEFAULT_OUTPUT_PATH,
-                        help='Path to output JSON file')
+                        help='Path to output JSON file, or NDJSON/CSV file of many series')
     parser.add_argument('--steps', type=int, default=DEFAULT_STEPS,
                         help='Number of years to predict')
+    parser.add_argument('--fit-mode', type=str, choices=FIT_MODES, default=DEFAULT_FIT_MODE,
+                        help="Model selection mode: 'full' search, 'fast' restricted search or 'compete' with baselines")
+    parser.add_argument('--series-id', type=str, default=None,
+                        help='Series of a series store to predict (default: every series)')
+    parser.add_argument('--series-field', type=str, default=STREAM_SERIES_FIELD,
+                        help='Field identifying the series of a row in NDJSON/CSV input')
+    parser.add_argument('--sorted', action='store_true',
+                        help='The rows of every series in NDJSON/CSV input are contiguous')
+    parser.add_argument('--workers', type=int, default=STREAM_MAX_WORKERS,
+                        help='Number of worker processes fitting the series of NDJSON/CSV input')
     parser.add_argument('--plot', action='store_true',
                         help='Generate a plot of the data and predictions')
     parser.add_argument('--plot-output', type=str, default=None,
                         help='Path to save the plot (if --plot is specified)')
     args = parser.parse_args()
+
+    store = load_series_store(args.input) if is_series_store(args.input) else None
+    if is_stream_path(args.input) or (store is not None and args.series_id is None and len(store) != 1):
+        return stream_main(args)
     
     try:
         # Load and preprocess data
         print(f"Loading data from {args.input}...")
-        historical_data = load_data(args.input)
-        ts_data = convert_to_time_series(historical_data)
+        if store is not None:
+            ts_data = store_to_time_series(store, args.series_id)
+            historical_data = records_from_columns({"year": ts_data.index, "tfr": ts_data.to_numpy()})
+        else:
+            historical_data = load_data(args.input)
+            ts_data = convert_to_time_series(historical_data)
         preprocessed_data = preprocess_data(ts_data)
         
         # Train TBATS model
-        print("Training TBATS model...")
-        predictor = TBATSPredictor(**TBATS_PARAMS)
-        fitted_model = predictor.train(preprocessed_data)
+        print(f"Training TBATS model ({args.fit_mode} mode)...")
+        predictor = TBATSPredictor(**TBATS_PARAMS, fit_mode=args.fit_mode)
+        fitted_model = predictor.train(preprocessed_data, series_id=args.input)
+        if predictor.competition is not None:
+            print(f"Selected model: {predictor.competition['winner']} (TBATS {predictor.competition['tbats']})")
         
         # Generate predictions
         print(f"Generating predictions for {args.steps} years...")
         predictions = predictor.predict(steps=args.steps)
         
-        # Format and combine predictions with historical data
+        # Round predictions, keep them within reasonable bounds and attach years
         last_year = max(item['year'] for item in historical_data)
-        formatted_predictions = format_predictions(historical_data, predictions, last_year + 1)
-        
-        # Validate predictions to ensure they are within reasonable bounds
-        validated_predictions = validate_predictions(formatted_predictions)
+        validated_predictions = records_from_columns(postprocess_predictions(predictions, last_year + 1))
         
         # Combine historical data with predictions
         combined_data = combine_data(historical_data, validated_predictions)
         
         # Save to file
         print(f"Saving results to {args.output}...")
-        result = save_to_json(combined_data, args.output)
+        version = write_artifact(combined_data, args.output)
+        print(f"Forecast version {version}")
+        result = combined_data
         
         # Generate plot if requested
         if args.plot:
@@ -88,5 +118,45 @@ def main():
         return None
 
 
+def stream_main(args):
+    """
+    Forecast every series of an NDJSON/CSV file or series store, one series at a time.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        dict: Number of series forecast and error message per failed series,
+            or None if the run failed.
+    """
+    try:
+        if not is_stream_path(args.output):
+            raise ValueError(
+                "Output of many series must be an .ndjson, .jsonl or .csv file "
+                "(pass --series-id to predict one series of a series store)"
+            )
+
+        print(f"Streaming series from {args.input} to {args.output} ({args.fit_mode} mode)...")
+        summary = run_stream(
+            args.input,
+            args.output,
+            model_params=dict(TBATS_PARAMS, fit_mode=args.fit_mode),
+            steps=args.steps,
+            series_field=args.series_field,
+            assume_sorted=args.sorted,
+            workers=args.workers
+        )
+
+        print(f"Forecast {summary['series']} series")
+        for series_id, error in summary['errors'].items():
+            print(f"Skipped series {series_id}: {error}")
+        print("Prediction completed successfully!")
+        return summary
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return None
+
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""
+Materialized forecast artifacts and their in-memory serving.
+
+The command line interface writes every forecast as a versioned artifact and
+atomically replaces the current forecast file with it. Read endpoints keep
+the current file in memory as pre-serialized JSON and only reload it when
+the file changes, so repeated polls neither touch the file system on every
+request nor re-encode the data.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from .config import MATERIALIZE_CHECK_INTERVAL_SECONDS, MATERIALIZE_KEEP_VERSIONS
+
+ARTIFACT_DIR_NAME = 'forecasts'
+
+
+def content_version(body):
+    """
+    Return the version identifier of serialized content.
+
+    Args:
+        body (bytes): Serialized content.
+
+    Returns:
+        str: Hex digest prefix identifying the content.
+    """
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+def write_artifact(data, output_path, keep=MATERIALIZE_KEEP_VERSIONS):
+    """
+    Save a forecast as a versioned artifact and make it the current forecast file.
+
+    The artifact is written to a 'forecasts' directory next to the output file,
+    named after the output file and the content version. The output file is
+    then replaced atomically, so readers never see a partially written file.
+    Only the most recent `keep` artifacts are kept.
+
+    Args:
+        data (list or dict): Forecast data to save.
+        output_path (str): Path of the current forecast file.
+        keep (int, optional): Number of artifacts of this output file kept.
+
+    Returns:
+        str: Version of the written artifact.
+    """
+    body = json.dumps(data, indent=2).encode('utf-8')
+    version = content_version(body)
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    stem, extension = os.path.splitext(os.path.basename(output_path))
+    artifact_dir = os.path.join(output_dir, ARTIFACT_DIR_NAME)
+    _write_atomic(os.path.join(artifact_dir, f'{stem}.{version}{extension}'), body)
+    _write_atomic(output_path, body)
+
+    _prune_artifacts(artifact_dir, stem, extension, keep)
+    return version
+
+
+def _write_atomic(path, body):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _prune_artifacts(artifact_dir, stem, extension, keep):
+    paths = [
+        os.path.join(artifact_dir, name) for name in os.listdir(artifact_dir)
+        if name.startswith(stem + '.') and name.endswith(extension)
+    ]
+    paths.sort(key=os.path.getmtime, reverse=True)
+    for path in paths[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class MaterializedFile:
+    """
+    A JSON file kept in memory as compact, pre-serialized bytes.
+
+    The file is reloaded when its modification time, size or inode changes.
+    The file status is checked at most once per check interval, so a burst
+    of requests costs one stat call.
+    """
+
+    def __init__(self, path, check_interval=MATERIALIZE_CHECK_INTERVAL_SECONDS):
+        """
+        Initialize the materialized file. The file is read on first use.
+
+        Args:
+            path (str): Path to the JSON file.
+            check_interval (float, optional): Minimum seconds between file status checks.
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._body = None
+        self._etag = None
+        self._signature = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Return the serialized content and its entity tag, reloading it if the file changed.
+
+        Returns:
+            tuple: Compact JSON bytes and their entity tag.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the file is not valid JSON.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._body is not None and now - self._checked_at < self.check_interval:
+                return self._body, self._etag
+
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            if signature != self._signature:
+                with open(self.path, 'rb') as f:
+                    data = json.loads(f.read())
+                self._body = json.dumps(data, separators=(',', ':'), sort_keys=True).encode('utf-8')
+                self._etag = content_version(self._body)
+                self._signature = signature
+            self._checked_at = now
+            return self._body, self._etag
+
+    def response(self, request):
+        """
+        Build a response with the content, or 304 Not Modified if the client has it.
+
+        Args:
+            request (flask.Request): Current request, whose If-None-Match header is honored.
+
+        Returns:
+            flask.Response: JSON response with an ETag header.
+        """
+        from flask import Response
+
+        body, etag = self.get()
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
@@ -0,0 +1,324 @@
+"""
+Lightweight timing instrumentation and Prometheus-style metrics.
+
+Stages of the prediction pipeline are timed with the timed() decorator or
+context manager and recorded in histograms of the module-level registry.
+The registry renders itself in the Prometheus text exposition format.
+"""
+
+import bisect
+import collections
+import functools
+import sys
+import threading
+import time
+import traceback
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Upper bounds (bytes) of the request size histogram buckets
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Upper bounds of the request series length histogram buckets
+POINTS_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 5000)
+
+STAGE_METRIC = 'tbats_stage_duration_seconds'
+
+
+class Histogram:
+    """
+    Cumulative histogram of observed values with fixed bucket bounds.
+    """
+
+    def __init__(self, buckets):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            buckets (tuple): Increasing upper bounds of the buckets; an
+                implicit +Inf bucket is always added.
+        """
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """
+        Record a value.
+
+        Args:
+            value (float): Observed value.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self):
+        """
+        Return the cumulative bucket counts, the sum and the count.
+
+        Returns:
+            tuple: List of (upper bound, cumulative count) pairs including
+                +Inf, sum of the observed values and number of observations.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+
+        cumulative = []
+        running = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            running += count
+            cumulative.append((bound, running))
+        return cumulative, total, running
+
+
+class MetricsRegistry:
+    """
+    Named histograms with labels, rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._help = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, help_text, buckets=DURATION_BUCKETS):
+        """
+        Declare a histogram metric.
+
+        Args:
+            name (str): Metric name.
+            help_text (str): Description shown in the exposition.
+            buckets (tuple, optional): Bucket upper bounds of the metric.
+        """
+        with self._lock:
+            self._help[name] = help_text
+            self._buckets[name] = tuple(buckets)
+
+    def observe(self, name, value, **labels):
+        """
+        Record a value in the histogram of a metric and label set.
+
+        Args:
+            name (str): Metric name.
+            value (float): Observed value.
+            **labels: Label values, e.g. stage='fit'.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = Histogram(self._buckets.get(name, DURATION_BUCKETS))
+                    self._histograms[key] = histogram
+        histogram.observe(value)
+
+    def clear(self):
+        """
+        Drop all recorded observations.
+        """
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self, gauges=None, counters=None):
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Args:
+            gauges (dict, optional): Additional gauge values keyed by metric name,
+                given as (help text, value) pairs.
+            counters (dict, optional): Additional counter values, given like gauges.
+
+        Returns:
+            str: Metrics exposition.
+        """
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            help_texts = dict(self._help)
+
+        lines = []
+        current_name = None
+        for (name, labels), histogram in histograms:
+            if name != current_name:
+                current_name = name
+                lines.append(f'# HELP {name} {help_texts.get(name, name)}')
+                lines.append(f'# TYPE {name} histogram')
+            cumulative, total, count = histogram.snapshot()
+            for bound, bucket_count in cumulative:
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", le),))} {bucket_count}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {total:.6f}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+
+        for metric_type, values in (('gauge', gauges), ('counter', counters)):
+            for name, (help_text, value) in sorted((values or {}).items()):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                lines.append(f'{name} {float(value):g}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = (f'{key}="{_escape_label_value(value)}"' for key, value in labels)
+    return '{' + ','.join(pairs) + '}'
+
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+registry.register(STAGE_METRIC, 'Time spent in each stage of the prediction pipeline')
+
+
+class timed:
+    """
+    Time a pipeline stage, as a decorator or a context manager.
+
+    The duration is recorded in the stage duration histogram of the
+    module-level registry, labeled with the stage name:
+
+        @timed('fit')
+        def train(...): ...
+
+        with timed('encode'):
+            ...
+    """
+
+    def __init__(self, stage):
+        """
+        Args:
+            stage (str): Name of the stage.
+        """
+        self.stage = stage
+        self._starts = threading.local()
+
+    def __enter__(self):
+        starts = getattr(self._starts, 'stack', None)
+        if starts is None:
+            starts = self._starts.stack = []
+        starts.append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        registry.observe(STAGE_METRIC, time.perf_counter() - self._starts.stack.pop(), stage=self.stage)
+        return False
+
+    def __call__(self, func):
+        stage = self.stage
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registry.observe(STAGE_METRIC, time.perf_counter() - start, stage=stage)
+
+        return wrapper
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of a thread at a fixed interval while it handles a request.
+
+    Stacks are sampled from another thread with sys._current_frames(), so
+    the profiled code is not slowed down by tracing. Profiles of requests
+    slower than a threshold are kept in a bounded list of recent slow requests.
+    """
+
+    def __init__(self, threshold, interval=0.01, max_profiles=20, max_depth=40):
+        """
+        Initialize the profiler.
+
+        Args:
+            threshold (float): Requests slower than this many seconds are kept.
+            interval (float, optional): Seconds between stack samples. Defaults to 0.01.
+            max_profiles (int, optional): Number of slow request profiles kept. Defaults to 20.
+            max_depth (int, optional): Innermost frames kept per sample. Defaults to 40.
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.max_depth = max_depth
+        self._profiles = collections.deque(maxlen=max_profiles)
+        self._active = {}
+        self._lock = threading.Lock()
+        self._sampler = None
+
+    def start(self, label):
+        """
+        Start sampling the calling thread.
+
+        Args:
+            label (str): Description of the request, e.g. 'POST /predictData'.
+        """
+        with self._lock:
+            self._active[threading.get_ident()] = (label, time.perf_counter(), collections.Counter())
+            if self._sampler is None or not self._sampler.is_alive():
+                self._sampler = threading.Thread(target=self._sample_loop, name='sampling-profiler', daemon=True)
+                self._sampler.start()
+
+    def stop(self):
+        """
+        Stop sampling the calling thread, keeping its profile if it was slow.
+
+        Returns:
+            dict: The kept profile, or None if the request was not slow.
+        """
+        with self._lock:
+            entry = self._active.pop(threading.get_ident(), None)
+        if entry is None:
+            return None
+
+        label, start, samples = entry
+        duration = time.perf_counter() - start
+        if duration < self.threshold:
+            return None
+
+        profile = {
+            "request": label,
+            "duration": duration,
+            "samples": sum(samples.values()),
+            "stacks": [{"stack": stack, "count": count} for stack, count in samples.most_common()],
+        }
+        with self._lock:
+            self._profiles.append(profile)
+        return profile
+
+    def profiles(self):
+        """
+        Return the profiles of recent slow requests, oldest first.
+
+        Returns:
+            list: Profiles with the request, its duration and the sampled
+                stacks in collapsed 'outer;...;inner' form with their counts.
+        """
+        with self._lock:
+            return list(self._profiles)
+
+    def _sample_loop(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                if not self._active:
+                    self._sampler = None
+                    return
+                for thread_id, (_, _, samples) in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[self._collapse(frame)] += 1
+            del frames
+
+    def _collapse(self, frame):
+        stack = traceback.extract_stack(frame, limit=self.max_depth)
+        return ';'.join(f'{entry.name} ({entry.filename.rsplit("/", 1)[-1]}:{entry.lineno})' for entry in stack)
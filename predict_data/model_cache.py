@@ -0,0 +1,213 @@
+"""
+In-memory cache of fitted TBATS models keyed by a fingerprint of the input series.
+"""
+
+import hashlib
+import json
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .compact_model import compact_model
+
+
+def series_fingerprint(ts_data, params):
+    """
+    Compute a canonical hash of a time series and the model parameters.
+
+    The hash only depends on the sorted (year, tfr) pairs and the parameter
+    values, so two requests carrying the same data in a different order
+    produce the same fingerprint.
+
+    Args:
+        ts_data (pd.Series): Time series data with years as index and tfr as values.
+        params (dict): Model parameters used to fit the series.
+
+    Returns:
+        str: Hex digest identifying the series/parameter combination.
+    """
+    if not isinstance(ts_data, pd.Series):
+        ts_data = pd.Series(ts_data)
+    ts_data = ts_data.sort_index()
+
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(ts_data.index.values, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(ts_data.values, dtype=np.float64).tobytes())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def estimate_size(value):
+    """
+    Estimate the memory footprint of a cached value in bytes.
+
+    Values reporting their footprint in an 'nbytes' attribute, such as
+    compact models, are measured by it; other values by their pickled size.
+
+    Args:
+        value (object): Value stored in the cache.
+
+    Returns:
+        int: Approximate size of the value in bytes.
+    """
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+class ModelCache:
+    """
+    Thread-safe LRU cache for fitted models with TTL expiry and a memory cap.
+
+    Entries are evicted in least-recently-used order whenever the number of
+    entries or their estimated total size exceeds the configured limits.
+    """
+
+    def __init__(self, max_entries=128, ttl=3600, max_bytes=None, compact=False):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int, optional): Maximum number of cached models. Defaults to 128.
+            ttl (float, optional): Time to live of an entry in seconds.
+                If None, entries never expire. Defaults to 3600.
+            max_bytes (int, optional): Maximum estimated size of all cached models in bytes.
+                If None, only the number of entries is limited.
+            compact (bool, optional): Store fitted TBATS models in their compact form,
+                see compact_model.py. Compact models can only forecast, so updates
+                of cached models and fits starting from them need the full model.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.compact = compact
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Return the cached model for a key.
+
+        Args:
+            key (str): Series fingerprint.
+
+        Returns:
+            object: The cached model, or None if the key is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key):
+        """
+        Return the cached model for a key without counting a lookup or refreshing its recency.
+
+        Args:
+            key (str): Series fingerprint.
+
+        Returns:
+            object: The cached model, or None if the key is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, _, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                return None
+            return value
+
+    def put(self, key, value):
+        """
+        Store a model in the cache, evicting old entries if needed.
+
+        Args:
+            key (str): Series fingerprint.
+            value (object): Fitted model to cache.
+        """
+        if self.compact:
+            value = compact_model(value)
+        size = estimate_size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # The model alone exceeds the memory cap, so it cannot be cached
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self._total_bytes += size
+            self._evict()
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """
+        Return cache statistics.
+
+        Returns:
+            dict: Number of entries, estimated size, hits, misses, evictions and hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._total_bytes -= size
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._total_bytes > self.max_bytes)
+        ):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
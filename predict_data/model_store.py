@@ -0,0 +1,179 @@
+"""
+Persistent on-disk store of fitted TBATS models.
+
+Each model is pickled together with the parameters it was fitted with, the
+fingerprint of its input series and the tbats library version. Models are
+stored under a directory named after the store format version, so models
+written by an incompatible version of this module are never loaded.
+"""
+
+import functools
+import importlib.metadata
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+STORE_FORMAT_VERSION = 1
+MODEL_FILE_EXTENSION = '.pkl'
+
+
+class ModelStore:
+    """
+    Versioned directory of fitted models keyed by series fingerprint.
+    """
+
+    def __init__(self, directory):
+        """
+        Initialize the store.
+
+        The directory is created on the first save, so constructing a store
+        never touches the disk.
+
+        Args:
+            directory (str): Root directory of the store.
+        """
+        self.directory = os.path.join(directory, f'v{STORE_FORMAT_VERSION}')
+
+    def path_for(self, key):
+        """
+        Return the path of the file holding the model for a key.
+
+        Args:
+            key (str): Series fingerprint.
+
+        Returns:
+            str: Path to the model file.
+        """
+        return os.path.join(self.directory, key + MODEL_FILE_EXTENSION)
+
+    def save(self, key, fitted_model, params):
+        """
+        Serialize a fitted model to disk.
+
+        The file is written to a temporary location first and then moved into
+        place, so readers never see a partially written model.
+
+        Args:
+            key (str): Series fingerprint.
+            fitted_model (object): Fitted TBATS model.
+            params (dict): Parameters the model was fitted with.
+        """
+        record = {
+            'format_version': STORE_FORMAT_VERSION,
+            'tbats_version': _tbats_version(),
+            'fingerprint': key,
+            'params': params,
+            'created_at': time.time(),
+            'model': fitted_model,
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path_for(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, key):
+        """
+        Load a fitted model from disk.
+
+        Args:
+            key (str): Series fingerprint.
+
+        Returns:
+            object: The fitted model, or None if it is missing, unreadable
+                or was written by a different tbats version.
+        """
+        record = self._read(self.path_for(key))
+        if record is None or record.get('fingerprint') != key:
+            return None
+        return record['model']
+
+    def keys(self):
+        """
+        List the fingerprints of all stored models, most recently written first.
+
+        Returns:
+            list: Series fingerprints.
+        """
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith(MODEL_FILE_EXTENSION)]
+        except FileNotFoundError:
+            return []
+
+        paths = [os.path.join(self.directory, name) for name in names]
+        paths.sort(key=_mtime, reverse=True)
+        return [os.path.basename(path)[:-len(MODEL_FILE_EXTENSION)] for path in paths]
+
+    def warm(self, cache, limit=None):
+        """
+        Load the most recently written models into a model cache.
+
+        Args:
+            cache (ModelCache): Cache to fill.
+            limit (int, optional): Maximum number of models to load.
+                If None, all stored models are loaded.
+
+        Returns:
+            int: Number of models loaded.
+        """
+        loaded = 0
+        for key in self.keys()[:limit]:
+            if key in cache:
+                continue
+            fitted_model = self.load(key)
+            if fitted_model is not None:
+                cache.put(key, fitted_model)
+                loaded += 1
+        return loaded
+
+    def warm_in_background(self, cache, limit=None):
+        """
+        Warm a model cache from disk without blocking the caller.
+
+        Args:
+            cache (ModelCache): Cache to fill.
+            limit (int, optional): Maximum number of models to load.
+
+        Returns:
+            threading.Thread: The started daemon thread.
+        """
+        thread = threading.Thread(target=self.warm, args=(cache, limit), daemon=True)
+        thread.start()
+        return thread
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as f:
+                record = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+        if not isinstance(record, dict):
+            return None
+        if record.get('format_version') != STORE_FORMAT_VERSION:
+            return None
+        if record.get('tbats_version') != _tbats_version():
+            # Models pickled by another tbats version may not unpickle into a working model
+            return None
+        return record
+
+
+@functools.lru_cache(maxsize=None)
+def _tbats_version():
+    # Read from the package metadata, so that the store does not import tbats
+    return importlib.metadata.version('tbats')
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
@@ -2,9 +2,10 @@
 Script to run the TBATS prediction Flask server.
 """
 
-from .app import app
+from .app import app, start_warm_up
 
 if __name__ == '__main__':
+    start_warm_up()
     print("Starting TBATS Prediction API Server...")
     print("API endpoint available at: http://localhost:5000/predictData")
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""
+What-if scenarios: forecasts of edited versions of a base series.
+
+A scenario is a list of changes to the base series, each applied to a range
+of years:
+
+    {"id": "low", "changes": [{"from": 2015, "to": 2023, "scale": 0.9}]}
+
+sets, shifts or scales the values of the years 2015-2023. The base series is
+preprocessed and fitted once; every scenario is then fitted starting from the
+base model instead of running the full TBATS model search again:
+
+- 'warm' keeps the components of the base model (trend, damping, Box-Cox,
+  ARMA orders) and optimizes its parameters starting from those of the base
+  model;
+- 'filter' keeps the parameters of the base model and only runs the edited
+  series through its state equations, which takes milliseconds.
+"""
+
+import numpy as np
+
+from .baselines import BaselineModel
+from .utils import postprocess_predictions
+from .config import DEFAULT_STEPS
+
+SCENARIO_OPERATIONS = ('set', 'add', 'scale')
+SCENARIO_FITS = ('warm', 'filter')
+
+
+def apply_changes(years, values, changes):
+    """
+    Apply the changes of a scenario to a series.
+
+    Args:
+        years (np.ndarray): Years of the series.
+        values (np.ndarray): Values of the series.
+        changes (list): Changes, each with a 'from' year, an optional 'to' year
+            (defaults to 'from') and exactly one of 'set', 'add' or 'scale'.
+
+    Returns:
+        np.ndarray: Edited copy of the values.
+
+    Raises:
+        ValueError: If a change is malformed or its years are outside the series.
+    """
+    if not isinstance(changes, list) or not changes:
+        raise ValueError("'changes' must be a non-empty list")
+
+    values = np.array(values, dtype=float)
+    for change in changes:
+        if not isinstance(change, dict):
+            raise ValueError("Each change must be an object")
+        operations = [name for name in SCENARIO_OPERATIONS if name in change]
+        if len(operations) != 1:
+            raise ValueError(f"Each change must have exactly one of {', '.join(SCENARIO_OPERATIONS)}")
+        operation = operations[0]
+        try:
+            start = int(change['from'])
+            end = int(change.get('to', start))
+            amount = float(change[operation])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Each change needs an integer 'from' year and a numeric '{operation}' value")
+        if start > end or start < years[0] or end > years[-1]:
+            raise ValueError(f"Years {start}-{end} are not within the series ({years[0]}-{years[-1]})")
+
+        mask = (years >= start) & (years <= end)
+        if operation == 'set':
+            values[mask] = amount
+        elif operation == 'add':
+            values[mask] += amount
+        else:
+            values[mask] *= amount
+    return values
+
+
+def parse_scenarios(scenarios, years, values, max_scenarios=None):
+    """
+    Parse the scenarios of a request and apply them to the base series.
+
+    Args:
+        scenarios (list): Scenario objects with an 'id' and a list of 'changes'.
+        years (np.ndarray): Years of the preprocessed base series.
+        values (np.ndarray): Values of the preprocessed base series.
+        max_scenarios (int, optional): Maximum number of scenarios.
+
+    Returns:
+        tuple: Dictionary of scenario id to edited values, and dictionary of
+            scenario id to error message for scenarios whose changes are invalid.
+
+    Raises:
+        ValueError: If the scenarios are not a list of objects with unique ids.
+    """
+    if not isinstance(scenarios, list) or not scenarios:
+        raise ValueError("'scenarios' must be a non-empty list")
+    if max_scenarios is not None and len(scenarios) > max_scenarios:
+        raise ValueError(f"At most {max_scenarios} scenarios can be given")
+
+    edited = {}
+    errors = {}
+    for scenario in scenarios:
+        if not isinstance(scenario, dict) or 'id' not in scenario:
+            raise ValueError("Each scenario must be an object with an 'id'")
+        scenario_id = str(scenario['id'])
+        if scenario_id in edited or scenario_id in errors:
+            raise ValueError(f"Scenario id '{scenario_id}' is not unique")
+        try:
+            edited[scenario_id] = apply_changes(years, values, scenario.get('changes'))
+        except ValueError as e:
+            errors[scenario_id] = str(e)
+    return edited, errors
+
+
+def fit_scenario(base_model, values, fit='warm'):
+    """
+    Fit a model to an edited series, starting from the model of the base series.
+
+    Baseline models (the winners of the 'compete' mode) are refitted, which
+    takes well under a millisecond.
+
+    Args:
+        base_model (object): Fitted model of the base series.
+        values (np.ndarray): Edited values, of the same years as the base series.
+        fit (str, optional): 'warm' or 'filter', see the module docstring.
+
+    Returns:
+        object: Fitted model of the edited series.
+
+    Raises:
+        ValueError: If the base model uses Box-Cox and a value is not positive,
+            or the fit failed.
+    """
+    if isinstance(base_model, BaselineModel):
+        return type(base_model)(values)
+
+    params = base_model.params
+    if params.components.use_box_cox and np.any(values <= 0):
+        raise ValueError("The base model uses a Box-Cox transformation, so all values must be positive")
+
+    if fit == 'filter':
+        model = base_model.context.create_model(params).fit(values)
+    else:
+        model = base_model.context.create_case(params.components).fit_with_starting_params(values, params)
+    if not model.is_fitted:
+        raise ValueError("The model could not be fitted to the scenario")
+    return model
+
+
+def forecast_scenario(base_model, values, last_year, steps=DEFAULT_STEPS, fit='warm'):
+    """
+    Fit a scenario and forecast it.
+
+    Runs in batch worker processes, so it returns an error message instead of
+    raising.
+
+    Args:
+        base_model (object): Fitted model of the base series.
+        values (np.ndarray): Edited values.
+        last_year (int): Last year of the series.
+        steps (int, optional): Number of years to predict.
+        fit (str, optional): 'warm' or 'filter'.
+
+    Returns:
+        tuple: Prediction columns ('year' and 'tfr' arrays) and the AIC of the
+            scenario model, or None, None and an error message.
+    """
+    try:
+        model = fit_scenario(base_model, values, fit)
+        columns = postprocess_predictions(model.forecast(steps=steps), last_year + 1)
+        return columns, float(model.aic), None
+    except Exception as e:
+        return None, None, str(e)
@@ -0,0 +1,215 @@
+"""
+Binary columnar store of many time series, opened with memory mapping.
+
+A series store is a directory of NumPy .npy files:
+
+- year.npy and tfr.npy hold the years and values of all series, one series
+  after the other, each sorted by year;
+- offsets.npy holds where every series starts in them (and where the last ends);
+- series_ids.npy holds the series ids in the same order.
+
+The files are opened memory-mapped, so opening a store reads only the series
+ids, and the arrays of a series are views of the mapped files that are read
+on access. Convert JSON, NDJSON or CSV files with:
+
+    python -m predict_data.series_store fertility_poland_1939_2023.json fertility.series
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from .config import STREAM_SERIES_FIELD
+
+YEAR_FILE = 'year.npy'
+TFR_FILE = 'tfr.npy'
+OFFSETS_FILE = 'offsets.npy'
+IDS_FILE = 'series_ids.npy'
+
+
+def is_series_store(path):
+    """
+    Tell whether a path is a series store.
+
+    Args:
+        path (str): File or directory path.
+
+    Returns:
+        bool: True if the path is a series store directory.
+    """
+    return os.path.isfile(os.path.join(path, OFFSETS_FILE))
+
+
+class SeriesStore:
+    """
+    Memory-mapped series store opened for reading.
+
+    Iterating over the store yields (series id, years, tfr) tuples, the
+    format the streaming pipeline consumes.
+    """
+
+    def __init__(self, path):
+        """
+        Open a series store.
+
+        Args:
+            path (str): Path to the store directory.
+
+        Raises:
+            FileNotFoundError: If the path is not a series store.
+        """
+        if not is_series_store(path):
+            raise FileNotFoundError(f"No series store at {path}")
+        self.path = path
+        self.years = np.load(os.path.join(path, YEAR_FILE), mmap_mode='r')
+        self.tfr = np.load(os.path.join(path, TFR_FILE), mmap_mode='r')
+        self.offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode='r')
+        self.ids = np.load(os.path.join(path, IDS_FILE)).tolist()
+        self._positions = {series_id: i for i, series_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, series_id):
+        return series_id in self._positions
+
+    def __iter__(self):
+        for i, series_id in enumerate(self.ids):
+            yield (series_id,) + self._slice(i)
+
+    def get(self, series_id=None):
+        """
+        Return the years and values of a series without copying them.
+
+        Args:
+            series_id (str, optional): Series id; may be omitted if the store
+                holds a single series.
+
+        Returns:
+            tuple: Read-only years (int64) and tfr values (float64), sorted by year.
+
+        Raises:
+            KeyError: If the series is not in the store, or no series id is
+                given and the store holds several series.
+        """
+        if series_id is None:
+            if len(self.ids) != 1:
+                raise KeyError(f"Store holds {len(self.ids)} series, a series id is required")
+            return self._slice(0)
+        if series_id not in self._positions:
+            raise KeyError(f"Series '{series_id}' is not in the store")
+        return self._slice(self._positions[series_id])
+
+    def _slice(self, i):
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self.years[start:end], self.tfr[start:end]
+
+
+def write_series_store(series, path):
+    """
+    Write series to a new series store, replacing any store at the path.
+
+    The store is written to a temporary directory next to the path and moved
+    into place when complete.
+
+    Args:
+        series (iterable): (series id, years, tfr) tuples.
+        path (str): Path to the store directory.
+
+    Returns:
+        int: Number of series written.
+
+    Raises:
+        ValueError: If a series id occurs twice.
+    """
+    ids, years, tfr = [], [], []
+    for series_id, series_years, series_tfr in series:
+        series_years = np.asarray(series_years, dtype=np.int64)
+        order = np.argsort(series_years, kind='stable')
+        ids.append(str(series_id))
+        years.append(series_years[order])
+        tfr.append(np.asarray(series_tfr, dtype=np.float64)[order])
+    if len(set(ids)) != len(ids):
+        raise ValueError("Series ids must be unique")
+
+    offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum([len(y) for y in years], out=offsets[1:])
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=parent, prefix='.series_store_')
+    try:
+        np.save(os.path.join(tmp_path, YEAR_FILE), np.concatenate(years) if years else np.zeros(0, np.int64))
+        np.save(os.path.join(tmp_path, TFR_FILE), np.concatenate(tfr) if tfr else np.zeros(0, np.float64))
+        np.save(os.path.join(tmp_path, IDS_FILE), np.array(ids, dtype=str))
+        # Written last: a directory without offsets is not a store
+        np.save(os.path.join(tmp_path, OFFSETS_FILE), offsets)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    return len(ids)
+
+
+def read_series(input_path, series_field=STREAM_SERIES_FIELD, series_id=None):
+    """
+    Read the series of a JSON, NDJSON or CSV file.
+
+    A JSON file holds a single series, as a list of year/tfr objects or as
+    'year' and 'tfr' arrays. NDJSON and CSV files hold many series, whose rows
+    are grouped by series id as in the streaming pipeline.
+
+    Args:
+        input_path (str): Input file.
+        series_field (str, optional): Name of the series id field of NDJSON/CSV files.
+        series_id (str, optional): Id of the series of a JSON file. Defaults to
+            the file name without extension.
+
+    Returns:
+        iterable: (series id, years, tfr) tuples.
+    """
+    from .streaming import is_stream_path, iter_rows, group_partitioned
+    from .data_loader import load_data, parse_series_payload
+
+    if is_stream_path(input_path):
+        return group_partitioned(iter_rows(input_path, series_field))
+
+    years, tfr = parse_series_payload(load_data(input_path))
+    if series_id is None:
+        series_id = os.path.splitext(os.path.basename(input_path))[0]
+    return [(series_id, years, tfr)]
+
+
+def main(argv=None):
+    """
+    Convert JSON, NDJSON or CSV files into a series store from the command line.
+
+    Returns:
+        int: Number of series written, or None if the conversion failed.
+    """
+    parser = argparse.ArgumentParser(description='Convert JSON/NDJSON/CSV series into a binary series store')
+    parser.add_argument('inputs', nargs='+',
+                        help='Input files; JSON files hold one series, NDJSON/CSV files many')
+    parser.add_argument('output', help='Path to the series store directory')
+    parser.add_argument('--series-field', type=str, default=STREAM_SERIES_FIELD,
+                        help='Field identifying the series of a row in NDJSON/CSV input')
+    args = parser.parse_args(argv)
+
+    try:
+        series = (item for input_path in args.inputs for item in read_series(input_path, args.series_field))
+        count = write_series_store(series, args.output)
+        print(f"Wrote {count} series to {args.output}")
+        return count
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return None
+
+
+if __name__ == '__main__':
+    main()
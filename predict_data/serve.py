@@ -0,0 +1,116 @@
+"""
+Production server for the TBATS prediction API.
+
+Runs predict_data.app under gunicorn with several worker processes:
+
+    python -m predict_data.serve --workers 4 --timeout 120
+
+The application is loaded once in the master process, and the models of the
+persistent model store are loaded into the fitted model cache before the
+workers are forked, so all workers start with a warm cache whose memory is
+shared copy-on-write. Process and thread pools used by the application are
+created lazily, inside the workers, except for the worker processes running
+fits with a deadline, which every worker starts right after it is forked.
+
+Send SIGHUP to the master process to gracefully replace the workers, and
+SIGTERM to shut down after in-flight requests finish. Workers stuck on a
+request for longer than the timeout are killed and replaced.
+
+This module is also a gunicorn configuration file:
+
+    gunicorn -c python:predict_data.serve
+"""
+
+import argparse
+import os
+import sys
+
+from .config import (
+    SERVER_BIND,
+    SERVER_WORKERS,
+    SERVER_THREADS,
+    SERVER_TIMEOUT_SECONDS,
+    SERVER_GRACEFUL_TIMEOUT_SECONDS,
+    SERVER_MAX_REQUESTS
+)
+
+# gunicorn settings
+wsgi_app = 'predict_data.app:app'
+bind = SERVER_BIND
+workers = SERVER_WORKERS or os.cpu_count() or 1
+threads = SERVER_THREADS
+worker_class = 'gthread' if SERVER_THREADS > 1 else 'sync'
+timeout = SERVER_TIMEOUT_SECONDS
+graceful_timeout = SERVER_GRACEFUL_TIMEOUT_SECONDS
+max_requests = SERVER_MAX_REQUESTS
+max_requests_jitter = SERVER_MAX_REQUESTS // 10
+preload_app = True
+
+
+def when_ready(server):
+    """
+    Wait until the stored models are in the cache, before any worker is forked.
+    """
+    api = sys.modules.get('predict_data.app')
+    if api is not None:
+        api.start_warm_up().join()
+        server.log.info("Model cache warmed with %d stored models", len(api.model_cache))
+
+
+def post_fork(server, worker):
+    """
+    Start the fit deadline worker of a new worker process, which imports tbats in the background.
+    """
+    from .tbats_predictor import start_deadline_workers
+    start_deadline_workers()
+
+
+def main(argv=None):
+    """
+    Start the production server.
+
+    Returns:
+        bool: False if the server could not be started.
+    """
+    parser = argparse.ArgumentParser(description='Run the TBATS prediction API with gunicorn')
+    parser.add_argument('--bind', type=str, default=None,
+                        help=f'Address to listen on (default: {SERVER_BIND})')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: all CPU cores)')
+    parser.add_argument('--threads', type=int, default=None,
+                        help=f'Threads per worker (default: {SERVER_THREADS})')
+    parser.add_argument('--timeout', type=int, default=None,
+                        help=f'Seconds before a stuck worker is replaced (default: {SERVER_TIMEOUT_SECONDS})')
+    parser.add_argument('--graceful-timeout', type=int, default=None,
+                        help=f'Seconds workers get to finish on reload (default: {SERVER_GRACEFUL_TIMEOUT_SECONDS})')
+    parser.add_argument('--max-requests', type=int, default=None,
+                        help=f'Requests after which a worker is replaced (default: {SERVER_MAX_REQUESTS})')
+    args = parser.parse_args(argv)
+
+    try:
+        from gunicorn.app.wsgiapp import WSGIApplication
+    except ImportError:
+        print("Error: gunicorn is not installed, install it with 'pip install gunicorn'")
+        return False
+
+    gunicorn_args = ['-c', 'python:predict_data.serve']
+    for flag, value in (
+        ('--bind', args.bind),
+        ('--workers', args.workers),
+        ('--threads', args.threads),
+        ('--timeout', args.timeout),
+        ('--graceful-timeout', args.graceful_timeout),
+        ('--max-requests', args.max_requests),
+    ):
+        if value is not None:
+            gunicorn_args += [flag, str(value)]
+    if args.threads is not None:
+        gunicorn_args += ['--worker-class', 'gthread' if args.threads > 1 else 'sync']
+
+    sys.argv = ['gunicorn'] + gunicorn_args
+    WSGIApplication('%(prog)s [OPTIONS]').run()
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
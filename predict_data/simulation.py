@@ -0,0 +1,127 @@
+"""
+Monte Carlo simulation of future sample paths of a fitted model.
+
+Sample paths are drawn from the state space form of a fitted TBATS model
+(x_t = F x_{t-1} + g e_t, y_t = w x_{t-1} + e_t in the Box-Cox transformed
+space) with normally distributed innovations whose variance is the in-sample
+residual variance. The paths of a chunk are advanced together as matrix
+operations, so the only Python loop is over the forecast steps. Baseline
+models simulate their own recursions.
+
+The simulated paths give any quantile of the forecast distribution (e.g. for
+fan charts) and probabilities of events such as P(TFR < 1.2 by 2030).
+"""
+
+import numpy as np
+
+from .baselines import BaselineModel
+from .forecast_kernel import get_forecast_params, inv_boxcox, innovation_variance
+from .utils import bound_values
+from .config import DEFAULT_STEPS, SIMULATION_PATHS, SIMULATION_CHUNK_SIZE
+
+
+def iter_sample_paths(fitted_model, steps=DEFAULT_STEPS, n_paths=SIMULATION_PATHS, seed=None,
+                      chunk_size=SIMULATION_CHUNK_SIZE):
+    """
+    Draw sample paths of a fitted model, a chunk of paths at a time.
+
+    Only one chunk of states and innovations is held in memory at a time.
+    The same seed and chunk size draw the same paths.
+
+    Args:
+        fitted_model (object): Fitted TBATS or baseline model.
+        steps (int, optional): Number of steps to simulate.
+        n_paths (int, optional): Number of sample paths.
+        seed (int, optional): Seed of the random number generator; None draws
+            different paths every time.
+        chunk_size (int, optional): Paths simulated together.
+
+    Yields:
+        np.ndarray: Simulated values of shape (paths in the chunk, steps).
+    """
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_paths, chunk_size):
+        size = min(chunk_size, n_paths - start)
+        errors = rng.standard_normal((size, steps))
+        if isinstance(fitted_model, BaselineModel):
+            yield fitted_model.simulate(errors * fitted_model.sigma)
+        else:
+            yield _simulate_tbats(fitted_model, errors)
+
+
+def _simulate_tbats(fitted_model, errors):
+    """
+    Simulate paths of a TBATS model from standard normal innovations.
+    """
+    params = get_forecast_params(fitted_model)
+    F, g, w = params.F, params.g, params.w
+    sigma = np.sqrt(innovation_variance(fitted_model))
+    errors = errors * sigma
+
+    paths_boxcox = np.empty(errors.shape)
+    x = np.tile(params.x, (len(errors), 1))
+    for step in range(errors.shape[1]):
+        paths_boxcox[:, step] = x @ w + errors[:, step]
+        x = x @ F.T + np.outer(errors[:, step], g)
+    return inv_boxcox(fitted_model, paths_boxcox.ravel()).reshape(paths_boxcox.shape)
+
+
+def simulate(fitted_model, steps=DEFAULT_STEPS, n_paths=SIMULATION_PATHS, quantiles=(), thresholds=(),
+             seed=None, chunk_size=SIMULATION_CHUNK_SIZE):
+    """
+    Simulate sample paths and summarize them by quantiles and threshold probabilities.
+
+    Probabilities are counted chunk by chunk; quantiles need every simulated
+    value, which are kept as float32 (4 bytes per path and step).
+
+    Args:
+        fitted_model (object): Fitted TBATS or baseline model.
+        steps (int, optional): Number of steps to simulate.
+        n_paths (int, optional): Number of sample paths.
+        quantiles (iterable of float, optional): Quantiles between 0 and 1.
+        thresholds (iterable of float, optional): Values whose crossing
+            probabilities are computed.
+        seed (int, optional): Seed of the random number generator.
+        chunk_size (int, optional): Paths simulated together.
+
+    Returns:
+        dict: 'quantiles' maps every quantile to its values per step;
+            'thresholds' maps every threshold to the probabilities per step of
+            the value being 'below' or 'above' it in that step, and of having
+            been below ('below_by') or above ('above_by') it in any step up to
+            that one.
+
+    Raises:
+        ValueError: If a quantile is not between 0 and 1 or n_paths is not positive.
+    """
+    quantiles = list(quantiles)
+    thresholds = np.asarray(list(thresholds), dtype=float)
+    if n_paths < 1:
+        raise ValueError("The number of paths must be positive")
+    if not all(0 < q < 1 for q in quantiles):
+        raise ValueError("Quantiles must be between 0 and 1")
+
+    values = np.empty((n_paths, steps), dtype=np.float32) if quantiles else None
+    counts = {name: np.zeros((len(thresholds), steps)) for name in ('below', 'above', 'below_by', 'above_by')}
+    start = 0
+    for paths in iter_sample_paths(fitted_model, steps, n_paths, seed, chunk_size):
+        # Keep the values within the bounds of the forecasts, see utils.bound_values
+        paths = np.clip(paths, 0.0, 10.0)
+        if values is not None:
+            values[start:start + len(paths)] = paths
+        start += len(paths)
+
+        below = paths[None, :, :] < thresholds[:, None, None]
+        above = paths[None, :, :] > thresholds[:, None, None]
+        counts['below'] += below.sum(axis=1)
+        counts['above'] += above.sum(axis=1)
+        counts['below_by'] += np.logical_or.accumulate(below, axis=2).sum(axis=1)
+        counts['above_by'] += np.logical_or.accumulate(above, axis=2).sum(axis=1)
+
+    result = {"quantiles": {}, "thresholds": {}}
+    if quantiles:
+        for q, q_values in zip(quantiles, np.quantile(values, quantiles, axis=0)):
+            result["quantiles"][q] = bound_values(q_values)
+    for i, threshold in enumerate(thresholds.tolist()):
+        result["thresholds"][threshold] = {name: count[i] / n_paths for name, count in counts.items()}
+    return result
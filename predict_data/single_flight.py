@@ -0,0 +1,98 @@
+"""
+Coalescing of concurrent identical calls into a single execution.
+"""
+
+import threading
+
+from .deadline import DeadlineExceeded
+
+
+class _Call:
+    """
+    A call in flight and the callers waiting for its outcome.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs a function once per key among concurrent callers.
+
+    While a call for a key is in flight, further callers with the same key
+    wait for it and receive the same result (or exception) instead of
+    running the function again.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, func, *args, timeout=None, **kwargs):
+        """
+        Call func, or wait for the in-flight call with the same key.
+
+        Args:
+            key (str): Key identifying identical calls, e.g. a series fingerprint.
+            func (callable): Function to run.
+            *args: Positional arguments passed to func.
+            timeout (float, optional): Seconds to wait for an in-flight call.
+                The caller running func is not bound by it. If None, wait
+                until the call finishes.
+            **kwargs: Keyword arguments passed to func.
+
+        Returns:
+            object: The value returned by func.
+
+        Raises:
+            DeadlineExceeded: If the in-flight call did not finish within timeout seconds.
+            Exception: Any exception raised by func, re-raised in every waiting caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise DeadlineExceeded(f"Call in flight did not finish within {timeout:g} seconds")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def stats(self):
+        """
+        Return coalescing statistics.
+
+        Returns:
+            dict: Calls executed, calls coalesced into an in-flight call and calls in flight.
+        """
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
@@ -0,0 +1,331 @@
+"""
+Streaming ingestion, forecasting and output of large multi-series datasets.
+
+Rows of many series are read one at a time from NDJSON or CSV files, grouped
+by series id with bounded memory, forecast one series at a time as soon as
+the series is complete, and written incrementally. Files larger than the
+available memory can be processed this way:
+
+    python -m predict_data.main --input subnational.ndjson --output forecasts.ndjson
+
+Grouping works in one of two ways:
+
+- If the rows of every series are contiguous in the file (e.g. the file is
+  sorted by series id), a series is complete when the next series starts,
+  so only one series is held in memory.
+- Otherwise the rows are first spilled to temporary partition files by hash
+  of the series id, and the partitions are grouped one at a time, so only
+  one partition is held in memory.
+"""
+
+import csv
+from concurrent.futures import ProcessPoolExecutor
+import collections
+import json
+import os
+import tempfile
+import zlib
+
+import numpy as np
+
+from .data_loader import arrays_to_time_series, preprocess_data
+from .series_store import SeriesStore, is_series_store
+from .tbats_predictor import TBATSPredictor
+from .utils import postprocess_predictions, decode_json
+from .config import DEFAULT_STEPS, STREAM_SERIES_FIELD, STREAM_PARTITIONS, STREAM_MAX_WORKERS
+
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+CSV_EXTENSIONS = ('.csv',)
+STREAM_EXTENSIONS = NDJSON_EXTENSIONS + CSV_EXTENSIONS
+
+
+def is_stream_path(path):
+    """
+    Tell whether a file is in one of the streaming formats, judging by its extension.
+
+    Args:
+        path (str): File path.
+
+    Returns:
+        bool: True for NDJSON and CSV files.
+    """
+    return os.path.splitext(path)[1].lower() in STREAM_EXTENSIONS
+
+
+def iter_rows(path, series_field=STREAM_SERIES_FIELD):
+    """
+    Read (series id, year, tfr) rows from an NDJSON or CSV file one at a time.
+
+    NDJSON files hold one object per line with the series id, 'year' and 'tfr'
+    fields; CSV files have a header row with the same column names.
+
+    Args:
+        path (str): Path to a .ndjson, .jsonl or .csv file.
+        series_field (str, optional): Name of the series id field.
+
+    Yields:
+        tuple: Series id (str), year (int) and tfr (float).
+
+    Raises:
+        ValueError: If the format is not supported or a row is malformed.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in NDJSON_EXTENSIONS:
+        with open(path, 'rb') as f:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    yield _parse_row(decode_json(line), series_field, line_number)
+    elif extension in CSV_EXTENSIONS:
+        with open(path, 'r', newline='') as f:
+            for line_number, row in enumerate(csv.DictReader(f), 2):
+                yield _parse_row(row, series_field, line_number)
+    else:
+        raise ValueError(f"Unsupported streaming format '{extension}', use one of {', '.join(STREAM_EXTENSIONS)}")
+
+
+def _parse_row(row, series_field, line_number):
+    try:
+        return str(row[series_field]), int(row['year']), float(row['tfr'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Line {line_number}: expected '{series_field}', 'year' and 'tfr' fields")
+
+
+def group_contiguous(rows):
+    """
+    Group rows into series, assuming the rows of every series are contiguous.
+
+    Args:
+        rows (iterable): (series id, year, tfr) rows.
+
+    Yields:
+        tuple: Series id, array of years and array of tfr values.
+
+    Raises:
+        ValueError: If the rows of a series are not contiguous.
+    """
+    finished = set()
+    current_id = None
+    years = []
+    tfr = []
+    for series_id, year, value in rows:
+        if series_id != current_id:
+            if current_id is not None:
+                finished.add(current_id)
+                yield current_id, np.array(years, dtype=np.int64), np.array(tfr, dtype=np.float64)
+            if series_id in finished:
+                raise ValueError(f"Rows of series '{series_id}' are not contiguous; process the file without --sorted")
+            current_id, years, tfr = series_id, [], []
+        years.append(year)
+        tfr.append(value)
+    if current_id is not None:
+        yield current_id, np.array(years, dtype=np.int64), np.array(tfr, dtype=np.float64)
+
+
+def group_partitioned(rows, partitions=STREAM_PARTITIONS, tmp_dir=None):
+    """
+    Group rows into series in any order, with memory bounded by one partition.
+
+    Rows are spilled to temporary files partitioned by hash of the series id;
+    each partition is then read back and grouped in memory.
+
+    Args:
+        rows (iterable): (series id, year, tfr) rows.
+        partitions (int, optional): Number of partition files.
+        tmp_dir (str, optional): Directory for the partition files.
+
+    Yields:
+        tuple: Series id, array of years and array of tfr values.
+    """
+    with tempfile.TemporaryDirectory(prefix='tbats_stream_', dir=tmp_dir) as spill_dir:
+        paths = [os.path.join(spill_dir, f'part_{i}.csv') for i in range(partitions)]
+        files = [open(path, 'w', newline='') for path in paths]
+        try:
+            writers = [csv.writer(f) for f in files]
+            for series_id, year, value in rows:
+                writers[zlib.crc32(series_id.encode('utf-8')) % partitions].writerow((series_id, year, repr(value)))
+        finally:
+            for f in files:
+                f.close()
+
+        for path in paths:
+            groups = collections.defaultdict(lambda: ([], []))
+            with open(path, 'r', newline='') as f:
+                for series_id, year, value in csv.reader(f):
+                    years, tfr = groups[series_id]
+                    years.append(int(year))
+                    tfr.append(float(value))
+            os.remove(path)
+            for series_id, (years, tfr) in groups.items():
+                yield series_id, np.array(years, dtype=np.int64), np.array(tfr, dtype=np.float64)
+
+
+def forecast_stream(series, model_params=None, steps=DEFAULT_STEPS, workers=STREAM_MAX_WORKERS):
+    """
+    Forecast every series of a stream, yielding each result as soon as it is ready.
+
+    With several workers, series are fitted in worker processes with a bounded
+    number of series in flight, and results are yielded in input order.
+
+    Args:
+        series (iterable): (series id, years, tfr) tuples, e.g. from group_contiguous.
+        model_params (dict, optional): Parameters passed to TBATSPredictor.
+        steps (int, optional): Number of years to predict.
+        workers (int, optional): Number of worker processes; 1 fits in this process
+            and None uses all CPU cores.
+
+    Yields:
+        tuple: Series id, years, tfr values and prediction columns ('year' and
+            'tfr' arrays), or None and an error message if the series failed.
+    """
+    model_params = model_params or {}
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        for series_id, years, tfr in series:
+            yield _forecast_one(model_params, steps, series_id, years, tfr)
+        return
+
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for series_id, years, tfr in series:
+            pending.append(executor.submit(_forecast_one, model_params, steps, series_id, years, tfr))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _forecast_one(model_params, steps, series_id, years, tfr):
+    """
+    Fit and forecast a single series.
+
+    Returns:
+        tuple: Series id, years, tfr values, prediction columns and error message.
+    """
+    try:
+        ts_data = preprocess_data(arrays_to_time_series(years, tfr))
+        predictor = TBATSPredictor(**model_params, n_jobs=1)
+        predictor.train(ts_data, series_id=series_id)
+        columns = postprocess_predictions(predictor.predict(steps=steps), int(ts_data.index[-1]) + 1)
+        return series_id, ts_data.index.to_numpy(np.int64), ts_data.to_numpy(np.float64), columns, None
+    except Exception as e:
+        return series_id, years, tfr, None, str(e)
+
+
+class StreamWriter:
+    """
+    Incremental writer of forecasts to an NDJSON or CSV file.
+
+    Every row holds the series id, year, tfr and a 'predicted' flag. The file
+    is written under a temporary name and moved into place when the writer
+    is closed without an error.
+    """
+
+    def __init__(self, path, series_field=STREAM_SERIES_FIELD, include_history=True):
+        """
+        Open the writer.
+
+        Args:
+            path (str): Path to a .ndjson, .jsonl or .csv output file.
+            series_field (str, optional): Name of the series id field.
+            include_history (bool, optional): Write the historical rows before
+                the predictions of every series. Defaults to True.
+
+        Raises:
+            ValueError: If the format is not supported.
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in STREAM_EXTENSIONS:
+            raise ValueError(f"Unsupported streaming format '{extension}', use one of {', '.join(STREAM_EXTENSIONS)}")
+        self.path = path
+        self.series_field = series_field
+        self.include_history = include_history
+        self._csv = extension in CSV_EXTENSIONS
+        self._tmp_path = f'{path}.tmp'
+        self._file = open(self._tmp_path, 'w', newline='')
+        self._writer = None
+        if self._csv:
+            self._writer = csv.writer(self._file)
+            self._writer.writerow((series_field, 'year', 'tfr', 'predicted'))
+        self.series_written = 0
+
+    def write_series(self, series_id, years, tfr, columns):
+        """
+        Append the historical data and predictions of one series.
+
+        Args:
+            series_id (str): Series id.
+            years (np.ndarray): Historical years.
+            tfr (np.ndarray): Historical values.
+            columns (dict): Prediction 'year' and 'tfr' arrays.
+        """
+        rows = []
+        if self.include_history:
+            rows.append(zip(years.tolist(), tfr.tolist(), [False] * len(years)))
+        rows.append(zip(columns['year'].tolist(), columns['tfr'].tolist(), [True] * len(columns['year'])))
+
+        for part in rows:
+            if self._csv:
+                self._writer.writerows((series_id, year, value, int(predicted)) for year, value, predicted in part)
+            else:
+                self._file.writelines(
+                    json.dumps({self.series_field: series_id, 'year': year, 'tfr': value, 'predicted': predicted}) + '\n'
+                    for year, value, predicted in part
+                )
+        self.series_written += 1
+
+    def close(self, error=False):
+        """
+        Close the file, moving it into place unless an error occurred.
+
+        Args:
+            error (bool, optional): Discard the partially written file.
+        """
+        self._file.close()
+        if error:
+            os.remove(self._tmp_path)
+        else:
+            os.replace(self._tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close(error=exc_type is not None)
+        return False
+
+
+def run_stream(input_path, output_path, model_params=None, steps=DEFAULT_STEPS, series_field=STREAM_SERIES_FIELD,
+               assume_sorted=False, workers=STREAM_MAX_WORKERS, include_history=True):
+    """
+    Forecast every series of a large NDJSON/CSV file into an NDJSON/CSV file.
+
+    Args:
+        input_path (str): Input file with series id, 'year' and 'tfr' fields,
+            or a series store, whose series are already grouped.
+        output_path (str): Output file; its extension selects the format.
+        model_params (dict, optional): Parameters passed to TBATSPredictor.
+        steps (int, optional): Number of years to predict.
+        series_field (str, optional): Name of the series id field.
+        assume_sorted (bool, optional): The rows of every series are contiguous,
+            so no partition files are needed.
+        workers (int, optional): Number of worker processes.
+        include_history (bool, optional): Write the historical rows too.
+
+    Returns:
+        dict: Number of series forecast and error message per failed series.
+    """
+    if is_series_store(input_path):
+        series = SeriesStore(input_path)
+    else:
+        rows = iter_rows(input_path, series_field)
+        series = group_contiguous(rows) if assume_sorted else group_partitioned(rows)
+
+    errors = {}
+    with StreamWriter(output_path, series_field, include_history) as writer:
+        for series_id, years, tfr, columns, error in forecast_stream(series, model_params, steps, workers):
+            if error is not None:
+                errors[series_id] = error
+                continue
+            writer.write_series(series_id, years, tfr, columns)
+
+    return {"series": writer.series_written, "errors": errors}
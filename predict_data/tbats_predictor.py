@@ -2,10 +2,62 @@
 TBATS model implementation for fertility rate prediction.
 """
 
-from tbats import TBATS
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import copy
+import os
+import queue
+import threading
+import weakref
+
 import numpy as np
 import pandas as pd
 
+from .baselines import BaselineModel, fit_baselines
+from .compact_model import CompactModel, compact_model
+from .forecast_kernel import get_forecast_params, forecast_batch, boxcox, inv_boxcox, innovation_variance
+from .config import (
+    FAST_MODE_TOLERANCE,
+    UPDATE_DRIFT_THRESHOLD,
+    COMPETE_TIME_BUDGET_SECONDS,
+    COMPETE_CRITERION,
+    COMPETE_HOLDOUT,
+    COMPETE_MAX_BACKGROUND_FITS,
+    COMPETE_MAX_QUEUED_FITS,
+    DEADLINE_MAX_WORKERS
+)
+from .deadline import DeadlinePool
+from .metrics import timed
+
+FIT_MODES = ('full', 'fast', 'compete')
+
+# Components chosen by full model selection, keyed by series id
+_selected_components = {}
+_selected_components_lock = threading.Lock()
+
+# Forecasts and their standard deviations per fitted model and horizon
+_forecast_std_cache = weakref.WeakKeyDictionary()
+_forecast_std_cache_lock = threading.Lock()
+
+# Threads running the TBATS fits of the 'compete' mode, created on first use
+_compete_executor = None
+_compete_executor_lock = threading.Lock()
+
+# Killable worker processes running fits with a deadline, created on first use
+_deadline_pool = None
+_deadline_pool_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # Threads and worker pipes do not survive a fork, so a forked process creates its own
+    global _compete_executor, _compete_executor_lock, _deadline_pool, _deadline_pool_lock
+    _compete_executor = None
+    _compete_executor_lock = threading.Lock()
+    _deadline_pool = None
+    _deadline_pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
 
 class TBATSPredictor:
     """
@@ -15,7 +67,8 @@ class TBATSPredictor:
     Trend, and Seasonal components) is a forecasting method for time series data.
     """
     
-    def __init__(self, use_box_cox=None, use_trend=None, use_damped_trend=None):
+    def __init__(self, use_box_cox=None, use_trend=None, use_damped_trend=None, n_jobs=None,
+                 fit_mode='full'):
         """
         Initialize TBATS predictor with optional parameters.
         
@@ -26,7 +79,21 @@ class TBATSPredictor:
                 If None, the model will automatically determine whether to include it.
             use_damped_trend (bool, optional): Whether to use a damped trend.
                 If None, the model will automatically determine whether to use it.
+            n_jobs (int, optional): Number of processes TBATS uses to compare candidate models.
+                If None, all available CPU cores are used.
+            fit_mode (str, optional): 'full' compares every allowed component combination.
+                'fast' reuses the components previously selected for the same series id,
+                or pre-screens cheap candidates, and falls back to the full search when
+                the fit quality drops. 'compete' fits cheap baseline models next to
+                TBATS and keeps the best model, returning the best baseline when the
+                TBATS fit exceeds COMPETE_TIME_BUDGET_SECONDS. Defaults to 'full'.
+                
+        Raises:
+            ValueError: If fit_mode is not one of FIT_MODES.
         """
+        if fit_mode not in FIT_MODES:
+            raise ValueError(f"fit_mode must be one of {', '.join(FIT_MODES)}")
+        
         self.model = None
         self.fitted_model = None
         self.model_params = {
@@ -34,31 +101,366 @@ class TBATSPredictor:
             'use_trend': use_trend,
             'use_damped_trend': use_damped_trend,
         }
+        self.n_jobs = n_jobs
+        self.fit_mode = fit_mode
+        self.fit_strategy = None
+        self.competition = None
     
-    def train(self, ts_data):
+    @timed('fit')
+    def train(self, ts_data, series_id=None, deadline=None):
         """
         Train TBATS model on historical data.
         
         Args:
             ts_data (pd.Series): Time series data with years as index and values to predict.
+            series_id (str, optional): Identifier of the series. In 'fast' mode the
+                components selected by an earlier full fit of the same series are reused.
+            deadline (float, optional): Seconds the fit may take. If given, the model
+                is fitted in a worker process, which is killed when the deadline passes.
             
         Returns:
             tbats.tbats.TBATS_Model: Fitted TBATS model.
+            
+        Raises:
+            DeadlineExceeded: If the fit did not finish before the deadline.
         """
-        # Initialize TBATS model with parameters
-        self.model = TBATS(**self.model_params)
-        
         # Convert pandas Series to numpy array if needed
         if isinstance(ts_data, pd.Series):
             data = ts_data.values
         else:
             data = ts_data
+        data = np.asarray(data, dtype=float)
+        
+        if deadline is not None:
+            return self._train_in_worker(data, series_id, deadline)
+        
+        # Initialize TBATS model with parameters
+        from tbats import TBATS
+        
+        self.model = TBATS(**self.model_params, n_jobs=self.n_jobs)
+        
+        fitted_model = None
+        if self.fit_mode == 'compete':
+            fitted_model = self._train_compete(data, series_id)
+        elif self.fit_mode == 'fast' and not np.allclose(data, data[0]):
+            fitted_model = self._train_fast(data, series_id)
+        
+        if fitted_model is None:
+            # Fit the model to the data, comparing all allowed component combinations
+            fitted_model = self.model.fit(data)
+            self.fit_strategy = 'full'
+            if series_id is not None:
+                _remember_components(series_id, fitted_model)
+        
+        self.fitted_model = fitted_model
+        return self.fitted_model
+    
+    def _train_in_worker(self, data, series_id, deadline):
+        """
+        Train in a killable worker process, sharing the selected components of the series with it.
+        """
+        selected = _selected_components.get(series_id) if series_id is not None else None
+        fitted_model, self.fit_strategy, self.competition, selected = _get_deadline_pool().run(
+            deadline, _train_worker, self.model_params, self.n_jobs, self.fit_mode, data, series_id, selected,
+            recycle=_left_fit_running
+        )
+        if selected is not None:
+            with _selected_components_lock:
+                _selected_components[series_id] = selected
+        
+        self.fitted_model = fitted_model
+        return self.fitted_model
+    
+    def _train_fast(self, data, series_id):
+        """
+        Fit a single component combination instead of the full model search.
+        
+        Returns:
+            tbats.tbats.TBATS_Model: Fitted model, or None if its quality is not acceptable.
+        """
+        context = self.model.context
+        selected = _selected_components.get(series_id) if series_id is not None else None
+        
+        if selected is not None:
+            components, reference_rmse = selected
+            self.fit_strategy = 'fast-reuse'
+        else:
+            components = self._prescreen_components(data)
+            # Without a previous full fit, require the model to beat a random walk
+            reference_rmse = np.sqrt(np.mean(np.diff(data) ** 2))
+            self.fit_strategy = 'fast-prescreen'
+        
+        if np.any(data <= 0):
+            components = dict(components, use_box_cox=False)
+        
+        model = context.create_case_from_dictionary(
+            box_cox_bounds=self.model.box_cox_bounds, seasonal_periods=[], **components
+        ).fit(data)
+        
+        if not model.is_fitted or model.warnings:
+            return None
+        if _rmse(model) > reference_rmse * FAST_MODE_TOLERANCE:
+            return None
+        return model
+    
+    def _prescreen_components(self, data):
+        """
+        Choose trend components by comparing cheap fits without Box-Cox and ARMA errors.
+        """
+        context = self.model.context
+        use_box_cox = self.model_params['use_box_cox']
+        use_trend = self.model_params['use_trend']
+        use_damped_trend = self.model_params['use_damped_trend']
+        
+        candidates = []
+        for trend in ([False, True] if use_trend is None else [use_trend]):
+            for damped in ([False, True] if trend and use_damped_trend is None else [bool(trend and use_damped_trend)]):
+                candidates.append({'use_trend': trend, 'use_damped_trend': damped})
+        
+        best_components = candidates[0]
+        best_aic = np.inf
+        for candidate in candidates:
+            model = context.create_case_from_dictionary(
+                use_box_cox=False, use_arma_errors=False, box_cox_bounds=self.model.box_cox_bounds,
+                seasonal_periods=[], **candidate
+            ).fit_initial_model(data)
+            if model.aic < best_aic:
+                best_components, best_aic = candidate, model.aic
+        
+        return dict(best_components, use_box_cox=bool(use_box_cox), use_arma_errors=True)
+    
+    def _train_compete(self, data, series_id):
+        """
+        Fit TBATS and the baseline models and keep the best of them.
+        
+        Models are compared by AIC, or by their forecast error on the last
+        COMPETE_HOLDOUT observations when COMPETE_CRITERION is 'holdout'.
+        TBATS is fitted in a background thread; if it does not finish within
+        COMPETE_TIME_BUDGET_SECONDS, the best baseline wins. A TBATS fit that
+        has not started by then is cancelled, a running one is left to finish
+        in the background. When COMPETE_MAX_QUEUED_FITS fits are already
+        waiting for a thread, TBATS is skipped.
+        
+        Returns:
+            object: Winning fitted model, or None if the series is too short to compete.
+        """
+        holdout = COMPETE_HOLDOUT if COMPETE_CRITERION == 'holdout' else 0
+        if len(data) - holdout < 3:
+            return None
+        
+        try:
+            future = _get_compete_executor().submit(
+                _fit_tbats_candidate, self.model_params, self.n_jobs, data, holdout
+            )
+        except queue.Full:
+            future = None
+        
+        # Score the baselines while TBATS is being fitted
+        baselines = {model.name: model for model in fit_baselines(data)}
+        if holdout:
+            scores = {
+                model.name: _mae(model.forecast(holdout), data[-holdout:])
+                for model in fit_baselines(data[:-holdout])
+            }
+        else:
+            scores = {name: model.aic for name, model in baselines.items()}
+        
+        tbats_model = None
+        if future is None:
+            tbats_status = 'skipped'
+        else:
+            try:
+                tbats_model, tbats_score = future.result(timeout=COMPETE_TIME_BUDGET_SECONDS)
+                tbats_status = 'fitted'
+                if np.isfinite(tbats_score):
+                    scores['tbats'] = tbats_score
+            except FutureTimeoutError:
+                # Drop the fit if it is still waiting for a thread
+                future.cancel()
+                tbats_status = 'timeout'
+            except Exception:
+                tbats_status = 'failed'
+        
+        winner = min(scores, key=scores.get)
+        self.fit_strategy = 'compete'
+        self.competition = {
+            'winner': winner,
+            'criterion': 'holdout' if holdout else 'aic',
+            'scores': {name: float(score) for name, score in scores.items()},
+            'tbats': tbats_status,
+        }
+        
+        if winner == 'tbats':
+            if series_id is not None:
+                _remember_components(series_id, tbats_model)
+            return tbats_model
+        return baselines[winner]
+    
+    @classmethod
+    def train_batch(cls, series, model_params=None, max_workers=None, executor=None):
+        """
+        Train one TBATS model per series in parallel worker processes.
+        
+        Each worker fits its series with a single process, so the parallelism
+        comes from fitting different series at the same time.
+        
+        Args:
+            series (dict): Mapping of series id to time series data (pd.Series or array).
+            model_params (dict, optional): Parameters passed to every predictor.
+            max_workers (int, optional): Number of worker processes when no executor is given.
+                If None, the number of CPU cores is used.
+            executor (concurrent.futures.Executor, optional): Executor to submit fits to.
+                If None, a ProcessPoolExecutor is created for this batch.
+            
+        Returns:
+            tuple: Dictionary of series id to trained TBATSPredictor and
+                dictionary of series id to error message for series that failed.
+        """
+        model_params = model_params or {}
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        
+        try:
+            futures = {
+                series_id: executor.submit(_fit_series, model_params, ts_data, series_id)
+                for series_id, ts_data in series.items()
+            }
             
-        # Fit the model to the data
-        self.fitted_model = self.model.fit(data)
+            predictors = {}
+            errors = {}
+            for series_id, future in futures.items():
+                try:
+                    predictor = cls(**model_params)
+                    predictor.fitted_model = future.result()
+                    predictors[series_id] = predictor
+                except Exception as e:
+                    errors[series_id] = str(e)
+        finally:
+            if own_executor:
+                executor.shutdown()
+        
+        return predictors, errors
+    
+    @timed('update')
+    def update(self, new_points, series_id=None, deadline=None):
+        """
+        Extend the fitted model with observations appended after the training data.
+        
+        The model parameters are kept and only the new observations are run
+        through the state equations, starting from the last fitted state. If a
+        new observation lies more than UPDATE_DRIFT_THRESHOLD residual standard
+        deviations away from its one-step-ahead forecast, the model is considered
+        to have drifted and is refitted on the whole extended series.
+        
+        The previously fitted model object is not modified, so it can safely be
+        shared, e.g. through a model cache.
+        
+        Args:
+            new_points (pd.Series or array-like): Observations following the training data,
+                in chronological order.
+            series_id (str, optional): Identifier of the series, passed to train on refit.
+            deadline (float, optional): Seconds a refit may take, passed to train.
+            
+        Returns:
+            tbats.tbats.TBATS_Model: Updated (or refitted) TBATS model.
+            
+        Raises:
+            ValueError: If the model has not been trained yet or is a compact model.
+            DeadlineExceeded: If the model was refitted and the refit exceeded the deadline.
+        """
+        if self.fitted_model is None:
+            raise ValueError("Model must be trained before it can be updated")
+        if isinstance(self.fitted_model, CompactModel):
+            raise ValueError("Compact models do not keep their training data and cannot be updated")
         
+        if isinstance(new_points, pd.Series):
+            new_points = new_points.sort_index().values
+        new_points = np.asarray(new_points, dtype=float)
+        
+        model = self.fitted_model
+        history = model.y
+        if len(new_points) == 0:
+            return model
+        
+        if isinstance(model, BaselineModel):
+            # Baselines refit in well under a millisecond
+            return self.train(np.concatenate([history, new_points]), series_id=series_id, deadline=deadline)
+        
+        components = model.params.components
+        if components.use_box_cox and np.any(new_points <= 0):
+            # The Box-Cox transformation is not defined for these values
+            return self.train(np.concatenate([history, new_points]), series_id=series_id, deadline=deadline)
+        
+        # Run the state equations over the new observations only
+        w = model.matrix.make_w_vector()
+        g = model.matrix.make_g_vector()
+        F = model.matrix.make_F_matrix()
+        new_boxcox = boxcox(model, new_points)
+        new_boxcox_hat = np.empty(len(new_points))
+        x = model.x_last
+        for t in range(len(new_points)):
+            new_boxcox_hat[t] = w @ x
+            x = F @ x + g * (new_boxcox[t] - new_boxcox_hat[t])
+        new_resid_boxcox = new_boxcox - new_boxcox_hat
+        
+        # Compare the one-step-ahead errors with the in-sample residuals
+        sigma = np.sqrt(np.mean(model.resid_boxcox ** 2))
+        if not np.all(np.isfinite(new_resid_boxcox)) or (
+            sigma > 0 and np.max(np.abs(new_resid_boxcox)) > UPDATE_DRIFT_THRESHOLD * sigma
+        ):
+            return self.train(np.concatenate([history, new_points]), series_id=series_id, deadline=deadline)
+        
+        updated = copy.copy(model)
+        updated.warnings = list(model.warnings)
+        updated.y = np.concatenate([history, new_points])
+        updated.y_hat = np.concatenate([model.y_hat, inv_boxcox(model, new_boxcox_hat)])
+        updated.resid_boxcox = np.concatenate([model.resid_boxcox, new_resid_boxcox])
+        updated.resid = updated.y - updated.y_hat
+        updated.x_last = x
+        updated.aic = updated.calculate_aic()
+        
+        self.fitted_model = updated
+        self.fit_strategy = 'update'
         return self.fitted_model
     
+    def export_compact(self):
+        """
+        Export the fitted model in its compact form.
+        
+        The compact model keeps only what forecasts and prediction intervals
+        need, see compact_model.py. Baseline models are returned as they are.
+        
+        Returns:
+            object: CompactModel, or the fitted baseline model.
+            
+        Raises:
+            ValueError: If the model has not been trained yet.
+        """
+        if self.fitted_model is None:
+            raise ValueError("Model must be trained before it can be exported")
+        return compact_model(self.fitted_model)
+    
+    @classmethod
+    def from_compact(cls, fitted_model, **params):
+        """
+        Create a predictor from an exported compact model.
+        
+        The predictor can predict and compute prediction intervals; training
+        it again replaces the compact model.
+        
+        Args:
+            fitted_model (object): Model returned by export_compact.
+            **params: Parameters of the predictor, see __init__.
+            
+        Returns:
+            TBATSPredictor: Predictor using the compact model.
+        """
+        predictor = cls(**params)
+        predictor.fitted_model = fitted_model
+        return predictor
+    
+    @timed('forecast')
     def predict(self, steps=5):
         """
         Generate predictions for specified number of steps.
@@ -76,10 +478,33 @@ class TBATSPredictor:
             raise ValueError("Model must be trained before making predictions")
         
         # Generate forecast
-        forecast = self.fitted_model.forecast(steps=steps)
+        forecast = _forecast_models([self.fitted_model], steps)[0]
         
         return forecast
     
+    @classmethod
+    def predict_batch(cls, predictors, steps=5):
+        """
+        Generate predictions of many trained predictors at once.
+        
+        The forecasts of all TBATS models are computed together by the
+        batched forecast kernel, see forecast_kernel.py.
+        
+        Args:
+            predictors (iterable): Trained TBATSPredictor instances.
+            steps (int, optional): Number of time steps to predict. Defaults to 5.
+            
+        Returns:
+            list: Array of predicted values of every predictor.
+            
+        Raises:
+            ValueError: If a predictor has not been trained yet.
+        """
+        models = [predictor.fitted_model for predictor in predictors]
+        if any(model is None for model in models):
+            raise ValueError("Model must be trained before making predictions")
+        return _forecast_models(models, steps)
+    
     def get_confidence_intervals(self, steps=5, confidence_level=0.95):
         """
         Generate prediction intervals for the forecast.
@@ -98,9 +523,298 @@ class TBATSPredictor:
             raise ValueError("Model must be trained before generating confidence intervals")
         
         # Generate forecast with confidence intervals
-        _, confidence_intervals = self.fitted_model.forecast(steps=steps, confidence_level=confidence_level)
+        _, intervals = self.predict_with_intervals(steps=steps, confidence_levels=[confidence_level])
+        
+        lower_bounds, upper_bounds = intervals[confidence_level]
+        
+        return lower_bounds, upper_bounds
+    
+    @timed('forecast_intervals')
+    def predict_with_intervals(self, steps=5, confidence_levels=(0.95,)):
+        """
+        Generate predictions and prediction intervals at several confidence levels.
+        
+        The forecast and its per-step standard deviation are computed once
+        (and cached per fitted model) and reused for every confidence level.
+        Intervals are symmetric in the Box-Cox transformed space and assume
+        normally distributed residuals.
+        
+        Args:
+            steps (int, optional): Number of time steps to predict. Defaults to 5.
+            confidence_levels (iterable of float, optional): Confidence levels between 0 and 1.
+                Defaults to (0.95,).
+            
+        Returns:
+            tuple: Array of predicted values and dictionary mapping each confidence
+                level to a tuple of lower and upper bounds.
+            
+        Raises:
+            ValueError: If the model has not been trained yet or a level is not between 0 and 1.
+        """
+        if self.fitted_model is None:
+            raise ValueError("Model must be trained before generating confidence intervals")
+        if not all(0 < level < 1 for level in confidence_levels):
+            raise ValueError("Confidence levels must be between 0 and 1")
+        
+        forecast, forecast_boxcox, std_boxcox = self._forecast_with_std(steps)
+        
+        intervals = {}
+        for level in confidence_levels:
+            margin = std_boxcox * np.abs(_ndtri((1 - level) / 2))
+            intervals[level] = (
+                inv_boxcox(self.fitted_model, forecast_boxcox - margin),
+                inv_boxcox(self.fitted_model, forecast_boxcox + margin),
+            )
         
-        lower_bounds = confidence_intervals["lower_bound"]
-        upper_bounds = confidence_intervals["upper_bound"]
+        return forecast.copy(), intervals
+    
+    def _forecast_with_std(self, steps):
+        """
+        Return the forecast, its Box-Cox transform and the per-step standard deviation.
+        """
+        model = self.fitted_model
+        with _forecast_std_cache_lock:
+            cached = _forecast_std_cache.get(model, {}).get(steps)
+        if cached is not None:
+            return cached
+        
+        forecast = _forecast_models([model], steps)[0]
+        
+        if isinstance(model, BaselineModel):
+            result = (forecast, forecast, model.forecast_std(steps))
+            with _forecast_std_cache_lock:
+                _forecast_std_cache.setdefault(model, {})[steps] = result
+            return result
+        
+        # Variance of the h-step error is sigma^2 * (1 + sum of (w F^(j-1) g)^2 for j < h)
+        params = get_forecast_params(model)
+        F, g, w = params.F, params.g, params.w
+        c = np.ones(steps)
+        f_running = np.identity(F.shape[1])
+        for step in range(1, steps):
+            c[step] = w @ f_running @ g
+            f_running = f_running @ F
+        base_variance = innovation_variance(model)
+        std_boxcox = np.sqrt(base_variance * np.cumsum(c * c))
+        
+        result = (forecast, boxcox(model, forecast), std_boxcox)
+        with _forecast_std_cache_lock:
+            _forecast_std_cache.setdefault(model, {})[steps] = result
+        return result
+
+
+def _forecast_models(models, steps):
+    """
+    Forecast fitted models, computing the TBATS forecasts with one batched kernel call.
+    """
+    forecasts = [None] * len(models)
+    tbats_models = []
+    for i, model in enumerate(models):
+        if isinstance(model, BaselineModel):
+            forecasts[i] = model.forecast(steps=steps)
+        else:
+            tbats_models.append(i)
+    
+    if len(tbats_models) == 1:
+        forecasts[tbats_models[0]] = get_forecast_params(models[tbats_models[0]]).forecast(steps)
+    elif tbats_models:
+        kernel_forecasts = forecast_batch([get_forecast_params(models[i]) for i in tbats_models], steps)
+        for i, forecast in zip(tbats_models, kernel_forecasts):
+            forecasts[i] = forecast
+    return forecasts
+
+
+def _fit_series(model_params, ts_data, series_id=None):
+    """
+    Fit a single series in a worker process and return the fitted model.
+    """
+    predictor = TBATSPredictor(**model_params, n_jobs=1)
+    return predictor.train(ts_data, series_id=series_id)
+
+
+def _train_worker(model_params, n_jobs, fit_mode, data, series_id, selected):
+    """
+    Train a predictor in a deadline worker process.
+    
+    Returns:
+        tuple: Fitted model, fit strategy, competition and the components
+            selected for the series.
+    """
+    if selected is not None:
+        with _selected_components_lock:
+            _selected_components[series_id] = selected
+    predictor = TBATSPredictor(**model_params, n_jobs=n_jobs, fit_mode=fit_mode)
+    predictor.train(data, series_id=series_id)
+    selected = _selected_components.get(series_id) if series_id is not None else None
+    return predictor.fitted_model, predictor.fit_strategy, predictor.competition, selected
+
+
+def _left_fit_running(result):
+    """
+    Check whether a fit in a deadline worker left a TBATS fit of the 'compete' mode running.
+    
+    A timed out TBATS candidate keeps its thread busy in the worker, so the
+    worker is replaced rather than given the next fit.
+    """
+    competition = result[2]
+    return competition is not None and competition['tbats'] == 'timeout'
+
+
+def _fit_tbats_candidate(model_params, n_jobs, data, holdout):
+    """
+    Fit the TBATS candidate of the 'compete' mode and score it.
+    
+    With a holdout, the model is fitted without the last observations, scored
+    by its forecast error on them and then updated with them.
+    
+    Returns:
+        tuple: Fitted TBATS model and its score (AIC or holdout error).
+    """
+    predictor = TBATSPredictor(**model_params, n_jobs=n_jobs)
+    if not holdout:
+        fitted_model = predictor.train(data)
+        return fitted_model, fitted_model.aic
+    
+    predictor.train(data[:-holdout])
+    score = _mae(predictor.predict(steps=holdout), data[-holdout:])
+    return predictor.update(data[-holdout:]), score
+
+
+class _DaemonThreadExecutor:
+    """
+    Minimal thread pool whose threads do not keep the process alive.
+    
+    The threads of a ThreadPoolExecutor are joined when the process exits, so
+    TBATS fits abandoned by the 'compete' mode would delay the exit of the
+    command line tools. Worker processes would even never exit: multiprocessing
+    terminates the thread pool TBATS uses before the fit threads are joined.
+    
+    At most max_queued calls wait for a thread; cancelled calls stop waiting.
+    """
+    
+    def __init__(self, max_workers, thread_name_prefix, max_queued):
+        self._queue = queue.SimpleQueue()
+        self._max_queued = max_queued
+        self._queued = 0
+        self._lock = threading.Lock()
+        for i in range(max_workers):
+            threading.Thread(target=self._work, name=f'{thread_name_prefix}_{i}', daemon=True).start()
+    
+    def submit(self, fn, *args):
+        """
+        Queue a call.
         
-        return lower_bounds, upper_bounds
\ No newline at end of file
+        Raises:
+            queue.Full: If max_queued calls are already waiting for a thread.
+        """
+        with self._lock:
+            if self._queued >= self._max_queued:
+                raise queue.Full
+            self._queued += 1
+        future = Future()
+        future.add_done_callback(self._on_done)
+        self._queue.put((future, fn, args))
+        return future
+    
+    def _on_done(self, future):
+        # A call cancelled while waiting no longer counts as queued
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+    
+    def _work(self):
+        while True:
+            future, fn, args = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self._lock:
+                self._queued -= 1
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+def _get_compete_executor():
+    """
+    Return the thread pool running TBATS fits of the 'compete' mode, creating it on first use.
+    """
+    global _compete_executor
+    with _compete_executor_lock:
+        if _compete_executor is None:
+            _compete_executor = _DaemonThreadExecutor(
+                max_workers=COMPETE_MAX_BACKGROUND_FITS, thread_name_prefix='compete',
+                max_queued=COMPETE_MAX_QUEUED_FITS
+            )
+        return _compete_executor
+
+
+def _get_deadline_pool():
+    """
+    Return the worker processes running fits with a deadline, creating them on first use.
+    """
+    global _deadline_pool
+    with _deadline_pool_lock:
+        if _deadline_pool is None:
+            _deadline_pool = DeadlinePool(max_workers=DEADLINE_MAX_WORKERS, preload=('tbats', __name__))
+        return _deadline_pool
+
+
+def start_deadline_workers():
+    """
+    Start the worker processes running fits with a deadline before the first such fit.
+    """
+    _get_deadline_pool().start()
+
+
+def deadline_stats():
+    """
+    Return statistics of the worker processes running fits with a deadline.
+    
+    Returns:
+        dict: Idle workers, workers started, workers killed at a deadline and
+            workers replaced after a 'compete' fit left a TBATS fit running.
+    """
+    return _get_deadline_pool().stats()
+
+
+def _remember_components(series_id, fitted_model):
+    """
+    Record the components selected for a series and the in-sample RMSE they achieved.
+    """
+    components = fitted_model.params.components
+    if not fitted_model.is_fitted:
+        return
+    with _selected_components_lock:
+        _selected_components[series_id] = (
+            {
+                'use_box_cox': bool(components.use_box_cox),
+                'use_trend': bool(components.use_trend),
+                'use_damped_trend': bool(components.use_damped_trend),
+                'use_arma_errors': bool(components.use_arma_errors),
+            },
+            _rmse(fitted_model),
+        )
+
+
+def _ndtri(p):
+    """
+    Return the quantile of the standard normal distribution at p.
+    """
+    from scipy.special import ndtri
+    
+    return ndtri(p)
+
+
+def _rmse(fitted_model):
+    """
+    Return the in-sample root mean squared error of a fitted model.
+    """
+    return float(np.sqrt(np.mean(fitted_model.resid ** 2)))
+
+
+def _mae(forecast, actual):
+    """
+    Return the mean absolute error of a forecast.
+    """
+    return float(np.mean(np.abs(np.asarray(forecast) - np.asarray(actual))))
@@ -0,0 +1,96 @@
+"""
+Tests of the worker processes running calls with a deadline.
+
+Run with: python -m pytest predict_data/test_deadline.py
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from predict_data.deadline import DeadlinePool, DeadlineExceeded
+
+
+def _add(a, b):
+    return a + b
+
+
+def _fail(message):
+    raise ValueError(message)
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+@pytest.fixture
+def pool():
+    pool = DeadlinePool(max_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_run_returns_result_and_reuses_worker(pool):
+    assert pool.run(10, _add, 1, 2) == 3
+    assert pool.run(10, _add, 3, 4) == 7
+    assert pool.stats() == {"idle": 1, "started": 1, "killed": 0, "recycled": 0}
+
+
+def test_run_raises_exception_and_keeps_worker(pool):
+    with pytest.raises(ValueError, match="bad series"):
+        pool.run(10, _fail, "bad series")
+    with pytest.raises(ValueError):
+        pool.run(10, _fail, "bad series")
+    assert pool.stats() == {"idle": 1, "started": 1, "killed": 0, "recycled": 0}
+    assert pool.run(10, _add, 1, 1) == 2
+
+
+def test_run_kills_worker_after_deadline(pool):
+    pid = pool.run(10, _sleep, 0)
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        pool.run(0.5, _sleep, 30)
+    assert time.monotonic() - start < 5
+
+    # The killed worker is replaced by a new process right away
+    assert pool.stats() == {"idle": 1, "started": 2, "killed": 1, "recycled": 0}
+    assert pool.run(10, _sleep, 0) != pid
+    assert pool.stats() == {"idle": 1, "started": 2, "killed": 1, "recycled": 0}
+
+
+
+
+def test_run_replaces_worker_when_asked_to_recycle(pool):
+    pid = pool.run(10, _sleep, 0, recycle=lambda result: True)
+    assert pool.stats() == {"idle": 1, "started": 2, "killed": 0, "recycled": 1}
+    assert pool.run(10, _sleep, 0, recycle=lambda result: False) != pid
+    assert pool.stats() == {"idle": 1, "started": 2, "killed": 0, "recycled": 1}
+
+def _start_child_and_sleep(pid_file, seconds):
+    child = subprocess.Popen([sys.executable, '-c', f'import time; time.sleep({seconds})'])
+    with open(pid_file, 'w') as f:
+        f.write(str(child.pid))
+    time.sleep(seconds)
+
+
+def _is_running(pid):
+    # A killed process that was not reaped yet is a zombie ('Z')
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc'), reason="reads the process state from /proc")
+def test_kill_stops_processes_started_by_the_call(pool, tmp_path):
+    pid_file = tmp_path / 'child.pid'
+    with pytest.raises(DeadlineExceeded):
+        pool.run(2, _start_child_and_sleep, str(pid_file), 30)
+
+    # The child was in the process group of the killed worker
+    assert not _is_running(int(pid_file.read_text()))
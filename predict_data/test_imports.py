@@ -0,0 +1,38 @@
+"""
+Tests that the entry points do not import heavy modules they do not need.
+
+Run with: python -m pytest predict_data/test_imports.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Prints the top-level modules loaded by an import, run in a fresh interpreter
+IMPORT_PROBE = """
+import json, sys
+import {module}
+print(json.dumps(sorted(m for m in sys.modules if '.' not in m)))
+"""
+
+
+def imported_modules(module):
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_PROBE.format(module=module)],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return set(json.loads(output.strip().splitlines()[-1]))
+
+
+@pytest.mark.parametrize("module, forbidden", [
+    ('predict_data', ('pandas', 'flask', 'tbats', 'matplotlib')),
+    ('predict_data.serve', ('pandas', 'flask', 'tbats', 'matplotlib')),
+    ('predict_data.main', ('flask', 'tbats', 'matplotlib')),
+])
+def test_entry_point_does_not_import_heavy_modules(module, forbidden):
+    assert imported_modules(module) & set(forbidden) == set()
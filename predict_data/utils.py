@@ -3,9 +3,186 @@ Utility functions for the TBATS fertility rate prediction application.
 """
 
 import json
+import math
 import pandas as pd
 import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .metrics import timed
+
+
+class JSONFragment(str):
+    """
+    Already encoded JSON text that encode_json embeds without re-encoding it.
+    """
+
+
+def _dumps(value):
+    """
+    Encode a value as compact JSON, serializing NumPy arrays directly when orjson is available.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    return json.dumps(value, separators=(',', ':'))
+
+
+@timed('encode_response')
+def encode_json(value):
+    """
+    Encode a value as JSON, embedding JSONFragment values as they are.
+    
+    Args:
+        value (object): Dictionaries, lists, JSONFragments and JSON-serializable values.
+        
+    Returns:
+        str: JSON text.
+    """
+    if isinstance(value, JSONFragment):
+        return value
+    if isinstance(value, dict):
+        return '{' + ','.join(_dumps(str(key)) + ':' + encode_json(item) for key, item in value.items()) + '}'
+    if isinstance(value, (list, tuple)) and any(isinstance(item, (JSONFragment, dict)) for item in value):
+        return '[' + ','.join(encode_json(item) for item in value) + ']'
+    return _dumps(value)
+
+
+@timed('encode')
+def encode_records(historical_data, columns):
+    """
+    Encode historical records followed by predictions as a JSON array.
+    
+    Predictions are written straight from their column arrays, without
+    creating a dictionary per row. NaN and infinite values are written as null.
+    
+    Args:
+        historical_data (list): List of dictionaries containing historical data.
+        columns (dict): Numeric or boolean prediction column arrays, e.g. 'year' and 'tfr'.
+        
+    Returns:
+        JSONFragment: JSON array of historical data and predictions.
+    """
+    rows = [_dumps(historical_data)[1:-1]] if historical_data else []
+    if len(columns["year"]):
+        fields = []
+        column_values = []
+        for name, values in columns.items():
+            if values.dtype == bool:
+                fields.append(_dumps(name) + ':{}')
+                column_values.append(np.where(values, 'true', 'false').tolist())
+            elif values.dtype.kind == 'f' and not np.isfinite(values).all():
+                fields.append(_dumps(name) + ':{}')
+                column_values.append([repr(value) if math.isfinite(value) else 'null' for value in values.tolist()])
+            else:
+                fields.append(_dumps(name) + ':{!r}')
+                column_values.append(values.tolist())
+        row_format = '{{' + ','.join(fields) + '}}'
+        rows.append(','.join(map(row_format.format, *column_values)))
+    return JSONFragment('[' + ','.join(rows) + ']')
+
+
+@timed('encode')
+def encode_columns(columns, historical=None):
+    """
+    Encode column arrays as a JSON object of arrays.
+    
+    Args:
+        columns (dict): Mapping of column name to array.
+        historical (dict, optional): Mapping of column name to values written
+            before the values in columns, e.g. the historical data of a forecast.
+            Columns missing from it are padded with nulls.
+        
+    Returns:
+        JSONFragment: JSON object with one array per column.
+    """
+    history_length = len(next(iter(historical.values()))) if historical else 0
+    members = []
+    for name, values in columns.items():
+        parts = [_dumps(values)[1:-1]] if len(values) else []
+        if history_length:
+            history = historical[name] if name in historical else [None] * history_length
+            parts.insert(0, _dumps(history)[1:-1])
+        members.append(_dumps(name) + ':[' + ','.join(parts) + ']')
+    return JSONFragment('{' + ','.join(members) + '}')
+
+
+@timed('decode')
+def decode_json(data):
+    """
+    Parse JSON text, using orjson when it is available.
+    
+    Args:
+        data (bytes or str): JSON text.
+        
+    Returns:
+        object: Parsed value.
+        
+    Raises:
+        ValueError: If the text is not valid JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@timed('postprocess')
+def postprocess_predictions(predictions, start_year, min_value=0.0, max_value=10.0):
+    """
+    Round, bound and attach years to predictions in a single vectorized pass.
+    
+    Args:
+        predictions (np.ndarray): Array of predicted values.
+        start_year (int): The first year for predictions.
+        min_value (float, optional): Minimum acceptable value. Defaults to 0.0.
+        max_value (float, optional): Maximum acceptable value. Defaults to 10.0.
+        
+    Returns:
+        dict: Column arrays 'year' (int) and 'tfr' (float), one element per prediction.
+    """
+    tfr = bound_values(predictions, min_value, max_value)
+    years = np.arange(start_year, start_year + len(tfr), dtype=np.int64)
+    return {"year": years, "tfr": tfr}
+
+
+def bound_values(values, min_value=0.0, max_value=10.0):
+    """
+    Round values to 3 decimal places and keep them within bounds.
+    
+    Args:
+        values (np.ndarray): Array of predicted values or interval bounds.
+        min_value (float, optional): Minimum acceptable value. Defaults to 0.0.
+        max_value (float, optional): Maximum acceptable value. Defaults to 10.0.
+        
+    Returns:
+        np.ndarray: New array of bounded values.
+    """
+    bounded = np.round(np.asarray(values, dtype=np.float64), 3)
+    # Values are non-negative first, then kept within the validation bounds
+    np.maximum(bounded, 0, out=bounded)
+    np.clip(bounded, min_value, max_value, out=bounded)
+    return bounded
+
+
+def records_from_columns(columns):
+    """
+    Convert column arrays to a list of year/tfr dictionaries.
+    
+    Args:
+        columns (dict): Column arrays 'year' and 'tfr'.
+        
+    Returns:
+        list: List of dictionaries with year and tfr keys.
+    """
+    return [
+        {"year": year, "tfr": tfr}
+        for year, tfr in zip(columns["year"].tolist(), columns["tfr"].tolist())
+    ]
+
 
 def format_predictions(historical_data, predictions, start_year):
     """
@@ -19,19 +196,9 @@ def format_predictions(historical_data, predictions, start_year):
     Returns:
         list: List of dictionaries with formatted predictions.
     """
-    formatted_predictions = []
-    
-    for i, pred in enumerate(predictions):
-        year = start_year + i
-        # Ensure prediction is non-negative and rounded to 3 decimal places
-        tfr_value = max(0, round(float(pred), 3))
-        
-        formatted_predictions.append({
-            "year": year,
-            "tfr": tfr_value
-        })
-    
-    return formatted_predictions
+    # Ensure predictions are non-negative and rounded to 3 decimal places
+    columns = postprocess_predictions(predictions, start_year, max_value=np.inf)
+    return records_from_columns(columns)
 
 
 def combine_data(historical_data, predictions):
@@ -45,11 +212,24 @@ def combine_data(historical_data, predictions):
     Returns:
         list: Combined list of historical data and predictions.
     """
-    combined_data = historical_data.copy()
-    combined_data.extend(predictions)
-    return combined_data
+    return historical_data + predictions
 
 
+def save_to_json(data, output_path):
+    """
+    Save data to a JSON file.
+    
+    Args:
+        data (list): List of dictionaries to save.
+        output_path (str): Path to the output JSON file.
+        
+    Returns:
+        list: The saved data.
+    """
+    with open(output_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    return data
+
 
 def validate_predictions(predictions, min_value=0.0, max_value=10.0):
     """
@@ -63,22 +243,11 @@ def validate_predictions(predictions, min_value=0.0, max_value=10.0):
     Returns:
         list: Validated predictions.
     """
-    validated_predictions = []
-    
-    for pred in predictions:
-        tfr = pred["tfr"]
-        # Ensure prediction is within reasonable bounds
-        if tfr < min_value:
-            tfr = min_value
-        elif tfr > max_value:
-            tfr = max_value
-            
-        validated_predictions.append({
-            "year": pred["year"],
-            "tfr": tfr
-        })
-    
-    return validated_predictions
+    columns = {
+        "year": np.array([pred["year"] for pred in predictions], dtype=np.int64),
+        "tfr": np.clip(np.array([pred["tfr"] for pred in predictions], dtype=np.float64), min_value, max_value),
+    }
+    return records_from_columns(columns)
 
 
 def plot_data(historical_data, predictions=None, output_path=None):
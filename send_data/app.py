@@ -1,22 +1,31 @@
-from flask import Flask, jsonify
-import json
+from flask import Flask, request, jsonify
 import os
+import sys
 from flask_cors import CORS
 
+# Make the predict_data package importable when run from any directory
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+from predict_data.config import DEFAULT_OUTPUT_PATH
+from predict_data.materialize import MaterializedFile
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Forecast written by the prediction CLI, kept in memory until the file changes
+prediction_file = MaterializedFile(DEFAULT_OUTPUT_PATH)
+
 @app.route('/getData', methods=['GET'])
 def get_data():
-    # Path to the JSON file
-    json_file_path = os.path.join('predict_data', 'fertility_poland_prediction.json')
-    
-    # Read the JSON file
-    with open(json_file_path, 'r') as file:
-        data = json.load(file)
-    
-    # Return the JSON data
-    return jsonify(data)
+    try:
+        # Serve the pre-serialized forecast, or 304 if the client already has it
+        return prediction_file.response(request)
+    except FileNotFoundError:
+        return jsonify({"error": "Prediction file not found"}), 404
+    except ValueError:
+        return jsonify({"error": "Invalid JSON in prediction file"}), 500
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)